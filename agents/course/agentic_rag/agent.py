@@ -0,0 +1,86 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env.secure"))
+
+import functools
+from typing import TypedDict, Annotated, Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.message import add_messages
+from langchain_core.messages import AnyMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.prebuilt import ToolNode
+from langgraph.graph import START, StateGraph
+from langgraph.prebuilt import tools_condition
+from tools import tools
+from telemetry import llm_span  # agents/tools, put on the path by tools
+
+MODEL_ID = "Qwen/Qwen2.5-Coder-32B-Instruct"
+
+
+@functools.cache
+def get_chat_with_tools():
+    """Build the chat client on first use, so importing the graph stays cheap."""
+    from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
+
+    llm = HuggingFaceEndpoint(
+        repo_id=MODEL_ID,
+        huggingfacehub_api_token=os.getenv("HUGGING_FACE_TOKEN"),
+    )
+
+    # Generate the chat interface, including the tools
+    chat = ChatHuggingFace(llm=llm, verbose=True)
+    return chat.bind_tools(tools)
+
+
+# Generate the AgentState and Agent Graph
+class AgentState(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+def assistant(state: AgentState):
+    with llm_span(MODEL_ID, system="huggingface") as call:
+        response = get_chat_with_tools().invoke(state["messages"])
+        call.message_usage(response)
+    return {
+        "messages": [response],
+    }
+
+
+async def aassistant(state: AgentState):
+    with llm_span(MODEL_ID, system="huggingface") as call:
+        response = await get_chat_with_tools().ainvoke(state["messages"])
+        call.message_usage(response)
+    return {
+        "messages": [response],
+    }
+
+
+def build_alfred(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """
+    Compile the Alfred graph.
+
+    With a checkpointer, the graph keeps each conversation's state under the
+    `thread_id` in the run config, so every turn only needs to send the new
+    message instead of the whole transcript.
+    """
+    # The graph
+    builder = StateGraph(AgentState)
+
+    # Define nodes: these do the work
+    # The assistant has a sync and an async implementation; alfred.ainvoke uses
+    # the async one, and the ToolNode then runs all tool calls of a turn
+    # concurrently
+    builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
+    builder.add_node("tools", ToolNode(tools))
+
+    # Define edges: these determine how the control flow moves
+    builder.add_edge(START, "assistant")
+    builder.add_conditional_edges(
+        "assistant",
+        # If the latest message requires a tool, route to tools
+        # Otherwise, provide a direct response
+        tools_condition,
+    )
+    builder.add_edge("tools", "assistant")
+    return builder.compile(checkpointer=checkpointer)
@@ -0,0 +1,266 @@
+import math
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+def default_preprocessing_func(text: str) -> List[str]:
+    """Same whitespace tokenizer that BM25Retriever uses by default."""
+    return text.split()
+
+
+@dataclass(frozen=True, eq=False)
+class Segment:
+    """
+    An immutable batch of indexed documents.
+
+    Attributes:
+        docs (dict): Document name -> (Document, term frequencies, length).
+        postings (dict): Term -> {document name: term frequency}.
+    """
+
+    docs: Dict[str, Tuple[Document, Counter, int]]
+    postings: Dict[str, Dict[str, int]]
+
+    @classmethod
+    def build(
+        cls,
+        entries: Iterable[Tuple[str, Document, Counter, int]],
+    ) -> "Segment":
+        docs = {}
+        postings: Dict[str, Dict[str, int]] = {}
+        for name, doc, term_freqs, length in entries:
+            docs[name] = (doc, term_freqs, length)
+            for term, tf in term_freqs.items():
+                postings.setdefault(term, {})[name] = tf
+        return cls(docs=docs, postings=postings)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    A consistent, read-only view of the index.
+
+    Readers grab the current snapshot once and score against it, so they never
+    wait on writers or merges. `live` maps each document name to the segment
+    holding its current version; copies in other segments are shadowed.
+    """
+
+    segments: Tuple[Segment, ...] = ()
+    live: Dict[str, Segment] = field(default_factory=dict)
+    doc_freq: Dict[str, int] = field(default_factory=dict)
+    total_length: int = 0
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.live)
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+
+
+class IncrementalBM25Index:
+    """
+    An updatable Okapi BM25 index keyed by `metadata["name"]`.
+
+    Every write builds a small immutable segment and publishes a new snapshot
+    with the document frequencies and total length adjusted by the delta, so
+    there is no full reindex. Once more than `max_segments` segments pile up,
+    they are merged in a background thread and swapped in atomically.
+
+    Exposes `invoke(query)` like `BM25Retriever`, so it is a drop-in
+    replacement for the guest retriever.
+    """
+
+    def __init__(
+        self,
+        k: int = 4,
+        k1: float = 1.5,
+        b: float = 0.75,
+        max_segments: int = 8,
+        preprocess_func: Callable[[str], List[str]] = default_preprocessing_func,
+    ):
+        self.k = k
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.preprocess_func = preprocess_func
+        self._snapshot = Snapshot()
+        self._write_lock = threading.Lock()
+        self._merging = threading.Lock()
+
+    @classmethod
+    def from_documents(
+        cls, documents: Iterable[Document], **kwargs
+    ) -> "IncrementalBM25Index":
+        index = cls(**kwargs)
+        index.upsert(documents)
+        return index
+
+    def __len__(self) -> int:
+        return self._snapshot.doc_count
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    # Writes
+
+    def upsert(self, documents: Iterable[Document]) -> None:
+        """Add new documents or replace existing ones with the same name."""
+        entries = {}
+        for doc in documents:
+            name = doc.metadata["name"]
+            terms = Counter(self.preprocess_func(doc.page_content))
+            entries[name] = (name, doc, terms, sum(terms.values()))
+        if not entries:
+            return
+
+        segment = Segment.build(entries.values())
+        with self._write_lock:
+            current = self._snapshot
+            live = dict(current.live)
+            doc_freq = dict(current.doc_freq)
+            total_length = current.total_length
+
+            for name in entries:
+                if name in live:
+                    total_length -= self._unindex(live[name].docs[name], doc_freq)
+                _, terms, length = segment.docs[name]
+                for term in terms:
+                    doc_freq[term] = doc_freq.get(term, 0) + 1
+                total_length += length
+                live[name] = segment
+
+            self._snapshot = Snapshot(
+                segments=current.segments + (segment,),
+                live=live,
+                doc_freq=doc_freq,
+                total_length=total_length,
+            )
+            needs_merge = len(self._snapshot.segments) > self.max_segments
+
+        if needs_merge:
+            self._merge_in_background()
+
+    def add(self, document: Document) -> None:
+        self.upsert([document])
+
+    def update(self, document: Document) -> None:
+        self.upsert([document])
+
+    def delete(self, name: str) -> bool:
+        """Remove a document by name. Returns False if it was not indexed."""
+        with self._write_lock:
+            current = self._snapshot
+            if name not in current.live:
+                return False
+            live = dict(current.live)
+            doc_freq = dict(current.doc_freq)
+            segment = live.pop(name)
+            total_length = current.total_length - self._unindex(
+                segment.docs[name], doc_freq
+            )
+            self._snapshot = Snapshot(
+                segments=current.segments,
+                live=live,
+                doc_freq=doc_freq,
+                total_length=total_length,
+            )
+        return True
+
+    @staticmethod
+    def _unindex(entry: Tuple[Document, Counter, int], doc_freq: Dict[str, int]) -> int:
+        """Subtract one document's terms from `doc_freq` and return its length."""
+        _, terms, length = entry
+        for term in terms:
+            remaining = doc_freq[term] - 1
+            if remaining:
+                doc_freq[term] = remaining
+            else:
+                del doc_freq[term]
+        return length
+
+    # Segment merging
+
+    def merge(self) -> None:
+        """
+        Compact all current segments into one, dropping shadowed copies.
+
+        The merged segment is built outside the write lock, so reads and
+        writes carry on while it runs. Documents written during the merge live
+        in newer segments and keep shadowing their merged copies.
+        """
+        with self._merging:
+            snapshot = self._snapshot
+            merged_from = set(snapshot.segments)
+            if len(merged_from) < 2:
+                return
+            merged = Segment.build(
+                (name, *segment.docs[name])
+                for name, segment in snapshot.live.items()
+                if segment in merged_from
+            )
+
+            with self._write_lock:
+                current = self._snapshot
+                live = {
+                    name: merged if segment in merged_from else segment
+                    for name, segment in current.live.items()
+                }
+                self._snapshot = Snapshot(
+                    segments=(merged,)
+                    + tuple(s for s in current.segments if s not in merged_from),
+                    live=live,
+                    doc_freq=current.doc_freq,
+                    total_length=current.total_length,
+                )
+
+    def _merge_in_background(self) -> None:
+        if self._merging.locked():
+            return
+        threading.Thread(target=self.merge, name="bm25-merge", daemon=True).start()
+
+    # Reads
+
+    def get(self, name: str) -> Optional[Document]:
+        segment = self._snapshot.live.get(name)
+        return segment.docs[name][0] if segment else None
+
+    def score(
+        self, query: str, snapshot: Optional[Snapshot] = None
+    ) -> Dict[str, float]:
+        """Return the BM25 score of every live document matching `query`."""
+        snapshot = snapshot or self._snapshot
+        if not snapshot.doc_count:
+            return {}
+
+        n = snapshot.doc_count
+        avg_length = snapshot.avg_length
+        scores: Dict[str, float] = {}
+        for term in self.preprocess_func(query):
+            df = snapshot.doc_freq.get(term)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for segment in snapshot.segments:
+                for name, tf in segment.postings.get(term, {}).items():
+                    if snapshot.live.get(name) is not segment:
+                        continue
+                    length = segment.docs[name][2]
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[name] = (
+                        scores.get(name, 0.0) + idf * tf * (self.k1 + 1) / norm
+                    )
+        return scores
+
+    def invoke(self, query: str) -> List[Document]:
+        """Return the top `k` documents for `query`, best first."""
+        snapshot = self._snapshot
+        scores = self.score(query, snapshot)
+        ranked = sorted(scores, key=scores.get, reverse=True)[: self.k]
+        return [snapshot.live[name].docs[name][0] for name in ranked]
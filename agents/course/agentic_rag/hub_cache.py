@@ -0,0 +1,151 @@
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class StaleWhileRevalidateCache(Generic[K, V]):
+    """
+    A TTL cache that serves stale values while refreshing them in the background.
+
+    - Fresh entries (younger than `ttl`) are returned as-is.
+    - Stale entries (younger than `ttl + max_stale`) are returned immediately,
+      and a single background refresh is scheduled for the key.
+    - Missing or expired entries are loaded synchronously. Concurrent misses for
+      the same key share one load.
+
+    A failed background refresh keeps serving the stale value; a failed
+    synchronous load raises to the caller and caches nothing.
+
+    Attributes:
+        loader (Callable): Fetches the value for a key.
+        ttl (float): Seconds an entry stays fresh.
+        max_stale (float): Extra seconds a stale entry may be served.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[K], V],
+        ttl: float = 3600.0,
+        max_stale: float = 86400.0,
+        max_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        self._entries: Dict[K, Tuple[float, V]] = {}
+        self._loading: Dict[K, threading.Event] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="swr-refresh"
+        )
+
+    def get(self, key: K) -> V:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    age = self.clock() - entry[0]
+                    if age < self.ttl:
+                        return entry[1]
+                    if age < self.ttl + self.max_stale:
+                        if key not in self._refreshing:
+                            self._refreshing.add(key)
+                            self._executor.submit(self._refresh, key)
+                        return entry[1]
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+
+            # Another caller is already loading this key; wait and re-check
+            loading.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[1]
+
+        try:
+            return self._load(key)
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def peek(self, key: K) -> Optional[V]:
+        """Return the cached value, however old, without loading or refreshing."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def prefetch(self, keys: Iterable[K], block: bool = True) -> None:
+        """Load several keys concurrently, e.g. to warm the cache at startup."""
+        futures = [self._executor.submit(self._prefetch_one, key) for key in keys]
+        if block:
+            wait(futures)
+
+    def invalidate(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _load(self, key: K) -> V:
+        value = self.loader(key)
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+        return value
+
+    def _refresh(self, key: K) -> None:
+        try:
+            self._load(key)
+        except Exception:
+            logger.warning("Background refresh failed for %r", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _prefetch_one(self, key: K) -> None:
+        try:
+            self.get(key)
+        except Exception:
+            logger.warning("Prefetch failed for %r", key, exc_info=True)
+
+
+@functools.cache
+def get_hub_api():
+    """Create the Hub client on first use; huggingface_hub is slow to import."""
+    from huggingface_hub import HfApi
+
+    # HF_ENDPOINT lets the cache point at a local stand-in server (see hub_stub.py)
+    return HfApi(endpoint=os.getenv("HF_ENDPOINT"))
+
+
+def fetch_hub_stats(author: str) -> str:
+    """Fetches the most downloaded model from a specific author on the Hugging Face Hub."""
+    # List models from the specified author, sorted by downloads
+    models = list(
+        get_hub_api().list_models(
+            author=author, sort="downloads", direction=-1, limit=1
+        )
+    )
+
+    if models:
+        model = models[0]
+        return f"The most downloaded model by {author} is {model.id} with {model.downloads:,} downloads."
+    else:
+        return f"No models found for author {author}."
+
+
+# Download rankings barely move within an hour
+hub_stats_cache: StaleWhileRevalidateCache[str, str] = StaleWhileRevalidateCache(
+    fetch_hub_stats, ttl=3600.0
+)
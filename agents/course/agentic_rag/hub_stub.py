@@ -0,0 +1,98 @@
+"""
+Local stand-in for the Hugging Face Hub `/api/models` endpoint.
+
+Serves canned model listings with an optional artificial delay, so the hub
+stats cache can be exercised without network access:
+
+    python hub_stub.py --port 8765 --latency 1.5
+    HF_ENDPOINT=http://127.0.0.1:8765 python main.py
+
+Or in-process:
+
+    with serve_hub_stub({"Qwen": [("Qwen/Qwen2.5-7B", 1000)]}) as endpoint:
+        ...
+"""
+
+import argparse
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# author -> [(model id, downloads)]
+DEFAULT_MODELS: Dict[str, List[Tuple[str, int]]] = {
+    "Qwen": [("Qwen/Qwen2.5-7B-Instruct", 12_000_000), ("Qwen/Qwen3-0.6B", 4_000_000)],
+    "meta-llama": [("meta-llama/Llama-3.1-8B-Instruct", 9_000_000)],
+    "google": [("google/gemma-3-27b-it", 2_500_000)],
+    "microsoft": [("microsoft/phi-4", 1_200_000)],
+    "mistralai": [("mistralai/Mistral-7B-Instruct-v0.3", 3_000_000)],
+}
+
+
+def make_handler(
+    models: Dict[str, List[Tuple[str, int]]], latency: float
+) -> type[BaseHTTPRequestHandler]:
+    class HubStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/api/models":
+                self.send_error(404)
+                return
+
+            if latency:
+                time.sleep(latency)
+
+            params = parse_qs(url.query)
+            author = params.get("author", [""])[0]
+            limit = int(params.get("limit", ["0"])[0]) or None
+            ranked = sorted(models.get(author, []), key=lambda m: m[1], reverse=True)
+            body = json.dumps(
+                [
+                    {"_id": model_id, "id": model_id, "downloads": downloads}
+                    for model_id, downloads in ranked[:limit]
+                ]
+            ).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return HubStubHandler
+
+
+@contextmanager
+def serve_hub_stub(
+    models: Dict[str, List[Tuple[str, int]]] = DEFAULT_MODELS,
+    latency: float = 0.0,
+    port: int = 0,
+) -> Iterator[str]:
+    """Run the stand-in server on a background thread and yield its endpoint."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(models, latency))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port), make_handler(DEFAULT_MODELS, args.latency)
+    )
+    print(f"Hub stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -1,114 +1,102 @@
-import os
-from dotenv import load_dotenv
+import asyncio
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from agent import build_alfred
+from tools import prefetch_hub_stats
+from telemetry import agent_span, configure_telemetry  # agents/tools, via tools
 
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env.secure"))
 
-from typing import TypedDict, Annotated
-from langgraph.graph.message import add_messages
-from langchain_core.messages import AnyMessage, HumanMessage
-from langgraph.prebuilt import ToolNode
-from langgraph.graph import START, StateGraph
-from langgraph.prebuilt import tools_condition
-from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
-from tools import tools
+def ask(alfred, messages, config=None) -> str:
+    """One turn as one trace: Alfred's model and tool calls under a root span."""
+    with agent_span("alfred"):
+        response = alfred.invoke({"messages": messages}, config=config)
+    return response["messages"][-1].content
 
-llm = HuggingFaceEndpoint(
-    repo_id="Qwen/Qwen2.5-Coder-32B-Instruct",
-    huggingfacehub_api_token=os.getenv("HUGGING_FACE_TOKEN"),
-)
 
+async def aask(alfred, messages) -> str:
+    with agent_span("alfred"):
+        response = await alfred.ainvoke({"messages": messages})
+    return response["messages"][-1].content
 
-# Generate the chat interface, including the tools
 
-chat = ChatHuggingFace(llm=llm, verbose=True)
-tools = tools
-chat_with_tools = chat.bind_tools(tools)
+def main():
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console)
+    configure_telemetry("agentic_rag")
 
+    # Warm the hub stats cache in the background for guests' organisations
+    prefetch_hub_stats(["Qwen", "meta-llama", "google", "microsoft", "mistralai"])
 
-# Generate the AgentState and Agent Graph
-class AgentState(TypedDict):
-    messages: Annotated[list[AnyMessage], add_messages]
+    alfred = build_alfred()
 
+    response = ask(alfred, "Tell me about 'Lady Ada Lovelace'")
 
-def assistant(state: AgentState):
-    return {
-        "messages": [chat_with_tools.invoke(state["messages"])],
-    }
+    print("🎩 Alfred's Response:")
+    print(response)
 
+    response = ask(
+        alfred,
+        "What's the weather like in Paris tonight? Will it be suitable for our fireworks display?",
+    )
 
-# The graph
-builder = StateGraph(AgentState)
+    print("🎩 Alfred's Response:")
+    print(response)
 
-# Define nodes: these do the work
-builder.add_node("assistant", assistant)
-builder.add_node("tools", ToolNode(tools))
+    response = ask(
+        alfred,
+        "One of our guests is from Qwen. What can you tell me about their most popular model?",
+    )
 
-# Define edges: these determine how the control flow moves
-builder.add_edge(START, "assistant")
-builder.add_conditional_edges(
-    "assistant",
-    # If the latest message requires a tool, route to tools
-    # Otherwise, provide a direct response
-    tools_condition,
-)
-builder.add_edge("tools", "assistant")
-alfred = builder.compile()
+    print("🎩 Alfred's Response:")
+    print(response)
 
-response = alfred.invoke({"messages": "Tell me about 'Lady Ada Lovelace'"})
+    response = ask(
+        alfred,
+        "I need to speak with 'Dr. Nikola Tesla' about recent advancements in wireless energy. Can you help me prepare for this conversation?",
+    )
 
-print("🎩 Alfred's Response:")
-print(response["messages"][-1].content)
+    print("🎩 Alfred's Response:")
+    print(response)
 
-response = alfred.invoke(
-    {
-        "messages": "What's the weather like in Paris tonight? Will it be suitable for our fireworks display?"
-    }
-)
+    # Multi-turn conversations keep their state in a checkpointer, keyed by thread
+    alfred_with_memory = build_alfred(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "ada-lovelace"}}
 
-print("🎩 Alfred's Response:")
-print(response["messages"][-1].content)
-
-response = alfred.invoke(
-    {
-        "messages": "One of our guests is from Qwen. What can you tell me about their most popular model?"
-    }
-)
-
-print("🎩 Alfred's Response:")
-print(response["messages"][-1].content)
-
-response = alfred.invoke(
-    {
-        "messages": "I need to speak with 'Dr. Nikola Tesla' about recent advancements in wireless energy. Can you help me prepare for this conversation?"
-    }
-)
-
-print("🎩 Alfred's Response:")
-print(response["messages"][-1].content)
-
-# First interaction
-response = alfred.invoke(
-    {
-        "messages": [
+    # First interaction
+    response = ask(
+        alfred_with_memory,
+        [
             HumanMessage(
                 content="Tell me about 'Lady Ada Lovelace'. What's her background and how is she related to me?"
             )
-        ]
-    }
-)
-
-
-print("🎩 Alfred's Response:")
-print(response["messages"][-1].content)
-print()
-
-# Second interaction (referencing the first)
-response = alfred.invoke(
-    {
-        "messages": response["messages"]
-        + [HumanMessage(content="What projects is she currently working on?")]
-    }
-)
-
-print("🎩 Alfred's Response:")
-print(response["messages"][-1].content)
+        ],
+        config=config,
+    )
+
+    print("🎩 Alfred's Response:")
+    print(response)
+    print()
+
+    # Second interaction (referencing the first); only the new message is sent
+    response = ask(
+        alfred_with_memory,
+        [HumanMessage(content="What projects is she currently working on?")],
+        config=config,
+    )
+
+    print("🎩 Alfred's Response:")
+    print(response)
+
+    # Async invocation: the weather and hub lookups run at the same time
+    response = asyncio.run(
+        aask(
+            alfred,
+            "What's the weather like in Paris tonight, and what is the most popular model by Qwen?",
+        )
+    )
+
+    print("🎩 Alfred's Response:")
+    print(response)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,11 @@
-import datasets
+import threading
 from langchain_core.documents import Document
-from langchain_community.retrievers import BM25Retriever
+from bm25_index import IncrementalBM25Index
 
 
-guest_dataset = datasets.load_dataset("agents-course/unit3-invitees", split="train")
-
-# Convert the dataset entries to a list of Document objects
-docs = [
-    Document(
+def guest_to_document(guest: dict) -> Document:
+    """Convert a dataset entry to a Document keyed by the guest's name."""
+    return Document(
         page_content="\n".join(
             [
                 f"Name: {guest['name']}",
@@ -18,7 +16,41 @@ docs = [
         ),
         metadata={"name": guest["name"]},
     )
-    for guest in guest_dataset
-]
 
-bm25_retriever = BM25Retriever.from_documents(docs)
+
+_bm25_retriever = None
+_load_lock = threading.Lock()
+
+
+def get_retriever() -> IncrementalBM25Index:
+    """
+    Return the guest index, loading the dataset on first use.
+
+    `datasets` is slow to import and the download hits the network, so both
+    are deferred until a tool actually needs the guest list.
+    """
+    global _bm25_retriever
+    if _bm25_retriever is None:
+        with _load_lock:
+            if _bm25_retriever is None:
+                import datasets
+
+                guest_dataset = datasets.load_dataset(
+                    "agents-course/unit3-invitees", split="train"
+                )
+                # An updatable index, so the guest list can change without a
+                # full reindex
+                _bm25_retriever = IncrementalBM25Index.from_documents(
+                    guest_to_document(guest) for guest in guest_dataset
+                )
+    return _bm25_retriever
+
+
+def upsert_guest(guest: dict) -> None:
+    """Add a new guest or replace the entry of an existing one."""
+    get_retriever().upsert([guest_to_document(guest)])
+
+
+def remove_guest(name: str) -> bool:
+    """Remove a guest from the index. Returns False if they were not invited."""
+    return get_retriever().delete(name)
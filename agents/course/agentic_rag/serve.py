@@ -0,0 +1,155 @@
+"""
+Long-running service mode for Alfred.
+
+Compiles the graph once and keeps each conversation's state in a SQLite
+checkpointer, keyed by thread ID. Every turn sends only the new message; the
+checkpointer supplies the rest of the transcript. Turns on different threads
+run concurrently, while turns on the same thread are serialized.
+
+    python serve.py --port 8000 --db checkpoints.sqlite
+
+    curl -X POST localhost:8000/threads/gala-1/messages \\
+        -d '{"message": "Tell me about Lady Ada Lovelace"}'
+    curl localhost:8000/threads/gala-1
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from agent import build_alfred
+from tools import prefetch_hub_stats
+from telemetry import agent_span, configure_telemetry  # agents/tools, via tools
+
+logger = logging.getLogger(__name__)
+
+
+class AlfredService:
+    """
+    One compiled Alfred graph serving many conversations.
+
+    Attributes:
+        alfred: The compiled graph, checkpointed to SQLite.
+    """
+
+    def __init__(self, db_path: str = "checkpoints.sqlite"):
+        # SqliteSaver serializes access to the connection with its own lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.alfred = build_alfred(checkpointer=SqliteSaver(self._conn))
+        self._thread_locks = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, thread_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._thread_locks[thread_id]
+
+    @staticmethod
+    def _config(thread_id: str) -> dict:
+        return {"configurable": {"thread_id": thread_id}}
+
+    def ask(self, thread_id: str, message: str) -> str:
+        """Send one new message on a thread and return Alfred's reply."""
+        with (
+            self._lock_for(thread_id),
+            agent_span("alfred", **{"agent.thread.id": thread_id}),
+        ):
+            response = self.alfred.invoke(
+                {"messages": [HumanMessage(content=message)]},
+                config=self._config(thread_id),
+            )
+        return response["messages"][-1].content
+
+    def history(self, thread_id: str) -> list[dict]:
+        """Return the checkpointed transcript of a thread."""
+        state = self.alfred.get_state(self._config(thread_id))
+        return [
+            {"type": m.type, "content": m.content}
+            for m in state.values.get("messages", [])
+        ]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def make_handler(service: AlfredService) -> type[BaseHTTPRequestHandler]:
+    class AlfredHandler(BaseHTTPRequestHandler):
+        def _thread_id(self, suffix: str = "") -> str | None:
+            parts = self.path.strip("/").split("/")
+            expected = 3 if suffix else 2
+            if len(parts) != expected or parts[0] != "threads":
+                return None
+            if suffix and parts[2] != suffix:
+                return None
+            return parts[1]
+
+        def _send_json(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            thread_id = self._thread_id()
+            if thread_id is None:
+                self.send_error(404)
+                return
+            self._send_json(
+                200, {"thread_id": thread_id, "messages": service.history(thread_id)}
+            )
+
+        def do_POST(self):
+            thread_id = self._thread_id("messages")
+            if thread_id is None:
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                # TypeError: valid JSON that isn't an object, like [] or "x"
+                message = json.loads(self.rfile.read(length))["message"]
+                if not isinstance(message, str):
+                    raise ValueError("message must be a string")
+            except (ValueError, KeyError, TypeError):
+                self.send_error(400, 'Expected a JSON body like {"message": "..."}')
+                return
+
+            try:
+                reply = service.ask(thread_id, message)
+            except Exception:
+                logger.exception("Turn failed on thread %s", thread_id)
+                self.send_error(500)
+                return
+            self._send_json(200, {"thread_id": thread_id, "response": reply})
+
+    return AlfredHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Alfred over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--db", default="checkpoints.sqlite")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console)
+    configure_telemetry("agentic_rag-serve")
+    prefetch_hub_stats(["Qwen", "meta-llama", "google", "microsoft", "mistralai"])
+
+    service = AlfredService(args.db)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🎩 Alfred is serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
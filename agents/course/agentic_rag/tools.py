@@ -1,18 +1,100 @@
+import asyncio
+import functools
+import os
 import random
-from huggingface_hub import list_models
+import sys
+import time
+from collections import OrderedDict
 from langchain.tools import Tool
-from langchain_community.tools import DuckDuckGoSearchRun
-from retriever import bm25_retriever
+from retriever import get_retriever
+from hub_cache import hub_stats_cache
+
+# Shared utilities (singleflight, web search, telemetry) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from singleflight import call_key, get_flight, singleflight
+from telemetry import traced_tool
+
+# Per-tool timeouts (seconds) and result cache lifetimes (seconds) for the
+# async tool path. A ttl of 0 disables caching for that tool.
+TOOL_TIMEOUTS = {
+    "guest_info_retriever": 5.0,
+    "get_hub_stats": 10.0,
+    "get_weather_info": 5.0,
+    "duckduckgo_search": 15.0,
+}
+TOOL_CACHE_TTLS = {
+    "guest_info_retriever": 60.0,
+    "get_hub_stats": 0.0,  # cached with stale-while-revalidate in hub_cache
+    "get_weather_info": 300.0,
+    "duckduckgo_search": 600.0,
+}
+# Most results kept per tool; the least recently used go first
+TOOL_CACHE_MAX_ENTRIES = 256
+
+
+def async_tool(name: str):
+    """
+    Wrap an async tool function with its per-tool timeout and result cache.
+
+    Results are cached by argument, so repeated calls within the ttl return
+    immediately, and concurrent calls on a cache miss share one execution.
+    The cache is an LRU of TOOL_CACHE_MAX_ENTRIES results; expired entries are
+    dropped when they are next looked up. A
+    timeout returns an error string to the model instead of failing the whole
+    tool step, matching how the sync tools report errors.
+    """
+    timeout = TOOL_TIMEOUTS[name]
+    ttl = TOOL_CACHE_TTLS[name]
+    flight = get_flight(name)
+
+    def decorator(func):
+        cache = OrderedDict()
+
+        async def run(query: str) -> str:
+            return await asyncio.wait_for(func(query), timeout=timeout)
+
+        @functools.wraps(func)
+        async def wrapper(query: str) -> str:
+            now = time.monotonic()
+            hit = cache.get(query)
+            if hit and hit[0] > now:
+                cache.move_to_end(query)
+                return hit[1]
+            if hit:
+                del cache[query]
+            try:
+                result = await flight.ado(call_key((query,), {}), run, query)
+            except asyncio.TimeoutError:
+                return f"Error: {name} timed out after {timeout:.0f}s for {query!r}."
+            if ttl:
+                cache[query] = (now + ttl, result)
+                cache.move_to_end(query)
+                while len(cache) > TOOL_CACHE_MAX_ENTRIES:
+                    cache.popitem(last=False)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
 
 def extract_text(query: str) -> str:
     """Retrieves detailed information about gala guests based on their name or relation."""
-    results = bm25_retriever.invoke(query)
+    results = get_retriever().invoke(query)
     if results:
         return "\n\n".join([doc.page_content for doc in results[:3]])
     else:
         return "No matching guest information found."
 
 
+@async_tool("guest_info_retriever")
+async def aextract_text(query: str) -> str:
+    """Async version of extract_text."""
+    return await asyncio.to_thread(extract_text, query)
+
 
 def get_weather_info(location: str) -> str:
     """Fetches dummy weather information for a given location."""
@@ -27,27 +109,39 @@ def get_weather_info(location: str) -> str:
     return f"Weather in {location}: {data['condition']}, {data['temp_c']}°C"
 
 
+@async_tool("get_weather_info")
+async def aget_weather_info(location: str) -> str:
+    """Async version of get_weather_info."""
+    return get_weather_info(location)
+
+
 def get_hub_stats(author: str) -> str:
     """Fetches the most downloaded model from a specific author on the Hugging Face Hub."""
     try:
-        # List models from the specified author, sorted by downloads
-        models = list(
-            list_models(author=author, sort="downloads", direction=-1, limit=1)
-        )
-
-        if models:
-            model = models[0]
-            return f"The most downloaded model by {author} is {model.id} with {model.downloads:,} downloads."
-        else:
-            return f"No models found for author {author}."
+        # Served from a stale-while-revalidate cache; only a cold miss waits
+        # on the Hub
+        return hub_stats_cache.get(author)
     except Exception as e:
         return f"Error fetching models for {author}: {str(e)}"
 
 
+def prefetch_hub_stats(authors: list[str], block: bool = False) -> None:
+    """Warm the hub stats cache for authors we expect to be asked about."""
+    hub_stats_cache.prefetch(authors, block=block)
+
+
+@async_tool("get_hub_stats")
+async def aget_hub_stats(author: str) -> str:
+    """Async version of get_hub_stats."""
+    # A cache miss blocks on an HTTP call to the Hub, so keep it off the loop
+    return await asyncio.to_thread(get_hub_stats, author)
+
+
 # Initialize the tool
 hub_stats_tool = Tool(
     name="get_hub_stats",
     func=get_hub_stats,
+    coroutine=aget_hub_stats,
     description="Fetches the most downloaded model from a specific author on the Hugging Face Hub.",
 )
 
@@ -55,6 +149,7 @@ hub_stats_tool = Tool(
 weather_info_tool = Tool(
     name="get_weather_info",
     func=get_weather_info,
+    coroutine=aget_weather_info,
     description="Fetches dummy weather information for a given location.",
 )
 
@@ -62,7 +157,51 @@ weather_info_tool = Tool(
 guest_info_tool = Tool(
     name="guest_info_retriever",
     description="Retrieves detailed information about gala guests based on their name or relation.",
-    func=extract_text,
+    func=singleflight(extract_text, name="guest_info_retriever"),
+    coroutine=aextract_text,
+)
+
+
+@functools.cache
+def get_search():
+    """
+    Create the DuckDuckGo searcher on first use. Results are cached on disk
+    across runs; the service answers many conversations, so they aren't
+    de-duplicated by URL.
+    """
+    from web_search import WebSearcher
+
+    return WebSearcher(max_results=5).session(dedup=False)
+
+
+def search(query: str) -> str:
+    """Searches DuckDuckGo, returning an error string instead of raising."""
+    try:
+        return get_search().search(query)
+    except Exception as e:
+        return f"Error searching for {query!r}: {e}"
+
+
+@async_tool("duckduckgo_search")
+async def asearch(query: str) -> str:
+    """Async version of the DuckDuckGo search."""
+    return await asyncio.to_thread(search, query)
+
+
+search_tool = Tool(
+    name="duckduckgo_search",
+    description=(
+        "A wrapper around DuckDuckGo Search. Useful for when you need to answer "
+        "questions about current events. Input should be a search query."
+    ),
+    func=singleflight(search, name="duckduckgo_search"),
+    coroutine=asearch,
 )
 
-tools = [guest_info_tool, hub_stats_tool, weather_info_tool, DuckDuckGoSearchRun()]
+tools = [guest_info_tool, hub_stats_tool, weather_info_tool, search_tool]
+
+# One tool span per call, on the sync and async paths alike; cache hits
+# show up as short spans
+for _tool in tools:
+    _tool.func = traced_tool(_tool.func, name=_tool.name)
+    _tool.coroutine = traced_tool(_tool.coroutine, name=_tool.name)
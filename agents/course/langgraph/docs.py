@@ -4,13 +4,25 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env.secure"))
 
 import base64
-from typing import List, TypedDict, Annotated, Optional
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage
+import functools
+import sys
+from typing import TYPE_CHECKING, List, TypedDict, Annotated, Optional
+from langchain_core.messages import AnyMessage, HumanMessage
 from langgraph.graph.message import add_messages
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
-from IPython.display import Image, display
+
+# Shared utilities (prompt layout, telemetry) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from prompt_layout import PromptLayout
+from telemetry import agent_span, configure_telemetry, llm_span, traced_tool
+
+if TYPE_CHECKING:
+    # langchain_openai (and openai under it) is slow to import; the clients
+    # are only built when the graph first calls a model
+    from langchain_openai import ChatOpenAI
 
 
 class AgentState(TypedDict):
@@ -19,9 +31,15 @@ class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
 
 
-vision_llm = ChatOpenAI(model="gpt-4o")
+@functools.cache
+def get_vision_llm() -> "ChatOpenAI":
+    """Create the vision client on first use, not at import."""
+    from langchain_openai import ChatOpenAI
 
+    return ChatOpenAI(model="gpt-4o")
 
+
+@traced_tool
 def extract_text(img_path: str) -> str:
     """
     Extract text from an image file using a multimodal model.
@@ -57,7 +75,9 @@ def extract_text(img_path: str) -> str:
         ]
 
         # Call the vision-capable model
-        response = vision_llm.invoke(message)
+        with llm_span("gpt-4o") as call:
+            response = get_vision_llm().invoke(message)
+            call.message_usage(response)
 
         # Append extracted text
         all_text += response.content + "\n\n"
@@ -70,6 +90,7 @@ def extract_text(img_path: str) -> str:
         return ""
 
 
+@traced_tool
 def divide(a: int, b: int) -> float:
     """Divide a and b - for Master Wayne's occasional calculations."""
     return a / b
@@ -78,13 +99,18 @@ def divide(a: int, b: int) -> float:
 # Equip the butler with tools
 tools = [divide, extract_text]
 
-llm = ChatOpenAI(model="gpt-4o")
-llm_with_tools = llm.bind_tools(tools, parallel_tool_calls=False)
 
+@functools.cache
+def get_llm_with_tools():
+    """Create the chat client on first use, not at import."""
+    from langchain_openai import ChatOpenAI
 
-def assistant(state: AgentState):
-    # System message
-    textual_description_of_tool = """
+    llm = ChatOpenAI(model="gpt-4o")
+    return llm.bind_tools(tools, parallel_tool_calls=False)
+
+
+# System message
+textual_description_of_tool = """
 extract_text(img_path: str) -> str:
     Extract text from an image file using a multimodal model.
 
@@ -96,13 +122,27 @@ extract_text(img_path: str) -> str:
 divide(a: int, b: int) -> float:
     Divide a and b
 """
+
+# The loaded image goes after the static instructions, not inside them, so
+# every run shares the instructions' prefix in the model server's cache
+ALFRED_PROMPT = PromptLayout(
+    "docs_assistant",
+    f"You are a helpful butler named Alfred that serves Mr. Wayne and Batman. You can analyse documents and run computations with provided tools:\n{textual_description_of_tool} \n You have access to some optional images.",
+)
+
+
+def assistant(state: AgentState):
     image = state["input_file"]
-    sys_msg = SystemMessage(
-        content=f"You are a helpful butler named Alfred that serves Mr. Wayne and Batman. You can analyse documents and run computations with provided tools:\n{textual_description_of_tool} \n You have access to some optional images. Currently the loaded image is: {image}"
+    messages = ALFRED_PROMPT.messages(
+        history=state["messages"], context=f"Currently the loaded image is: {image}"
     )
 
+    with llm_span("gpt-4o") as call:
+        response = get_llm_with_tools().invoke(messages)
+        call.message_usage(response)
+
     return {
-        "messages": [llm_with_tools.invoke([sys_msg] + state["messages"])],
+        "messages": [response],
         "input_file": state["input_file"],
     }
 
@@ -126,15 +166,27 @@ builder.add_edge("tools", "assistant")
 react_graph = builder.compile()
 
 
-messages = [
-    HumanMessage(
-        content="According to the note provided by Mr. Wayne in the provided images. What's the list of items I should buy for the dinner menu?"
-    )
-]
-messages = react_graph.invoke(
-    {"messages": messages, "input_file": os.path.join(os.path.dirname(__file__), "meal_plan.jpg")}
-)
+def main():
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console)
+    configure_telemetry("langgraph-docs")
+
+    messages = [
+        HumanMessage(
+            content="According to the note provided by Mr. Wayne in the provided images. What's the list of items I should buy for the dinner menu?"
+        )
+    ]
+    with agent_span("alfred_docs"):
+        messages = react_graph.invoke(
+            {
+                "messages": messages,
+                "input_file": os.path.join(os.path.dirname(__file__), "meal_plan.jpg"),
+            }
+        )
+
+    # Show the messages
+    for m in messages["messages"]:
+        m.pretty_print()
+
 
-# Show the messages
-for m in messages["messages"]:
-    m.pretty_print()
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,21 @@ from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env.secure"))
 
-from typing import TypedDict, List, Dict, Any, Optional
+import functools
+import sys
+from typing import TYPE_CHECKING, TypedDict, List, Dict, Any, Optional
 from langgraph.graph import StateGraph, START, END
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
-from langfuse.langchain import CallbackHandler
+
+# Shared utilities (prompt layout) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from prompt_layout import PromptLayout, format_prefix_report
+
+if TYPE_CHECKING:
+    # langchain_openai (and openai under it) is slow to import; the model is
+    # only built when the first email is classified
+    from langchain_openai import ChatOpenAI
 
 
 class EmailState(TypedDict):
@@ -30,10 +40,50 @@ class EmailState(TypedDict):
     messages: List[Dict[str, Any]]  # Track conversation with LLM for analysis
 
 
-# Initialize our LLM
-model = ChatOpenAI(temperature=0)
+# Instructions come first and the email last, so every request shares the
+# instructions' prefix in the model server's prefix cache
+CLASSIFY_PROMPT = PromptLayout(
+    "classify_email",
+    """
+    As Alfred the butler, analyze the email below and determine if it is spam or legitimate.
+
+    First, determine if this email is spam. If it is spam, explain why.
+    If it is legitimate, categorize it (inquiry, complaint, thank you, etc.).
+    """,
+)
+
+DRAFT_PROMPT = PromptLayout(
+    "draft_response",
+    """
+    As Alfred the butler, draft a polite preliminary response to the email below.
+
+    Draft a brief, professional response that Mr. Hugg can review and personalize before sending.
+    """,
+)
+
+
+def format_email(email: Dict[str, Any]) -> str:
+    return f"""Email:
+    From: {email['sender']}
+    Subject: {email['subject']}
+    Body: {email['body']}"""
+
+
+# Initialize our LLM on first use, not at import
+@functools.cache
+def get_model() -> "ChatOpenAI":
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(temperature=0)
+
+
+@functools.cache
+def get_langfuse_callback():
+    # langfuse is slow to import, so only pay for it when a run is traced
+    from langfuse.langchain import CallbackHandler
+
+    return CallbackHandler()
 
-langfuse_callback = CallbackHandler()
 
 def read_email(state: EmailState):
     """Alfred reads and logs the incoming email"""
@@ -53,21 +103,11 @@ def classify_email(state: EmailState):
     email = state["email"]
 
     # Prepare our prompt for the LLM
-    prompt = f"""
-    As Alfred the butler, analyze this email and determine if it is spam or legitimate.
-    
-    Email:
-    From: {email['sender']}
-    Subject: {email['subject']}
-    Body: {email['body']}
-    
-    First, determine if this email is spam. If it is spam, explain why.
-    If it is legitimate, categorize it (inquiry, complaint, thank you, etc.).
-    """
+    prompt = format_email(email)
 
     # Call the LLM
-    messages = [HumanMessage(content=prompt)]
-    response = model.invoke(messages)
+    messages = CLASSIFY_PROMPT.messages(prompt)
+    response = get_model().invoke(messages)
 
     # Simple logic to parse the response (in a real app, you'd want more robust parsing)
     response_text = response.content.lower()
@@ -117,22 +157,13 @@ def draft_response(state: EmailState):
     category = state["email_category"] or "general"
 
     # Prepare our prompt for the LLM
-    prompt = f"""
-    As Alfred the butler, draft a polite preliminary response to this email.
-    
-    Email:
-    From: {email['sender']}
-    Subject: {email['subject']}
-    Body: {email['body']}
-    
-    This email has been categorized as: {category}
-    
-    Draft a brief, professional response that Mr. Hugg can review and personalize before sending.
-    """
+    prompt = f"""{format_email(email)}
+
+    This email has been categorized as: {category}"""
 
     # Call the LLM
-    messages = [HumanMessage(content=prompt)]
-    response = model.invoke(messages)
+    messages = DRAFT_PROMPT.messages(prompt)
+    response = get_model().invoke(messages)
 
     # Update messages for tracking
     new_messages = state.get("messages", []) + [
@@ -199,48 +230,78 @@ email_graph.add_edge("notify_mr_hugg", END)
 # Compile the graph
 compiled_graph = email_graph.compile()
 
-# Example legitimate email
-legitimate_email = {
-    "sender": "john.smith@example.com",
-    "subject": "Question about your services",
-    "body": "Dear Mr. Hugg, I was referred to you by a colleague and I'm interested in learning more about your consulting services. Could we schedule a call next week? Best regards, John Smith",
-}
-
-# Example spam email
-spam_email = {
-    "sender": "winner@lottery-intl.com",
-    "subject": "YOU HAVE WON $5,000,000!!!",
-    "body": "CONGRATULATIONS! You have been selected as the winner of our international lottery! To claim your $5,000,000 prize, please send us your bank details and a processing fee of $100.",
-}
-
-# Process the legitimate email
-print("\nProcessing legitimate email...")
-legitimate_result = compiled_graph.invoke(
-    input={
-        "email": legitimate_email,
-        "is_spam": None,
-        "spam_reason": None,
-        "email_category": None,
-        "email_draft": None,
-        "messages": [],
-    },
-    config={
-        "callbacks": [langfuse_callback],
-    },
-)
 
-# Process the spam email
-print("\nProcessing spam email...")
-spam_result = compiled_graph.invoke(
-    input={
-        "email": spam_email,
-        "is_spam": None,
-        "spam_reason": None,
-        "email_category": None,
-        "email_draft": None,
-        "messages": [],
-    },
-    config={
-        "callbacks": [langfuse_callback],
-    },
-)
+def triage_email(
+    email: Dict[str, Any], config: Optional[dict] = None
+) -> Dict[str, Any]:
+    """Run one email through the graph and return Alfred's decisions."""
+    result = compiled_graph.invoke(
+        input={
+            "email": email,
+            "is_spam": None,
+            "spam_reason": None,
+            "email_category": None,
+            "email_draft": None,
+            "messages": [],
+        },
+        config=config,
+    )
+    return {
+        key: result.get(key)
+        for key in ("is_spam", "spam_reason", "email_category", "email_draft")
+    }
+
+
+def main():
+    # Example legitimate email
+    legitimate_email = {
+        "sender": "john.smith@example.com",
+        "subject": "Question about your services",
+        "body": "Dear Mr. Hugg, I was referred to you by a colleague and I'm interested in learning more about your consulting services. Could we schedule a call next week? Best regards, John Smith",
+    }
+
+    # Example spam email
+    spam_email = {
+        "sender": "winner@lottery-intl.com",
+        "subject": "YOU HAVE WON $5,000,000!!!",
+        "body": "CONGRATULATIONS! You have been selected as the winner of our international lottery! To claim your $5,000,000 prize, please send us your bank details and a processing fee of $100.",
+    }
+
+    # Process the legitimate email
+    print("\nProcessing legitimate email...")
+    legitimate_result = compiled_graph.invoke(
+        input={
+            "email": legitimate_email,
+            "is_spam": None,
+            "spam_reason": None,
+            "email_category": None,
+            "email_draft": None,
+            "messages": [],
+        },
+        config={
+            "callbacks": [get_langfuse_callback()],
+        },
+    )
+
+    # Process the spam email
+    print("\nProcessing spam email...")
+    spam_result = compiled_graph.invoke(
+        input={
+            "email": spam_email,
+            "is_spam": None,
+            "spam_reason": None,
+            "email_category": None,
+            "email_draft": None,
+            "messages": [],
+        },
+        config={
+            "callbacks": [get_langfuse_callback()],
+        },
+    )
+
+    # How many requests could reuse a cached prompt prefix
+    print(format_prefix_report())
+
+
+if __name__ == "__main__":
+    main()
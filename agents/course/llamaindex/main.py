@@ -1,49 +1,195 @@
+import argparse
 import asyncio
+import functools
 import os
+import sys
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env.secure"))
 
-from llama_index.llms.huggingface_api import HuggingFaceInferenceAPI
-from llama_index.core.agent.workflow import AgentWorkflow, ReActAgent
-from llama_index.core.workflow import Context
+# Shared utilities (telemetry) live in agents/tools; appended so the local
+# tools.py still wins for `import tools`
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from telemetry import configure_telemetry
 
-from tools import add, subtract, multiply, divide
+# llama_index and mcp take seconds to import; they are imported where they
+# are first needed, so `--help` and the import itself stay fast
+if TYPE_CHECKING:
+    from llama_index.core.agent.workflow import AgentWorkflow
+    from llama_index.llms.huggingface_api import HuggingFaceInferenceAPI
+    from mcp import StdioServerParameters
 
 
-# Define async function
-async def main():
-    # Initialize llm
-    llm = HuggingFaceInferenceAPI(
+def calculator_server() -> "StdioServerParameters":
+    """The calculator tools served out-of-process by tools.py over stdio."""
+    from mcp import StdioServerParameters
+
+    return StdioServerParameters(
+        command=sys.executable,
+        args=[os.path.join(os.path.dirname(__file__), "tools.py")],
+    )
+
+
+# Planner hint: translate the whole request into one expression so a chained
+# calculation takes a single tool call instead of one LLM step per operation
+CALCULATOR_PROMPT = (
+    "You are a calculator agent that can add, subtract, multiply, and divide numbers. "
+    "When a request chains several operations, first write the whole calculation "
+    "as a single arithmetic expression with parentheses, e.g. "
+    "'Add 2 and 3 and multiply the result by 4' becomes ((2 + 3) * 4), and "
+    "evaluate it with one call to the calculate tool. Only fall back to add, "
+    "subtract, multiply or divide for a single operation."
+)
+
+
+@functools.cache
+def get_llm() -> "HuggingFaceInferenceAPI":
+    """One inference client, shared by every agent and query in the process."""
+    from llama_index.llms.huggingface_api import HuggingFaceInferenceAPI
+
+    return HuggingFaceInferenceAPI(
         model_name="Qwen/Qwen2.5-Coder-32B-Instruct",
         token=os.getenv("HUGGING_FACE_TOKEN"),
         provider="auto",
     )
 
+
+def build_calculator(tools: list, streaming: bool = True) -> "AgentWorkflow":
+    from llama_index.core.agent.workflow import AgentWorkflow, ReActAgent
+
     calculator_agent = ReActAgent(
         name="Calculator",
         description="A calculator agent that can add, subtract, multiply, and divide numbers.",
-        system_prompt="You are a calculator agent that can add, subtract, multiply, and divide numbers.",
-        tools=[add, subtract, multiply, divide],
-        llm=llm,
+        system_prompt=CALCULATOR_PROMPT,
+        tools=tools,
+        llm=get_llm(),
+        streaming=streaming,
     )
 
     # Initalize agent
-    agent = AgentWorkflow(
+    return AgentWorkflow(
         agents=[calculator_agent],
     )
 
+
+async def run_calculator(tools: list, trace_path: str | None = None) -> None:
+    from llama_index.core.workflow import Context
+    from tracing import run_traced
+
+    agent = build_calculator(tools)
     ctx = Context(agent)
 
-    # Run agent
-    response = await agent.run(
+    # Run agent, timing every LLM call, tool call and ReAct step
+    response, tracer = await run_traced(
+        agent,
         user_msg="Add 2 and 3 and multiply the result by 4 then divide the result by 2",
         ctx=ctx,
+        trace_path=trace_path,
     )
     print(response)
+    print(tracer.summary_table())
+    if trace_path:
+        print(f"Trace written to {trace_path} (open in https://ui.perfetto.dev)")
+
+
+async def run_queries(tools: list, queries: list[str], concurrency: int) -> None:
+    from runner import MultiQueryRunner
+
+    # One workflow and LLM client for all queries, a fresh Context per query.
+    # The shared client closes all of its sessions after every streamed reply,
+    # cutting off the other queries' streams, so these runs don't stream
+    runner = MultiQueryRunner(
+        build_calculator(tools, streaming=False), max_concurrency=concurrency
+    )
+    started = asyncio.get_running_loop().time()
+    results = await runner.run_many(queries)
+    wall = asyncio.get_running_loop().time() - started
+
+    for result in results:
+        print(f"{result.query!r} -> {result.response if result.ok else result.error}")
+    stats = runner.latency_summary(results)
+    print(
+        f"{stats['queries']} queries in {wall:.2f}s ({stats['queries'] / wall:.2f}/s), "
+        f"p50 {stats['p50_ms']:.0f}ms, p95 {stats['p95_ms']:.0f}ms, "
+        f"p99 {stats['p99_ms']:.0f}ms, {stats['errors']} errors"
+    )
+
+
+# Define async function
+async def main(
+    use_mcp: bool = False,
+    trace_path: str | None = None,
+    queries: list[str] | None = None,
+    concurrency: int = 8,
+):
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console)
+    configure_telemetry("llamaindex-calculator")
+
+    async def run(tools: list) -> None:
+        if queries:
+            await run_queries(tools, queries, concurrency)
+        else:
+            await run_calculator(tools, trace_path)
+
+    if not use_mcp:
+        from tools import add, subtract, multiply, divide, calculate
+
+        await run([calculate, add, subtract, multiply, divide])
+        return
+
+    from mcp_pool import McpClientPool
+
+    # Keep warm sessions to the MCP server processes for the whole run
+    async with McpClientPool([calculator_server()]) as pool:
+        await run(pool.as_function_tools())
+        for name, stats in pool.metrics().items():
+            if stats["calls"]:
+                print(
+                    f"{name}: {stats['calls']} calls, p50 {stats['p50_ms']:.1f}ms, "
+                    f"p95 {stats['p95_ms']:.1f}ms, {stats['errors']} errors"
+                )
 
 
 # Run async function
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Run the calculator agent")
+    parser.add_argument(
+        "--mcp",
+        action="store_true",
+        help="Call the tools through a pool of MCP server processes",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write a Chrome trace / Perfetto JSON file of the run",
+    )
+    parser.add_argument(
+        "--queries",
+        metavar="FILE",
+        help="Run every line of FILE as a separate query, concurrently",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of queries in flight with --queries",
+    )
+    args = parser.parse_args()
+
+    queries = None
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    asyncio.run(
+        main(
+            use_mcp=args.mcp,
+            trace_path=args.trace,
+            queries=queries,
+            concurrency=args.concurrency,
+        )
+    )
@@ -0,0 +1,390 @@
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import anyio
+from llama_index.core.tools import FunctionTool
+from mcp import ClientSession, McpError, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.types import CONNECTION_CLOSED, CallToolResult, Tool
+from pydantic import Field, create_model
+
+# Shared utilities (latency percentiles) live in agents/tools; appended so
+# the local tools.py still wins for `import tools`
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from latency import percentile
+
+logger = logging.getLogger(__name__)
+
+JSON_SCHEMA_TYPES = {
+    "integer": int,
+    "number": float,
+    "string": str,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+class McpToolError(RuntimeError):
+    """Raised when an MCP server reports that a tool call failed."""
+
+
+@dataclass
+class ToolLatency:
+    """
+    Rolling latency samples for one tool.
+
+    Attributes:
+        calls (int): Total calls made.
+        errors (int): Calls that raised or returned an MCP error.
+        samples (deque): The most recent call durations in seconds.
+    """
+
+    calls: int = 0
+    errors: int = 0
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=1024))
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": (
+                1000 * sum(self.samples) / len(self.samples) if self.samples else 0.0
+            ),
+            "p50_ms": 1000 * percentile(self.samples, 0.50),
+            "p95_ms": 1000 * percentile(self.samples, 0.95),
+            "max_ms": 1000 * max(self.samples, default=0.0),
+        }
+
+
+def is_connection_lost(error: BaseException) -> bool:
+    """Errors meaning the server's transport is gone, not that the call failed."""
+    if isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError)):
+        return True
+    return isinstance(error, McpError) and error.error.code == CONNECTION_CLOSED
+
+
+def root_cause(error: BaseException) -> BaseException:
+    """The first leaf of the exception groups anyio wraps transport errors in."""
+    while isinstance(error, BaseExceptionGroup) and error.exceptions:
+        error = error.exceptions[0]
+    return error
+
+
+class PooledSession:
+    """
+    One warm MCP client session to a server process.
+
+    The stdio transport and session are async context managers that must be
+    entered and exited in the same task, so each session is owned by its own
+    background task. The task pings the server every `health_interval`
+    seconds and reconnects when a ping fails or a call finds the transport
+    closed, so a server process that died is replaced rather than left
+    holding a dead session. It stays open until the pool closes.
+    """
+
+    def __init__(
+        self,
+        server: StdioServerParameters,
+        max_in_flight: int,
+        health_interval: float = 5.0,
+    ):
+        self.server = server
+        self.session: Optional[ClientSession] = None
+        self.ready = asyncio.Event()
+        self.in_flight = 0
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.health_interval = health_interval
+        self.reconnects = 0
+        self.last_error: Optional[BaseException] = None
+        self._closing = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self._closing = True
+        self._wake.set()
+
+    def mark_lost(self, session: ClientSession) -> None:
+        """Drop `session` and reconnect, unless it was already replaced."""
+        if self.session is session:
+            self.ready.clear()
+            self.session = None
+            self._wake.set()
+
+    async def _run(self) -> None:
+        backoff = 0.5
+        while not self._closing:
+            try:
+                async with stdio_client(self.server) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        self.session = session
+                        self.ready.set()
+                        backoff = 0.5
+                        await self._watch(session)
+                        if not self._closing:
+                            logger.warning(
+                                "MCP server %s went away; reconnecting",
+                                self.server.args,
+                            )
+            except Exception as e:
+                self.last_error = root_cause(e)
+                logger.warning(
+                    "MCP session to %s failed; reconnecting",
+                    self.server.args,
+                    exc_info=True,
+                )
+            finally:
+                self.ready.clear()
+                self.session = None
+            if not self._closing:
+                self.reconnects += 1
+                # Woken early by stop(), so closing never waits out a backoff
+                try:
+                    await asyncio.wait_for(self._wake.wait(), backoff)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                backoff = min(backoff * 2, 10.0)
+
+    async def _watch(self, session: ClientSession) -> None:
+        """
+        Return when the pool closes or a call found the transport closed;
+        raise when the server stops answering pings.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.health_interval)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(session.send_ping(), self.health_interval)
+                continue
+            self._wake.clear()
+            if self._closing or self.session is not session:
+                return
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await self._task
+
+
+class McpClientPool:
+    """
+    A pool of warm MCP sessions across one or more stdio server processes.
+
+    Each server is spawned `sessions_per_server` times up front and its tools
+    are discovered once. A call goes to the least busy ready session serving
+    that tool. MCP multiplexes requests over a session, so each session also
+    takes up to `max_in_flight_per_session` concurrent calls. No call pays for
+    a subprocess spawn.
+
+    Usage:
+        async with McpClientPool([server]) as pool:
+            agent = ReActAgent(tools=pool.as_function_tools(), ...)
+            ...
+            print(pool.metrics())
+    """
+
+    def __init__(
+        self,
+        servers: List[StdioServerParameters],
+        sessions_per_server: int = 2,
+        max_in_flight_per_session: int = 8,
+        call_timeout: float = 30.0,
+        connect_timeout: float = 30.0,
+        health_interval: float = 5.0,
+    ):
+        self.servers = servers
+        self.sessions_per_server = sessions_per_server
+        self.max_in_flight_per_session = max_in_flight_per_session
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.health_interval = health_interval
+        self._sessions: Dict[int, List[PooledSession]] = {}
+        self._tools: Dict[str, Tool] = {}
+        self._tool_servers: Dict[str, List[int]] = {}
+        self._latency: Dict[str, ToolLatency] = {}
+        self._tie_breaker = itertools.count()
+
+    async def __aenter__(self) -> "McpClientPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """
+        Spawn every session, wait until they are warm and discover tools.
+
+        Raises McpToolError, chained to the last connection error, if the
+        sessions aren't all up within `connect_timeout` seconds.
+        """
+        for index, server in enumerate(self.servers):
+            sessions = [
+                PooledSession(
+                    server, self.max_in_flight_per_session, self.health_interval
+                )
+                for _ in range(self.sessions_per_server)
+            ]
+            for session in sessions:
+                session.start()
+            self._sessions[index] = sessions
+
+        for index, sessions in self._sessions.items():
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(s.ready.wait() for s in sessions)),
+                    self.connect_timeout,
+                )
+            except asyncio.TimeoutError:
+                await self.close()
+                error = next((s.last_error for s in sessions if s.last_error), None)
+                raise McpToolError(
+                    f"MCP server {self.servers[index].args} did not start within "
+                    f"{self.connect_timeout}s; last error: {error!r}"
+                ) from error
+            listing = await sessions[0].session.list_tools()
+            for tool in listing.tools:
+                self._tools.setdefault(tool.name, tool)
+                self._tool_servers.setdefault(tool.name, []).append(index)
+                self._latency.setdefault(tool.name, ToolLatency())
+
+    async def close(self) -> None:
+        for sessions in self._sessions.values():
+            for session in sessions:
+                session.stop()
+        for sessions in self._sessions.values():
+            await asyncio.gather(*(s.wait() for s in sessions), return_exceptions=True)
+
+    @property
+    def tools(self) -> List[Tool]:
+        return list(self._tools.values())
+
+    async def _pick_session(self, name: str) -> PooledSession:
+        """The least busy ready session serving `name`, waiting for a reconnect."""
+        candidates = [
+            session
+            for index in self._tool_servers[name]
+            for session in self._sessions[index]
+        ]
+        ready = [s for s in candidates if s.ready.is_set()]
+        if not ready:
+            # Every session is reconnecting; take the first one back
+            waiters = [asyncio.ensure_future(s.ready.wait()) for s in candidates]
+            try:
+                await asyncio.wait(
+                    waiters,
+                    timeout=self.call_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            ready = [s for s in candidates if s.ready.is_set()]
+        if not ready:
+            raise McpToolError(f"No MCP session is available for tool {name!r}")
+        return min(ready, key=lambda s: (s.in_flight, next(self._tie_breaker)))
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+        """
+        Call a tool on the least busy session that serves it.
+
+        A call that finds its session's server gone marks the session for
+        reconnection and is retried on another session, or on the first one
+        to reconnect, so tools served this way should be safe to repeat.
+        """
+        if name not in self._tools:
+            raise McpToolError(f"Unknown MCP tool {name!r}")
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            # Each dead session costs at most one attempt before it reconnects
+            serving = sum(len(self._sessions[i]) for i in self._tool_servers[name])
+            for _ in range(serving + 1):
+                pooled = await self._pick_session(name)
+                pooled.in_flight += 1
+                try:
+                    async with pooled.slots:
+                        session = pooled.session
+                        if session is None:
+                            # Lost while this call waited for a slot
+                            continue
+                        try:
+                            result = await asyncio.wait_for(
+                                session.call_tool(name, arguments), self.call_timeout
+                            )
+                        except Exception as e:
+                            if not is_connection_lost(e):
+                                raise
+                            pooled.mark_lost(session)
+                            logger.warning(
+                                "MCP server for %r went away mid-call; retrying", name
+                            )
+                            continue
+                finally:
+                    pooled.in_flight -= 1
+                ok = not result.isError
+                return result
+            raise McpToolError(f"MCP server for tool {name!r} is unavailable")
+        finally:
+            self._latency[name].record(time.perf_counter() - started, ok)
+
+    async def call(self, name: str, **arguments) -> Any:
+        """Call a tool and unwrap its result into a plain Python value."""
+        result = await self.call_tool(name, arguments)
+        text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+        if result.isError:
+            raise McpToolError(text or f"MCP tool {name!r} failed")
+        structured = result.structuredContent
+        if isinstance(structured, dict) and set(structured) == {"result"}:
+            return structured["result"]
+        return structured if structured is not None else text
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-tool call counts, errors and latency percentiles."""
+        return {name: latency.summary() for name, latency in self._latency.items()}
+
+    def as_function_tools(self) -> List[FunctionTool]:
+        """Wrap every discovered MCP tool as a LlamaIndex FunctionTool."""
+        return [self._function_tool(tool) for tool in self._tools.values()]
+
+    def _function_tool(self, tool: Tool) -> FunctionTool:
+        async def call(**kwargs):
+            return await self.call(tool.name, **kwargs)
+
+        return FunctionTool.from_defaults(
+            async_fn=call,
+            name=tool.name,
+            description=tool.description or tool.name,
+            fn_schema=schema_to_model(tool.name, tool.inputSchema),
+        )
+
+
+def schema_to_model(name: str, schema: Dict[str, Any]):
+    """Build a pydantic model from a (flat) MCP tool input JSON schema."""
+    required = set(schema.get("required", []))
+    fields = {}
+    for prop, spec in schema.get("properties", {}).items():
+        annotation = JSON_SCHEMA_TYPES.get(spec.get("type"), Any)
+        default = ... if prop in required else spec.get("default")
+        fields[prop] = (annotation, Field(default, description=spec.get("description")))
+    return create_model(f"{name}_args", **fields)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from llama_index.core.workflow import Context, Workflow
+
+# Shared utilities (latency percentiles) live in agents/tools; appended so
+# the local tools.py still wins for `import tools`
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from latency import percentile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryResult:
+    """
+    Outcome of one query run by the MultiQueryRunner.
+
+    Attributes:
+        query (str): The user message.
+        response (Any): The workflow's final response, or None if it failed.
+        latency (float): Seconds from the query starting to run to it finishing,
+            excluding time spent waiting for a concurrency slot.
+        queued (float): Seconds spent waiting for a concurrency slot.
+        error (str): The exception, if the run failed.
+    """
+
+    query: str
+    response: Any
+    latency: float
+    queued: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class MultiQueryRunner:
+    """
+    Runs many queries through one workflow concurrently on one event loop.
+
+    Every query gets its own fresh Context, so conversation memory and state
+    never leak between queries, while the workflow, its agents and the LLM
+    client they hold are built once and shared. A global semaphore caps how
+    many queries are in flight, which bounds the load on the LLM endpoint.
+
+    Usage:
+        runner = MultiQueryRunner(workflow, max_concurrency=8)
+        results = await runner.run_many(queries)
+        print(runner.latency_summary(results))
+    """
+
+    def __init__(
+        self,
+        workflow: Workflow,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None,
+    ):
+        self.workflow = workflow
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(self, query: str) -> QueryResult:
+        """Run one query in a fresh Context once a concurrency slot is free."""
+        submitted = time.perf_counter()
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                ctx = Context(self.workflow)
+                handler = self.workflow.run(user_msg=query, ctx=ctx)
+                response = await asyncio.wait_for(handler, self.timeout)
+                error = None
+            except Exception as e:
+                logger.warning("Query %r failed", query, exc_info=True)
+                response, error = None, repr(e)
+            finished = time.perf_counter()
+        return QueryResult(
+            query, response, finished - started, started - submitted, error
+        )
+
+    async def run_many(self, queries: Iterable[str]) -> List[QueryResult]:
+        """Run every query concurrently; results come back in query order."""
+        return await asyncio.gather(*(self.run_one(q) for q in queries))
+
+    @staticmethod
+    def latency_summary(results: List[QueryResult]) -> Dict[str, float]:
+        """Count, errors and latency percentiles in ms over successful queries."""
+        latencies = [r.latency for r in results if r.ok]
+        return {
+            "queries": len(results),
+            "errors": sum(1 for r in results if not r.ok),
+            "p50_ms": 1000 * percentile(latencies, 0.50),
+            "p95_ms": 1000 * percentile(latencies, 0.95),
+            "p99_ms": 1000 * percentile(latencies, 0.99),
+            "max_ms": 1000 * max(latencies, default=0.0),
+        }
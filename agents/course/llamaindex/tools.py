@@ -1,3 +1,7 @@
+import ast
+import math
+import operator
+
 from mcp.server.fastmcp import FastMCP
 
 mcp = FastMCP("multiply")
@@ -65,5 +69,107 @@ def divide(a: int, b: int) -> int:
     return a / b
 
 
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Integers are exact and unbounded in Python, so `9 ** 9 ** 9` or a chain of
+# squarings would burn CPU and memory; every integer literal and result is
+# kept under this many bits (about 1200 decimal digits), checked before the
+# expensive operations run
+MAX_INT_BITS = 4096
+
+MAX_EXPRESSION_LENGTH = 1000
+
+
+def result_bits(op: ast.operator, left: float, right: float) -> int:
+    """Upper bound on the bits of an integer `left op right`; 0 if not integer."""
+    if type(left) is not int or type(right) is not int:
+        return 0
+    if isinstance(op, ast.Pow):
+        if right < 0 or abs(left) <= 1:
+            return 0
+        return int(right * math.log2(abs(left))) + 1
+    if isinstance(op, ast.Mult):
+        return left.bit_length() + right.bit_length()
+    return max(left.bit_length(), right.bit_length()) + 1
+
+
+def evaluate_expression(expression: str) -> float:
+    """
+    Safely evaluate an arithmetic expression by walking its AST.
+
+    Only numbers, parentheses, unary +/- and + - * / // % ** are allowed;
+    `^` is read as `**`, a power (models write it that way), never as XOR.
+    Names, calls, attributes, complex results and everything else raise
+    ValueError.
+    """
+
+    def visit(node: ast.AST) -> float:
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            if type(node.value) is int and node.value.bit_length() > MAX_INT_BITS:
+                raise ValueError(f"Number is larger than {MAX_INT_BITS} bits")
+            return node.value
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            return UNARY_OPERATORS[type(node.op)](visit(node.operand))
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            left, right = visit(node.left), visit(node.right)
+            if result_bits(node.op, left, right) > MAX_INT_BITS:
+                raise ValueError(f"Result would be larger than {MAX_INT_BITS} bits")
+            value = BINARY_OPERATORS[type(node.op)](left, right)
+            if isinstance(value, complex):
+                # A fractional power of a negative number, like (-8) ** 0.5
+                raise ValueError(f"Expression {expression!r} has no real value")
+            return value
+        raise ValueError(f"Unsupported syntax in expression: {ast.dump(node)}")
+
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(
+            f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters"
+        )
+    try:
+        tree = ast.parse(expression.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression {expression!r}: {e.msg}") from e
+    try:
+        return visit(tree)
+    except ZeroDivisionError as e:
+        raise ValueError(f"Division by zero in {expression!r}") from e
+    except OverflowError as e:
+        raise ValueError(f"Result of {expression!r} is too large") from e
+    except RecursionError as e:
+        # Short expressions can still nest deeply, like 998 unary minuses
+        raise ValueError(f"Expression {expression!r} is nested too deeply") from e
+
+
+@mcp.tool(name="calculate")
+def calculate(expression: str) -> float:
+    """
+    Evaluate a whole arithmetic expression in one step.
+    Prefer this over chaining add/subtract/multiply/divide calls.
+    Example:
+        calculate("((2 + 3) * 4) / 2") -> 10.0
+    Args:
+        expression (str): Numbers combined with + - * / // % ** and parentheses;
+            ^ also means a power
+    Returns:
+        float: The value of the expression
+    """
+    return evaluate_expression(expression)
+
+
 if __name__ == "__main__":
     mcp.run(transport="stdio")
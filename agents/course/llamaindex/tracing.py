@@ -0,0 +1,272 @@
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from llama_index.core.agent.workflow import (
+    AgentInput,
+    AgentOutput,
+    AgentStream,
+    ToolCall,
+    ToolCallResult,
+)
+from llama_index.core.workflow import Context, StopEvent, Workflow
+from opentelemetry.trace import SpanKind
+
+# Shared utilities (telemetry) live in agents/tools; appended so the local
+# tools.py still wins for `import tools`
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from telemetry import agent_span, record_span
+
+
+def token_usage(raw: Any) -> Dict[str, int]:
+    """Prompt/completion token counts from a raw LLM response, if it has them."""
+    usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+    if usage is None:
+        return {}
+    if not isinstance(usage, dict):
+        usage = {
+            k: getattr(usage, k, None) for k in ("prompt_tokens", "completion_tokens")
+        }
+    return {
+        key: usage[key]
+        for key in ("prompt_tokens", "completion_tokens")
+        if usage.get(key) is not None
+    }
+
+
+@dataclass
+class Span:
+    """
+    One timed interval of a workflow run, in seconds since the run started.
+
+    Attributes:
+        name (str): What ran, e.g. the agent or tool name.
+        category (str): "llm", "tool" or "step".
+        start (float): Start time.
+        end (float): End time.
+        args (dict): Extra detail shown in the trace viewer.
+    """
+
+    name: str
+    category: str
+    start: float
+    end: float
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class WorkflowTracer:
+    """
+    Turns the event stream of an AgentWorkflow run into timed spans.
+
+    Events carry no timestamps, so each one is stamped when it is received
+    from `handler.stream_events()`:
+
+    - llm: AgentInput -> AgentOutput, with time to first AgentStream token
+    - tool: ToolCall -> ToolCallResult, matched by tool id
+    - step: one ReAct iteration, from AgentInput to the next AgentInput or
+      the end of the run
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_ns = time.time_ns()
+        self.spans: List[Span] = []
+        self._llm: Optional[Tuple[float, str, Optional[float]]] = None
+        self._step: Optional[Tuple[float, str, int]] = None
+        self._tools: Dict[str, Tuple[float, str]] = {}
+        self._steps = 0
+
+    def now(self) -> float:
+        return time.perf_counter() - self.started
+
+    def record(self, event: Any) -> None:
+        now = self.now()
+        if isinstance(event, AgentInput):
+            self._close_step(now)
+            self._steps += 1
+            self._step = (now, event.current_agent_name, self._steps)
+            self._llm = (now, event.current_agent_name, None)
+        elif isinstance(event, AgentStream):
+            if self._llm and self._llm[2] is None:
+                self._llm = (self._llm[0], self._llm[1], now)
+        elif isinstance(event, AgentOutput):
+            if self._llm:
+                start, agent, first_token = self._llm
+                args = {"tool_calls": [t.tool_name for t in event.tool_calls]}
+                if first_token is not None:
+                    args["ttft_ms"] = round(1000 * (first_token - start), 1)
+                args.update(token_usage(event.raw))
+                self.spans.append(Span(agent, "llm", start, now, args))
+                self._llm = None
+        elif isinstance(event, ToolCallResult):
+            start, name = self._tools.pop(event.tool_id, (now, event.tool_name))
+            self.spans.append(
+                Span(
+                    name,
+                    "tool",
+                    start,
+                    now,
+                    {
+                        "kwargs": event.tool_kwargs,
+                        "is_error": event.tool_output.is_error,
+                    },
+                )
+            )
+        elif isinstance(event, ToolCall):
+            self._tools[event.tool_id] = (now, event.tool_name)
+        elif isinstance(event, StopEvent):
+            self.finish()
+
+    def finish(self) -> None:
+        self._close_step(self.now())
+
+    def _close_step(self, now: float) -> None:
+        if self._step:
+            start, agent, number = self._step
+            self.spans.append(
+                Span(f"step {number}", "step", start, now, {"agent": agent})
+            )
+            self._step = None
+
+    def export_otel(self) -> None:
+        """Export every span to OpenTelemetry, as children of the current span."""
+        for span in self.spans:
+            start_ns = self.started_ns + int(span.start * 1e9)
+            end_ns = self.started_ns + int(span.end * 1e9)
+            if span.category == "llm":
+                attributes = {
+                    "gen_ai.operation.name": "chat",
+                    "gen_ai.agent.name": span.name,
+                    "agent.llm.latency_ms": 1000 * span.duration,
+                }
+                if "ttft_ms" in span.args:
+                    attributes["agent.llm.ttft_ms"] = span.args["ttft_ms"]
+                if "prompt_tokens" in span.args:
+                    attributes["gen_ai.usage.input_tokens"] = span.args["prompt_tokens"]
+                if "completion_tokens" in span.args:
+                    attributes["gen_ai.usage.output_tokens"] = span.args[
+                        "completion_tokens"
+                    ]
+                record_span(
+                    f"chat {span.name}", start_ns, end_ns, attributes, SpanKind.CLIENT
+                )
+            elif span.category == "tool":
+                attributes = {
+                    "gen_ai.operation.name": "execute_tool",
+                    "gen_ai.tool.name": span.name,
+                    "agent.tool.latency_ms": 1000 * span.duration,
+                    "agent.tool.arguments": json.dumps(
+                        span.args["kwargs"], default=str
+                    ),
+                }
+                error = "tool returned an error" if span.args["is_error"] else None
+                record_span(
+                    f"execute_tool {span.name}",
+                    start_ns,
+                    end_ns,
+                    attributes,
+                    error=error,
+                )
+            else:
+                record_span(span.name, start_ns, end_ns, span.args)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace event format, loadable in chrome://tracing or Perfetto."""
+        lanes = {"step": 1, "llm": 2, "tool": 3}
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": cat},
+            }
+            for cat, tid in lanes.items()
+        ]
+        events += [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round(span.start * 1e6),
+                "dur": round(span.duration * 1e6),
+                "pid": 1,
+                "tid": lanes[span.category],
+                "args": span.args,
+            }
+            for span in sorted(self.spans, key=lambda s: s.start)
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, indent=2, default=str)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Count, total, mean and max duration per (category, name)."""
+        groups = defaultdict(list)
+        for span in self.spans:
+            groups[
+                (span.category, span.name if span.category != "step" else "*")
+            ].append(span.duration)
+        wall = max((s.end for s in self.spans), default=0.0)
+        return [
+            {
+                "category": category,
+                "name": name,
+                "count": len(durations),
+                "total_s": sum(durations),
+                "mean_s": sum(durations) / len(durations),
+                "max_s": max(durations),
+                "share": sum(durations) / wall if wall else 0.0,
+            }
+            for (category, name), durations in sorted(groups.items())
+        ]
+
+    def summary_table(self) -> str:
+        header = f"{'category':<8} {'name':<20} {'count':>5} {'total':>8} {'mean':>8} {'max':>8} {'share':>6}"
+        lines = [header, "-" * len(header)]
+        for row in self.summary():
+            lines.append(
+                f"{row['category']:<8} {row['name'][:20]:<20} {row['count']:>5} "
+                f"{row['total_s']:>7.3f}s {row['mean_s']:>7.3f}s {row['max_s']:>7.3f}s "
+                f"{row['share']:>6.0%}"
+            )
+        return "\n".join(lines)
+
+
+async def run_traced(
+    workflow: Workflow,
+    user_msg: str,
+    ctx: Optional[Context] = None,
+    trace_path: Optional[str] = None,
+) -> Tuple[Any, WorkflowTracer]:
+    """
+    Run a workflow while consuming its event stream into a WorkflowTracer.
+
+    Writes a Chrome/Perfetto trace to `trace_path` if given, exports the spans
+    to OpenTelemetry if telemetry is configured, and returns the final response
+    together with the tracer.
+    """
+    tracer = WorkflowTracer()
+    with agent_span(type(workflow).__name__):
+        handler = workflow.run(user_msg=user_msg, ctx=ctx)
+        async for event in handler.stream_events():
+            tracer.record(event)
+        response = await handler
+        tracer.finish()
+        tracer.export_otel()
+
+    if trace_path:
+        tracer.write_chrome_trace(trace_path)
+    return response, tracer
@@ -1,34 +1,55 @@
+import os
+import sys
+
 from smolagents import (
     CodeAgent,
-    DuckDuckGoSearchTool,
     InferenceClientModel,
-    VisitWebpageTool,
 )
-from tools import calculate_cargo_travel_time
+from tools import CachedVisitWebpageTool, calculate_cargo_travel_time
 
-model = InferenceClientModel(
-    model_id="Qwen/Qwen2.5-Coder-32B-Instruct", provider="together"
+# Shared utilities (web search) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools")
 )
+from search_tools import search_tools
 
 task = """Find all Batman filming locations in the world, calculate the time to transfer via cargo plane to here (we're in Gotham, 40.7128° N, 74.0060° W), and return them to me as a pandas dataframe.
 Also give me some supercar factories with the same cargo plane transfer time."""
 
-agent = CodeAgent(
-    model=model,
-    tools=[DuckDuckGoSearchTool(), VisitWebpageTool(), calculate_cargo_travel_time],
-    additional_authorized_imports=["pandas"],
-)
 
-agent.planning_interval = 4
+def build_agent(model) -> CodeAgent:
+    agent = CodeAgent(
+        model=model,
+        tools=[
+            *search_tools(),
+            CachedVisitWebpageTool(),
+            calculate_cargo_travel_time,
+        ],
+        additional_authorized_imports=["pandas"],
+    )
+
+    agent.planning_interval = 4
+    return agent
+
 
-detailed_report = agent.run(
-    f"""
+def main():
+    model = InferenceClientModel(
+        model_id="Qwen/Qwen2.5-Coder-32B-Instruct", provider="together"
+    )
+    agent = build_agent(model)
+
+    detailed_report = agent.run(
+        f"""
 You're an expert analyst. You make comprehensive reports after visiting many websites.
-Don't hesitate to search for many queries at once in a for loop.
+Don't hesitate to search for many queries at once with web_search_batch.
 For each data point that you find, visit the source url to confirm numbers.
 
 {task}
 """
-)
+    )
+
+    print(detailed_report)
+
 
-print(detailed_report)
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,28 @@
 import os
+import sys
 
-from PIL import Image
 from smolagents import (
     CodeAgent,
-    DuckDuckGoSearchTool,
     InferenceClientModel,
-    VisitWebpageTool,
 )
-from smolagents.models import OpenAIServerModel
-from smolagents.utils import encode_image_base64, make_image_url
-from tools import calculate_cargo_travel_time
+from smolagents.memory import ActionStep, PlanningStep
+from tools import CachedVisitWebpageTool, SaveFigureTool, calculate_cargo_travel_time
+from verification import PlotVerifier
 
-
-model = InferenceClientModel(
-    "Qwen/Qwen2.5-Coder-32B-Instruct", provider="together", max_tokens=8096
-)
-
-web_agent = CodeAgent(
-    model=model,
-    tools=[
-        DuckDuckGoSearchTool(),
-        VisitWebpageTool(),
-        calculate_cargo_travel_time,
-    ],
-    name="web_agent",
-    description="Browses the web to find information",
-    verbosity_level=0,
-    max_steps=10,
+# Shared utilities (singleflight, web search, context compaction, figure
+# rendering, telemetry) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools")
 )
+from context_compaction import ContextCompactor
+from figure_renderer import FigureRenderer
+from search_tools import search_tools
+from singleflight import format_singleflight_report, singleflight_tool
+from telemetry import agent_span, configure_telemetry
 
+AUTHORIZED_IMPORTS = ["geopandas", "plotly", "shapely", "json", "pandas", "numpy"]
 
-def check_reasoning_and_plot(final_answer, agent_memory):
-    multimodal_model = OpenAIServerModel("gpt-4o", max_tokens=8096)
-    filepath = "saved_map.png"
-    assert os.path.exists(filepath), "Make sure to save the plot under saved_map.png!"
-    image = Image.open(filepath)
-    prompt = (
-        f"Here is a user-given task and the agent steps: {agent_memory.get_succinct_steps()}. Now here is the plot that was made."
-        "Please check that the reasoning process and plot are correct: do they correctly answer the given task?"
-        "First list reasons why yes/no, then write your final decision: PASS in caps lock if it is satisfactory, FAIL if it is not."
-        "Don't be harsh: if the plot mostly solves the task, it should pass."
-        "To pass, a plot should be made using px.scatter_map and not any other method (scatter_map looks nicer)."
-    )
-    messages = [
-        {
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": prompt,
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {"url": make_image_url(encode_image_base64(image))},
-                },
-            ],
-        }
-    ]
-    output = multimodal_model(messages).content
-    print("Feedback: ", output)
-    if "FAIL" in output:
-        raise Exception(output)
-    return True
-
-
-manager_agent = CodeAgent(
-    model=InferenceClientModel(
-        "deepseek-ai/DeepSeek-R1", provider="together", max_tokens=8096
-    ),
-    tools=[calculate_cargo_travel_time],
-    managed_agents=[web_agent],
-    additional_authorized_imports=[
-        "geopandas",
-        "plotly",
-        "shapely",
-        "json",
-        "pandas",
-        "numpy",
-    ],
-    planning_interval=5,
-    verbosity_level=2,
-    final_answer_checks=[check_reasoning_and_plot],
-    max_steps=15,
-)
-
-manager_agent.visualize()
-manager_agent.run(
-    """
+MAP_TASK = """
 Find all Batman filming locations in the world, calculate the time to transfer via cargo plane to here (we're in Gotham, 40.7128° N, 74.0060° W).
 Also give me some supercar factories with the same cargo plane transfer time. You need at least 6 points in total.
 Represent this as spatial map of the world, with the locations represented as scatter points with a color that depends on the travel time, and save it to saved_map.png!
@@ -97,10 +33,89 @@ df = px.data.carshare()
 fig = px.scatter_map(df, lat="centroid_lat", lon="centroid_lon", text="name", color="peak_hour", size=100,
      color_continuous_scale=px.colors.sequential.Magma, size_max=15, zoom=1)
 fig.show()
-fig.write_image("saved_image.png")
+save_figure(fig, "saved_image.png")
 final_answer(fig)
 
 Never try to process strings using code: when you have a string to read, just print it and you'll see it.
 """
-)
-manager_agent.python_executor.state["fig"]
+
+
+def build_web_agent(model, **kwargs) -> CodeAgent:
+    """The agent the manager delegates web research to; kwargs go to CodeAgent."""
+    return CodeAgent(
+        model=model,
+        # Identical searches and page visits in flight at once (parallel tool
+        # calls, or several runs in one process) are made only once; searches
+        # are also cached across runs and can be batched in one step
+        tools=[
+            *search_tools(),
+            singleflight_tool(CachedVisitWebpageTool()),
+            calculate_cargo_travel_time,
+        ],
+        name="web_agent",
+        description="Browses the web to find information",
+        verbosity_level=0,
+        max_steps=10,
+        **kwargs,
+    )
+
+
+def main():
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console); the
+    # smolagents instrumentor adds a span for every step, model and tool call
+    if configure_telemetry("multi_agent"):
+        from openinference.instrumentation.smolagents import SmolagentsInstrumentor
+
+        SmolagentsInstrumentor().instrument()
+
+    # Old observations (whole webpages) are cut down to the facts they held,
+    # so each step's prompt doesn't re-send everything seen so far
+    web_compactor = ContextCompactor()
+    manager_compactor = ContextCompactor()
+
+    # Chromium starts warming up now, while the agents search; the map is
+    # then saved through it in about a tenth of a cold fig.write_image()
+    renderer = FigureRenderer()
+
+    # The final answer is checked against the figure's traces first, and the
+    # vision model judges each distinct saved_map.png once, starting as soon
+    # as it is saved rather than when final_answer is called
+    verifier = PlotVerifier()
+
+    model = InferenceClientModel(
+        "Qwen/Qwen2.5-Coder-32B-Instruct", provider="together", max_tokens=8096
+    )
+
+    web_agent = build_web_agent(model, step_callbacks=web_compactor.callbacks())
+
+    manager_agent = CodeAgent(
+        model=InferenceClientModel(
+            "deepseek-ai/DeepSeek-R1", provider="together", max_tokens=8096
+        ),
+        tools=[calculate_cargo_travel_time, SaveFigureTool(renderer)],
+        managed_agents=[web_agent],
+        additional_authorized_imports=AUTHORIZED_IMPORTS,
+        planning_interval=5,
+        step_callbacks={
+            ActionStep: [manager_compactor.on_action_step, verifier.prefetch],
+            PlanningStep: manager_compactor.on_planning_step,
+        },
+        verbosity_level=2,
+        final_answer_checks=[verifier.check],
+        max_steps=15,
+    )
+
+    manager_agent.visualize()
+    with agent_span("multi_agent"):
+        manager_agent.run(MAP_TASK)
+    manager_agent.python_executor.state["fig"]
+    print(format_singleflight_report())
+    print("web_agent:", web_compactor.format_report())
+    print("manager_agent:", manager_compactor.format_report())
+    print(f"Vision verifications: {verifier.vision_calls}")
+    print(renderer.format_report())
+    renderer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
 import math
+import os
+import sys
 from typing import Optional, Tuple
 
-from smolagents import tool
+from smolagents import Tool, tool
+
+# Shared utilities (web page fetching, figure rendering) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools")
+)
+from figure_renderer import FigureRenderer
+from web_pages import WebPageFetcher
 
 
 @tool
@@ -58,5 +67,79 @@ def calculate_cargo_travel_time(
     return round(flight_time, 2)
 
 
+class CachedVisitWebpageTool(Tool):
+    """
+    Drop-in replacement for smolagents' VisitWebpageTool: pages come from a
+    shared disk cache (revalidated with ETags), are cut to a token budget
+    while downloading, and can be narrowed to the passages matching a query.
+    """
+
+    name = "visit_webpage"
+    description = (
+        "Visits a webpage at the given url and reads its content as a markdown string. "
+        "Use this to browse webpages. To check a specific fact, pass a short query "
+        "and only the passages about it are returned."
+    )
+    inputs = {
+        "url": {
+            "type": "string",
+            "description": "The url of the webpage to visit.",
+        },
+        "query": {
+            "type": "string",
+            "description": "Optional keywords; if given, only matching passages are returned.",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def __init__(
+        self, max_tokens: int = 2000, fetcher: Optional[WebPageFetcher] = None
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.fetcher = fetcher or WebPageFetcher()
+
+    def forward(self, url: str, query: Optional[str] = None) -> str:
+        import httpx
+
+        try:
+            return self.fetcher.read(url, query=query, max_tokens=self.max_tokens)
+        except httpx.TimeoutException:
+            return "The request timed out. Please try again later or check the URL."
+        except (httpx.HTTPError, ValueError) as e:
+            return f"Error fetching the webpage: {str(e)}"
+
+
+class SaveFigureTool(Tool):
+    """
+    Saves plotly figures through a FigureRenderer: one Chromium kept warm for
+    the whole run instead of one launched by every `fig.write_image()`, and
+    unchanged figures served from the render cache.
+    """
+
+    name = "save_figure"
+    description = (
+        "Saves a plotly figure as a static image (png, jpg, svg or pdf, from the "
+        "file extension). Much faster than fig.write_image(); use it instead."
+    )
+    inputs = {
+        "fig": {"type": "object", "description": "The plotly figure to save."},
+        "path": {
+            "type": "string",
+            "description": "Where to save it, e.g. 'map.png'.",
+        },
+    }
+    output_type = "string"
+
+    def __init__(self, renderer: Optional[FigureRenderer] = None):
+        super().__init__()
+        self.renderer = renderer or FigureRenderer()
+
+    def forward(self, fig, path: str) -> str:
+        self.renderer.write(fig, path)
+        return f"Saved the figure to {path}."
+
+
 if __name__ == "__main__":
     print(calculate_cargo_travel_time((41.8781, -87.6298), (-33.8688, 151.2093)))
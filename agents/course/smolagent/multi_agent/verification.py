@@ -0,0 +1,198 @@
+"""
+Final answer verification for the multi_agent map task.
+
+The check used to build a new gpt-4o client on every final answer, send the
+full-resolution saved_map.png and every step's full record, and block the
+run on the vision call. PlotVerifier instead:
+
+- fails fast, for free, when the figure in the agent's state isn't a
+  px.scatter_map with enough points, before any vision call is paid for
+- reuses one model client, and sends a downscaled JPEG and a short summary
+  of the steps
+- caches verdicts by the image's content hash, so an unchanged plot is
+  never judged twice
+- as a step callback, starts judging a saved plot in the background as soon
+  as it appears, so the final answer check usually finds the verdict ready
+
+    verifier = PlotVerifier()
+    agent = CodeAgent(..., final_answer_checks=[verifier.check],
+                      step_callbacks={ActionStep: verifier.prefetch})
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from smolagents.memory import ActionStep
+
+PROMPT = (
+    "Here is a user-given task and a summary of the agent steps: {steps}. "
+    "Now here is the plot that was made."
+    "Please check that the reasoning process and plot are correct: do they correctly answer the given task?"
+    "First list reasons why yes/no, then write your final decision: PASS in caps lock if it is satisfactory, FAIL if it is not."
+    "Don't be harsh: if the plot mostly solves the task, it should pass."
+    "To pass, a plot should be made using px.scatter_map and not any other method (scatter_map looks nicer)."
+)
+
+
+def structural_problem(fig: Any, min_points: int = 6) -> Optional[str]:
+    """Why `fig` can't pass, judged from its traces alone; None if it might."""
+    if fig is None:
+        return "No figure found: keep the plotly figure in a variable named `fig`."
+    if hasattr(fig, "to_dict"):
+        fig = fig.to_dict()
+    if not isinstance(fig, dict):
+        return f"`fig` is a {type(fig).__name__}, not a plotly figure."
+    traces = fig.get("data") or []
+    maps = [trace for trace in traces if trace.get("type") == "scattermap"]
+    if not maps:
+        kinds = sorted({str(trace.get("type")) for trace in traces}) or ["none"]
+        return (
+            "The figure must be made with px.scatter_map; its traces are "
+            f"{', '.join(kinds)}."
+        )
+    # Coordinates may be lists or numpy arrays
+    points = sum(
+        len(trace.get("lat", ())) for trace in maps if trace.get("lat") is not None
+    )
+    if points < min_points:
+        return f"The map shows {points} points; at least {min_points} are needed."
+    return None
+
+
+def encode_image(data: bytes, max_side: int = 1024) -> str:
+    """A data URL of the image, downscaled to `max_side` pixels and JPEG-encoded."""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((max_side, max_side))
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=85)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def summarize_steps(memory, max_chars: int = 6000) -> str:
+    """The agent's code and observations, each cut short, newest kept whole."""
+    parts = []
+    for step in memory.steps:
+        if isinstance(step, ActionStep):
+            code = (step.code_action or "")[:800]
+            observation = (step.observations or "")[:400]
+            parts.append(f"Step {step.step_number}:\n{code}\n-> {observation}")
+    return "\n\n".join(parts)[-max_chars:]
+
+
+class PlotVerifier:
+    """
+    Judges the saved map with a vision model, once per distinct image.
+
+    Args:
+        model_id: OpenAI vision model.
+        path: Where the agent is told to save the plot.
+        min_points: Points the map needs to pass the structural check.
+        max_side: Longest side, in pixels, of the image sent to the model.
+    """
+
+    def __init__(
+        self,
+        model_id: str = "gpt-4o",
+        path: str = "saved_map.png",
+        min_points: int = 6,
+        max_side: int = 1024,
+    ):
+        self.model_id = model_id
+        self.path = path
+        self.min_points = min_points
+        self.max_side = max_side
+        self.verdicts: Dict[str, Future] = {}
+        self.vision_calls = 0
+        self._model = None
+        self._last_seen: Optional[Tuple[float, int]] = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="verify")
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from smolagents.models import OpenAIServerModel
+
+                self._model = OpenAIServerModel(self.model_id, max_tokens=2048)
+            return self._model
+
+    def check(self, final_answer: Any, agent_memory, agent: Any = None) -> bool:
+        """
+        final_answer_checks entry: structural check, then the (cached) vision
+        verdict. Needs the `agent=` smolagents passes from 1.23 on, to find
+        the figure in its state.
+        """
+        if agent is None:
+            raise TypeError(
+                "PlotVerifier.check needs the agent; smolagents>=1.23 passes agent="
+            )
+        fig = final_answer if hasattr(final_answer, "to_dict") else _state_fig(agent)
+        problem = structural_problem(fig, self.min_points)
+        if problem:
+            raise Exception(problem)
+        assert os.path.exists(
+            self.path
+        ), f"Make sure to save the plot under {self.path}!"
+
+        passed, feedback = self._judge(summarize_steps(agent_memory)).result()
+        print("Feedback: ", feedback)
+        if not passed:
+            raise Exception(feedback)
+        return True
+
+    def prefetch(self, step: ActionStep, agent: Any) -> None:
+        """Step callback: start judging a newly saved plot that looks right."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        if self._last_seen == (stat.st_mtime, stat.st_size):
+            return
+        self._last_seen = (stat.st_mtime, stat.st_size)
+        if structural_problem(_state_fig(agent), self.min_points) is None:
+            self._judge(summarize_steps(agent.memory))
+
+    def _judge(self, steps: str) -> Future:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            verdict = self.verdicts.get(key)
+            if verdict is None or (verdict.done() and verdict.exception()):
+                verdict = self._pool.submit(self._ask, data, steps)
+                self.verdicts[key] = verdict
+        return verdict
+
+    def _ask(self, data: bytes, steps: str) -> Tuple[bool, str]:
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": PROMPT.format(steps=steps)},
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": encode_image(data, self.max_side)},
+                    },
+                ],
+            }
+        ]
+        with self._lock:
+            self.vision_calls += 1
+        output = self.model(messages).content
+        return "FAIL" not in output, output
+
+
+def _state_fig(agent: Any) -> Any:
+    state = getattr(getattr(agent, "python_executor", None), "state", None)
+    try:
+        return state["fig"] if state is not None and "fig" in state else None
+    except Exception:
+        return None
@@ -1,33 +1,49 @@
+import functools
 import os
+import sys
 import dotenv
 
 dotenv.load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env.secure"))
 
-from huggingface_hub import login
-from langfuse import get_client
-from openinference.instrumentation.smolagents import SmolagentsInstrumentor
 from smolagents import (
     CodeAgent,
-    DuckDuckGoSearchTool,
     InferenceClientModel,
     ToolCallingAgent,
     tool,
 )
 
+# Shared utilities (web search) live in agents/tools
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "tools")
+)
+from search_tools import search_tools
+
 
 HUGGING_FACE_TOKEN = os.getenv("HUGGING_FACE_TOKEN")
 
-login(token=HUGGING_FACE_TOKEN)
 
-langfuse_client = get_client()
+@functools.cache
+def setup_observability():
+    """
+    Log in to the Hub and wire up Langfuse tracing, once, on first use.
+
+    The login and auth check are network round-trips and the instrumentation
+    imports are slow, so none of it runs at import time.
+    """
+    from huggingface_hub import login
+    from langfuse import get_client
+    from openinference.instrumentation.smolagents import SmolagentsInstrumentor
+
+    login(token=HUGGING_FACE_TOKEN)
 
+    langfuse_client = get_client()
 
-if langfuse_client.auth_check():
-    print("Langfuse client authenticated")
-else:
-    print("Langfuse client not authenticated")
+    if langfuse_client.auth_check():
+        print("Langfuse client authenticated")
+    else:
+        print("Langfuse client not authenticated")
 
-SmolagentsInstrumentor().instrument()
+    SmolagentsInstrumentor().instrument()
 
 
 @tool
@@ -57,7 +73,7 @@ def music_agent():
     """
     return ToolCallingAgent(
         model=InferenceClientModel(),
-        tools=[DuckDuckGoSearchTool()],
+        tools=search_tools(),
     ).run(prompt)
 
 
@@ -103,6 +119,8 @@ def response_agent(music: str, menu: str, schedule: str):
 
 
 def main():
+    setup_observability()
+
     # First, we need to get the results from the music and menu agents.
     music_result = music_agent()
     menu_result = menu_agent()
@@ -0,0 +1,176 @@
+"""
+Temporal activities for durable agent runs: one LLM call, or one tool call.
+
+Each call is an activity, so Temporal records its result in the workflow
+history. A crashed worker's run resumes from the last completed call
+instead of starting over, and failed calls are retried on any worker.
+"""
+
+import asyncio
+import functools
+import importlib.util
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Shared utilities (telemetry) live in agents/tools
+sys.path.append(os.path.join(AGENTS_DIR, "tools"))
+from singleflight import singleflight_tool
+from telemetry import tool_span
+from vllm_dispatch import BatchingDispatcher
+
+# How often a running call reports liveness; a worker that stops
+# heartbeating for the workflow's heartbeat timeout is presumed dead and the
+# call is retried elsewhere
+HEARTBEAT_INTERVAL_SECONDS = 5.0
+
+
+@dataclass
+class LlmRequest:
+    """
+    Input of the call_llm activity.
+
+    Attributes:
+        model (str): Model name served by the OpenAI-compatible endpoint.
+        messages (list): The conversation so far, in OpenAI chat format.
+        tools (list): Names of the registered tools the model may call.
+        tool_choice (str): "auto", or "none" to keep the tools in the prompt
+            (and so its cached prefix) while asking for a plain answer.
+    """
+
+    model: str
+    messages: List[Dict[str, Any]]
+    tools: List[str] = field(default_factory=list)
+    tool_choice: str = "auto"
+
+
+@dataclass
+class ToolRequest:
+    """
+    Input of the call_tool activity.
+
+    Attributes:
+        name (str): Registered tool name.
+        arguments (dict): Keyword arguments chosen by the model.
+    """
+
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_module(name: str, path: str):
+    """Import a script by path; several agent directories have a tools.py."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@functools.cache
+def get_tools() -> Dict[str, Any]:
+    """
+    The multi_agent tools, as smolagents Tool objects keyed by name. Runs
+    calling a tool with the same arguments at the same time share one call.
+    """
+    from search_tools import search_tools
+
+    multi_agent_tools = load_module(
+        "multi_agent_tools",
+        os.path.join(AGENTS_DIR, "course", "smolagent", "multi_agent", "tools.py"),
+    )
+    # One worker serves many runs, so results aren't de-duplicated by URL;
+    # the search cache is still shared
+    tools = [
+        *search_tools(dedup=False),
+        multi_agent_tools.CachedVisitWebpageTool(),
+        multi_agent_tools.calculate_cargo_travel_time,
+    ]
+    return {tool.name: singleflight_tool(tool) for tool in tools}
+
+
+@functools.cache
+def get_dispatcher() -> BatchingDispatcher:
+    """
+    Dispatcher over the model servers: LLM_BASE_URL, else the vLLM servers in
+    LLM_ENDPOINTS or at API_ENDPOINT. It keeps an adaptive number of this
+    worker's LLM calls in flight per server, backing off when a call takes
+    longer than LLM_LATENCY_SLO seconds, and queues the rest. Its clients
+    don't retry; Temporal does.
+    """
+    base_url = os.getenv("LLM_BASE_URL")
+    return BatchingDispatcher(
+        [base_url] if base_url else None,
+        latency_slo=float(os.getenv("LLM_LATENCY_SLO", "60")),
+    )
+
+
+async def heartbeat_while(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call on a thread, heartbeating until it returns."""
+    return await heartbeat_until(asyncio.to_thread(func, *args, **kwargs))
+
+
+async def heartbeat_until(awaitable) -> Any:
+    """Await, heartbeating until the result is ready."""
+    task = asyncio.ensure_future(awaitable)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=HEARTBEAT_INTERVAL_SECONDS)
+        if done:
+            return task.result()
+        activity.heartbeat()
+
+
+def tool_schema(name: str) -> Dict[str, Any]:
+    from smolagents.models import get_tool_json_schema
+
+    return get_tool_json_schema(get_tools()[name])
+
+
+@activity.defn
+async def call_llm(request: LlmRequest) -> Dict[str, Any]:
+    """
+    One chat completion. Returns the assistant message in OpenAI chat format,
+    ready to be appended to the conversation.
+    """
+    kwargs: Dict[str, Any] = {"model": request.model, "messages": request.messages}
+    if request.tools:
+        kwargs["tools"] = [tool_schema(name) for name in request.tools]
+        kwargs["tool_choice"] = request.tool_choice
+
+    response = await heartbeat_until(get_dispatcher().create(**kwargs))
+    message = response.choices[0].message
+    reply: Dict[str, Any] = {"role": "assistant", "content": message.content or ""}
+    if message.tool_calls:
+        reply["tool_calls"] = [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {
+                    "name": call.function.name,
+                    "arguments": call.function.arguments,
+                },
+            }
+            for call in message.tool_calls
+        ]
+    return reply
+
+
+@activity.defn
+async def call_tool(request: ToolRequest) -> str:
+    """One tool call. Returns the tool output as text for the model."""
+    tools = get_tools()
+    if request.name not in tools:
+        # Retrying won't make the tool exist
+        raise ApplicationError(
+            f"Function {request.name} not found", type="UnknownTool", non_retryable=True
+        )
+
+    with tool_span(request.name, request.arguments):
+        result = await heartbeat_while(tools[request.name], **request.arguments)
+    return result if isinstance(result, str) else json.dumps(result, default=str)
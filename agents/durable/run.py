@@ -0,0 +1,79 @@
+"""
+Start a durable agent run, or reattach to one, and wait for its answer.
+
+The run lives in Temporal, not in this process: if this script, or the
+worker executing the run, is stopped, start it again with the same
+--workflow-id and it picks the run back up where it was.
+
+Usage:
+    python run.py "Find three Batman filming locations and their cargo flight time to Gotham"
+    python run.py --workflow-id batman-locations --max-steps 15 "..."
+    python run.py --workflow-id batman-locations --progress
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from temporalio.common import WorkflowIDReusePolicy
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from worker import WORKFLOW_TASK_QUEUE, connect
+from workflows import AgentRun, AgentRunWorkflow
+
+
+async def run(workflow_id: str, task: str | None, model: str, max_steps: int) -> str:
+    client = await connect()
+    if task is None:
+        handle = client.get_workflow_handle(workflow_id)
+    else:
+        try:
+            handle = await client.start_workflow(
+                AgentRunWorkflow.run,
+                AgentRun(task=task, model=model, max_steps=max_steps),
+                id=workflow_id,
+                task_queue=WORKFLOW_TASK_QUEUE,
+                # A finished run with this id can be reused for a new task,
+                # a running one is reattached to below
+                id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+            )
+        except WorkflowAlreadyStartedError:
+            print(f"Run {workflow_id} is already in progress; waiting for it")
+            handle = client.get_workflow_handle(workflow_id)
+    return await handle.result()
+
+
+async def progress(workflow_id: str) -> dict:
+    client = await connect()
+    return await client.get_workflow_handle(workflow_id).query(
+        AgentRunWorkflow.progress
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run an agent task durably on Temporal"
+    )
+    parser.add_argument("task", nargs="?", help="Task to run; omit to reattach")
+    parser.add_argument("--workflow-id", default=None)
+    parser.add_argument("--model", default=AgentRun.model)
+    parser.add_argument("--max-steps", type=int, default=AgentRun.max_steps)
+    parser.add_argument(
+        "--progress", action="store_true", help="Show the run's step and tool calls"
+    )
+    args = parser.parse_args()
+
+    if args.task is None and args.workflow_id is None:
+        parser.error("give a task, or a --workflow-id to reattach to")
+
+    if args.progress:
+        print(asyncio.run(progress(args.workflow_id)))
+        return
+
+    workflow_id = args.workflow_id or f"agent-run-{uuid.uuid4().hex[:8]}"
+    print(f"Run id: {workflow_id}")
+    print(asyncio.run(run(workflow_id, args.task, args.model, args.max_steps)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Temporal worker for durable agent runs.
+
+Polls the workflow queue and the LLM and tool activity queues. Start as
+many workers as needed, on any machines that can reach Temporal; tool calls
+spread across all of them, and a run whose worker dies resumes on another
+one from its last completed call.
+
+Usage:
+    make temporal-up
+    python worker.py
+    python worker.py --queues tools --max-concurrent-tools 32   # tool-only worker
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from temporalio.client import Client
+from temporalio.worker import Worker
+
+from activities import call_llm, call_tool
+from telemetry import configure_telemetry  # agents/tools, put on the path by activities
+from workflows import LLM_TASK_QUEUE, TOOL_TASK_QUEUE, AgentRunWorkflow
+
+logger = logging.getLogger(__name__)
+
+# Matches the port published by infrastructure/temporal/docker-compose.yml
+TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
+TEMPORAL_NAMESPACE = os.getenv("TEMPORAL_NAMESPACE", "default")
+
+# Workflows are started on the LLM queue; its workers also run the loop
+WORKFLOW_TASK_QUEUE = LLM_TASK_QUEUE
+
+
+async def connect() -> Client:
+    return await Client.connect(TEMPORAL_ADDRESS, namespace=TEMPORAL_NAMESPACE)
+
+
+async def run_workers(
+    queues: List[str],
+    llm_rate: Optional[float],
+    max_concurrent_llm: int,
+    max_concurrent_tools: int,
+) -> None:
+    client = await connect()
+    workers = []
+    if "llm" in queues:
+        workers.append(
+            Worker(
+                client,
+                task_queue=LLM_TASK_QUEUE,
+                workflows=[AgentRunWorkflow],
+                activities=[call_llm],
+                max_concurrent_activities=max_concurrent_llm,
+                # Enforced by the server across every worker on the queue, so
+                # adding workers doesn't raise the load on the model endpoint
+                max_task_queue_activities_per_second=llm_rate,
+            )
+        )
+    if "tools" in queues:
+        workers.append(
+            Worker(
+                client,
+                task_queue=TOOL_TASK_QUEUE,
+                activities=[call_tool],
+                max_concurrent_activities=max_concurrent_tools,
+            )
+        )
+
+    logger.info("Polling %s on %s", ", ".join(queues), TEMPORAL_ADDRESS)
+    await asyncio.gather(*(worker.run() for worker in workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a durable agent worker")
+    parser.add_argument(
+        "--queues",
+        nargs="+",
+        choices=["llm", "tools"],
+        default=["llm", "tools"],
+        help="Task queues to poll; the llm queue also runs the workflows",
+    )
+    parser.add_argument(
+        "--llm-rate",
+        type=float,
+        default=None,
+        help="Maximum LLM calls per second across all workers",
+    )
+    parser.add_argument(
+        "--max-concurrent-llm",
+        type=int,
+        default=64,
+        help="LLM calls a worker accepts; the dispatcher decides how many are in flight",
+    )
+    parser.add_argument("--max-concurrent-tools", type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console)
+    configure_telemetry("durable-agent-worker")
+    asyncio.run(
+        run_workers(
+            args.queues,
+            args.llm_rate,
+            args.max_concurrent_llm,
+            args.max_concurrent_tools,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+The agent loop as a Temporal workflow.
+
+The loop itself (ask the model, run the tools it asks for, repeat) is
+deterministic workflow code. Every LLM and tool call runs as an activity,
+so on a crash Temporal replays the recorded results and the run continues
+from the last completed call. Tool calls from the same model turn fan out
+concurrently, across however many workers poll the tool queue.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
+
+with workflow.unsafe.imports_passed_through():
+    from activities import LlmRequest, ToolRequest, call_llm, call_tool
+
+# Task queues: LLM calls are rate limited per queue, so they get their own
+LLM_TASK_QUEUE = "agent-llm"
+TOOL_TASK_QUEUE = "agent-tools"
+
+LLM_RETRY = RetryPolicy(
+    initial_interval=timedelta(seconds=2),
+    backoff_coefficient=2.0,
+    maximum_interval=timedelta(minutes=1),
+    maximum_attempts=6,
+)
+TOOL_RETRY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    backoff_coefficient=2.0,
+    maximum_interval=timedelta(seconds=30),
+    maximum_attempts=3,
+    non_retryable_error_types=["UnknownTool"],
+)
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You are a helpful assistant. Use the tools to gather what you need, "
+    "then answer the task."
+)
+
+
+@dataclass
+class AgentRun:
+    """
+    Input of the AgentRunWorkflow.
+
+    Attributes:
+        task (str): What the agent should do.
+        model (str): Model name on the OpenAI-compatible endpoint.
+        tools (list): Registered tool names the agent may use.
+        max_steps (int): Model turns before the agent must answer.
+        system_prompt (str): System message that starts the conversation.
+    """
+
+    task: str
+    model: str = "openai/gpt-oss-20b"
+    tools: List[str] = field(
+        default_factory=lambda: [
+            "web_search",
+            "visit_webpage",
+            "calculate_cargo_travel_time",
+        ]
+    )
+    max_steps: int = 15
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+
+
+@workflow.defn
+class AgentRunWorkflow:
+    def __init__(self):
+        self._step = 0
+        self._tool_calls = 0
+
+    @workflow.run
+    async def run(self, run: AgentRun) -> str:
+        messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": run.system_prompt},
+            {"role": "user", "content": run.task},
+        ]
+
+        for step in range(1, run.max_steps + 1):
+            self._step = step
+            reply = await self._call_llm(LlmRequest(run.model, messages, run.tools))
+            messages.append(reply)
+            if not reply.get("tool_calls"):
+                return reply["content"]
+
+            results = await asyncio.gather(
+                *(self._call_tool(call) for call in reply["tool_calls"])
+            )
+            messages.extend(
+                {"role": "tool", "tool_call_id": call["id"], "content": result}
+                for call, result in zip(reply["tool_calls"], results)
+            )
+
+        # Out of steps: ask for an answer from what was gathered, without tools.
+        # The tools stay in the request so the prompt prefix, and the model
+        # server's cache of it, is unchanged
+        messages.append(
+            {"role": "user", "content": "Give your final answer to the task now."}
+        )
+        reply = await self._call_llm(
+            LlmRequest(run.model, messages, run.tools, tool_choice="none")
+        )
+        return reply["content"]
+
+    @workflow.query
+    def progress(self) -> Dict[str, int]:
+        return {"step": self._step, "tool_calls": self._tool_calls}
+
+    async def _call_llm(self, request: LlmRequest) -> Dict[str, Any]:
+        return await workflow.execute_activity(
+            call_llm,
+            request,
+            task_queue=LLM_TASK_QUEUE,
+            start_to_close_timeout=timedelta(minutes=5),
+            heartbeat_timeout=timedelta(seconds=30),
+            retry_policy=LLM_RETRY,
+        )
+
+    async def _call_tool(self, call: Dict[str, Any]) -> str:
+        self._tool_calls += 1
+        name = call["function"]["name"]
+        try:
+            arguments = json.loads(call["function"]["arguments"] or "{}")
+        except json.JSONDecodeError as e:
+            return json.dumps({"error": f"Invalid arguments for {name}: {e}"})
+
+        try:
+            return await workflow.execute_activity(
+                call_tool,
+                ToolRequest(name, arguments),
+                task_queue=TOOL_TASK_QUEUE,
+                start_to_close_timeout=timedelta(minutes=2),
+                heartbeat_timeout=timedelta(seconds=30),
+                retry_policy=TOOL_RETRY,
+            )
+        except ActivityError as e:
+            # A tool that keeps failing is reported to the model, like the OSS
+            # agent does, rather than failing the whole run
+            message = str(e.cause) if e.cause else str(e)
+            return json.dumps({"error": message})
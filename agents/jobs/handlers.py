@@ -0,0 +1,107 @@
+"""
+Job handlers: how each kind of queued job is run by a worker.
+
+A handler warms up once per worker process (model clients, indexes) and then
+runs any number of jobs with that warm state:
+
+    email_triage  {"email": {"sender": ..., "subject": ..., "body": ...}}
+    rag_qa        {"question": "Tell me about Lady Ada Lovelace"}
+
+Other functions can be served with `kind=path/to/module.py:function`; the
+function is called with the job payload as keyword arguments.
+"""
+
+import importlib.util
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+@dataclass
+class Handler:
+    """
+    Runs one kind of job.
+
+    Attributes:
+        warm_up (Callable): Called once per worker process before its first
+            job; returns the state passed to every `run` call.
+        run (Callable): Called with (payload, state) for each job; returns a
+            JSON-serializable result.
+    """
+
+    warm_up: Callable[[], Any]
+    run: Callable[[Dict[str, Any], Any], Any]
+
+
+def load_agent_module(name: str, path: str):
+    """
+    Import an agent script by path, with its directory first on sys.path so
+    its sibling imports (tools.py, retriever.py, ...) resolve to its own files.
+    """
+    path = os.path.abspath(os.path.join(AGENTS_DIR, path))
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def warm_email_triage():
+    spam = load_agent_module("spam", os.path.join("course", "langgraph", "spam.py"))
+    spam.get_model()
+    return spam
+
+
+def run_email_triage(payload: Dict[str, Any], spam) -> Dict[str, Any]:
+    return spam.triage_email(payload["email"])
+
+
+def warm_rag_qa():
+    agent = load_agent_module(
+        "agent", os.path.join("course", "agentic_rag", "agent.py")
+    )
+    from retriever import get_retriever  # agentic_rag, put on the path above
+
+    # Load the guest index and the chat client now rather than in the first job
+    get_retriever()
+    agent.get_chat_with_tools()
+    return agent.build_alfred()
+
+
+def run_rag_qa(payload: Dict[str, Any], alfred) -> str:
+    from langchain_core.messages import HumanMessage
+
+    response = alfred.invoke({"messages": [HumanMessage(content=payload["question"])]})
+    return response["messages"][-1].content
+
+
+HANDLERS: Dict[str, Handler] = {
+    "email_triage": Handler(warm_email_triage, run_email_triage),
+    "rag_qa": Handler(warm_rag_qa, run_rag_qa),
+}
+
+
+def function_handler(spec: str) -> Handler:
+    """A handler for `path/to/module.py:function`, called with the payload as kwargs."""
+    path, _, function = spec.rpartition(":")
+    if not path or not function:
+        raise ValueError(f"Expected path/to/module.py:function, got {spec!r}")
+
+    def warm_up():
+        name = os.path.splitext(os.path.basename(path))[0]
+        return getattr(load_agent_module(name, os.path.abspath(path)), function)
+
+    return Handler(warm_up, lambda payload, func: func(**payload))
+
+
+def get_handler(kind: str) -> Handler:
+    """Look up a built-in handler, or build one from `kind=path.py:function`."""
+    name, _, spec = kind.partition("=")
+    if spec:
+        return function_handler(spec)
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown job kind {name!r}; built-in: {', '.join(HANDLERS)}")
+    return HANDLERS[name]
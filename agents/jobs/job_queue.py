@@ -0,0 +1,720 @@
+"""
+Job queue for batch agent work, with SQLite, Redis and in-memory backends.
+
+All backends share the same semantics:
+
+- priority: higher priority jobs are claimed first, FIFO within a priority
+- leases: a claimed job is leased to one worker for `lease_seconds`; if the
+  worker dies without finishing it, the job becomes claimable again, or is
+  dead-lettered if that was its last attempt. `claim` returns the job with
+  a lease token, and `complete`/`fail` raise LeaseLost unless they pass the
+  token of the job's current lease, so a worker whose lease ran out can't
+  overwrite the outcome of the worker that took the job over
+- retries: a failed job goes back to the queue with exponential backoff
+  until it has used `max_attempts`, then it moves to the dead letters
+- backpressure: `put` waits (or raises QueueFull) while `max_pending`
+  jobs are already waiting
+
+Open a queue by URL:
+
+    sqlite:///jobs.sqlite        one file, shared by the processes of a host
+    redis://localhost:6379/0     shared by every node that can reach Redis
+    memory://                    in-process stand-in for tests
+"""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+RETRY_BACKOFF_SECONDS = 2.0
+MAX_RETRY_BACKOFF_SECONDS = 300.0
+
+# Error recorded on a job dead-lettered because its last lease ran out
+LEASE_EXPIRED_ERROR = "Lease expired on the last attempt"
+
+
+class QueueFull(Exception):
+    """Raised by put() when the queue stays at max_pending until the timeout."""
+
+
+class LeaseLost(Exception):
+    """Raised by complete() and fail() when the caller's lease has expired."""
+
+
+@dataclass
+class Job:
+    """
+    One unit of agent work.
+
+    Attributes:
+        id (str): Unique job id.
+        kind (str): Handler that runs the job, e.g. "email_triage".
+        payload (dict): Handler input.
+        priority (int): Higher runs first.
+        attempts (int): Times the job has been claimed.
+        max_attempts (int): Attempts before the job is dead-lettered.
+        state (str): "pending", "running", "done" or "dead".
+        result (Any): Handler output, once done.
+        error (str): Last failure, if any.
+        lease (str): Token of the lease, on jobs returned by claim().
+    """
+
+    kind: str
+    payload: Dict[str, Any]
+    priority: int = 0
+    max_attempts: int = 3
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    state: str = "pending"
+    result: Any = None
+    error: Optional[str] = None
+    lease: Optional[str] = None
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter before a failed job is retried."""
+    delay = min(MAX_RETRY_BACKOFF_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue(ABC):
+    """Common interface and backpressure for every backend."""
+
+    def __init__(self, max_pending: Optional[int] = None):
+        self.max_pending = max_pending
+
+    def put(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        max_attempts: int = 3,
+        block: bool = True,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Enqueue a job and return its id, waiting while the queue is full."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.max_pending is not None and self.pending_count() >= self.max_pending:
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+            time.sleep(0.1)
+
+        job = Job(kind, payload, priority=priority, max_attempts=max_attempts)
+        self._insert(job)
+        return job.id
+
+    @abstractmethod
+    def _insert(self, job: Job) -> None: ...
+
+    @abstractmethod
+    def claim(
+        self, kinds: Optional[List[str]] = None, lease_seconds: float = 300.0
+    ) -> Optional[Job]:
+        """
+        Lease the highest priority claimable job, or return None.
+
+        Jobs whose lease expired go back to the queue first, or to the dead
+        letters if their last attempt was used.
+        """
+
+    @abstractmethod
+    def complete(self, job_id: str, lease: str, result: Any) -> None:
+        """Record the result; raises LeaseLost if `lease` is not current."""
+
+    @abstractmethod
+    def fail(self, job_id: str, lease: str, error: str) -> bool:
+        """
+        Record a failure; returns True if the job was dead-lettered.
+
+        Raises LeaseLost if `lease` is not the job's current lease.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]: ...
+
+    @abstractmethod
+    def pending_count(self) -> int: ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per state."""
+
+    @abstractmethod
+    def dead_letters(self, limit: int = 100) -> List[Job]: ...
+
+    @abstractmethod
+    def requeue(self, job_id: str) -> None:
+        """
+        Give a dead-lettered job a fresh set of attempts. Raises KeyError
+        for any other job: a done or running one would be run twice.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryJobQueue(JobQueue):
+    """In-process stand-in with the same semantics, for tests."""
+
+    def __init__(self, max_pending: Optional[int] = None):
+        super().__init__(max_pending)
+        self._jobs: Dict[str, Job] = {}
+        self._order: Dict[str, int] = {}
+        self._available_at: Dict[str, float] = {}
+        self._lease_until: Dict[str, float] = {}
+        self._leases: Dict[str, str] = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _insert(self, job: Job) -> None:
+        with self._lock:
+            self._sequence += 1
+            self._jobs[job.id] = job
+            self._order[job.id] = self._sequence
+            self._available_at[job.id] = 0.0
+
+    def _expire_leases(self, now: float) -> None:
+        for job in self._jobs.values():
+            if job.state == "running" and self._lease_until[job.id] <= now:
+                self._leases.pop(job.id, None)
+                if job.attempts >= job.max_attempts:
+                    job.state, job.error = "dead", LEASE_EXPIRED_ERROR
+                else:
+                    job.state = "pending"
+                    self._available_at[job.id] = 0.0
+
+    def claim(self, kinds=None, lease_seconds=300.0):
+        now = time.time()
+        with self._lock:
+            self._expire_leases(now)
+            claimable = [
+                job
+                for job in self._jobs.values()
+                if (kinds is None or job.kind in kinds)
+                and job.state == "pending"
+                and self._available_at[job.id] <= now
+            ]
+            if not claimable:
+                return None
+            job = min(claimable, key=lambda j: (-j.priority, self._order[j.id]))
+            job.state = "running"
+            job.attempts += 1
+            self._lease_until[job.id] = now + lease_seconds
+            self._leases[job.id] = uuid.uuid4().hex
+            return replace(job, lease=self._leases[job.id])
+
+    def _leased(self, job_id: str, lease: str) -> Job:
+        if self._leases.get(job_id) != lease:
+            raise LeaseLost(f"Lease on job {job_id} has expired")
+        del self._leases[job_id]
+        return self._jobs[job_id]
+
+    def complete(self, job_id, lease, result):
+        with self._lock:
+            job = self._leased(job_id, lease)
+            job.state, job.result, job.error = "done", result, None
+
+    def fail(self, job_id, lease, error):
+        with self._lock:
+            job = self._leased(job_id, lease)
+            job.error = error
+            if job.attempts >= job.max_attempts:
+                job.state = "dead"
+                return True
+            job.state = "pending"
+            self._available_at[job_id] = time.time() + retry_delay(job.attempts)
+            return False
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return Job(**vars(job)) if job else None
+
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == "pending")
+
+    def stats(self):
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return counts
+
+    def dead_letters(self, limit=100):
+        with self._lock:
+            dead = [Job(**vars(j)) for j in self._jobs.values() if j.state == "dead"]
+            return dead[:limit]
+
+    def requeue(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != "dead":
+                raise KeyError(f"No dead-lettered job {job_id}")
+            job.state, job.attempts = "pending", 0
+            self._available_at[job_id] = 0.0
+
+
+class SqliteJobQueue(JobQueue):
+    """
+    Queue in one SQLite file. Claims run in an IMMEDIATE transaction, so any
+    number of worker processes on the host can share the file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            available_at REAL NOT NULL DEFAULT 0,
+            lease_until REAL NOT NULL DEFAULT 0,
+            lease TEXT,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claim
+            ON jobs (state, priority DESC, created_at);
+    """
+
+    COLUMNS = (
+        "id, kind, payload, priority, max_attempts, attempts, state, result, error"
+    )
+
+    def __init__(self, path: str, max_pending: Optional[int] = None):
+        super().__init__(max_pending)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(self.SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease" not in columns:
+                # Files created before jobs carried a lease token
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite connections aren't shareable
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row_to_job(self, row) -> Job:
+        id, kind, payload, priority, max_attempts, attempts, state, result, error = row
+        return Job(
+            kind,
+            json.loads(payload),
+            priority=priority,
+            max_attempts=max_attempts,
+            id=id,
+            attempts=attempts,
+            state=state,
+            result=json.loads(result) if result is not None else None,
+            error=error,
+        )
+
+    def _insert(self, job: Job) -> None:
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, payload, priority, max_attempts, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                job.id,
+                job.kind,
+                json.dumps(job.payload),
+                job.priority,
+                job.max_attempts,
+                time.time(),
+            ),
+        )
+
+    def claim(self, kinds=None, lease_seconds=300.0):
+        now = time.time()
+        kind_filter = ""
+        params: List[Any] = [now]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += list(kinds)
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET lease = NULL, state = CASE"
+                " WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,"
+                " error = CASE WHEN attempts >= max_attempts THEN ? ELSE error END,"
+                " available_at = 0 WHERE state = 'running' AND lease_until <= ?",
+                (LEASE_EXPIRED_ERROR, now),
+            )
+            row = conn.execute(
+                f"SELECT {self.COLUMNS} FROM jobs"
+                " WHERE state = 'pending' AND available_at <= ?"
+                f"{kind_filter} ORDER BY priority DESC, created_at LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            lease = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1,"
+                " lease_until = ?, lease = ? WHERE id = ?",
+                (now + lease_seconds, lease, row[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        job = self._row_to_job(row)
+        job.state, job.attempts, job.lease = "running", job.attempts + 1, lease
+        return job
+
+    def complete(self, job_id, lease, result):
+        updated = self._connection().execute(
+            "UPDATE jobs SET state = 'done', result = ?, error = NULL, lease = NULL"
+            " WHERE id = ? AND lease = ?",
+            (json.dumps(result, default=str), job_id, lease),
+        )
+        if updated.rowcount == 0:
+            raise LeaseLost(f"Lease on job {job_id} has expired")
+
+    def fail(self, job_id, lease, error):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease = ?",
+                (job_id, lease),
+            ).fetchone()
+            if row is None:
+                raise LeaseLost(f"Lease on job {job_id} has expired")
+            attempts, max_attempts = row
+            dead = attempts >= max_attempts
+            conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, available_at = ?, lease = NULL"
+                " WHERE id = ?",
+                (
+                    "dead" if dead else "pending",
+                    error,
+                    time.time() + (0 if dead else retry_delay(attempts)),
+                    job_id,
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return dead
+
+    def get(self, job_id):
+        row = (
+            self._connection()
+            .execute(f"SELECT {self.COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+            .fetchone()
+        )
+        return self._row_to_job(row) if row else None
+
+    def pending_count(self):
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM jobs WHERE state = 'pending'")
+            .fetchone()[0]
+        )
+
+    def stats(self):
+        rows = self._connection().execute(
+            "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+        )
+        return dict(rows.fetchall())
+
+    def dead_letters(self, limit=100):
+        rows = self._connection().execute(
+            f"SELECT {self.COLUMNS} FROM jobs WHERE state = 'dead'"
+            " ORDER BY created_at LIMIT ?",
+            (limit,),
+        )
+        return [self._row_to_job(row) for row in rows.fetchall()]
+
+    def requeue(self, job_id):
+        updated = self._connection().execute(
+            "UPDATE jobs SET state = 'pending', attempts = 0, available_at = 0,"
+            " lease = NULL WHERE id = ? AND state = 'dead'",
+            (job_id,),
+        )
+        if updated.rowcount == 0:
+            raise KeyError(f"No dead-lettered job {job_id}")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Queue in Redis (or any server speaking its protocol), shared across nodes.
+
+    Each kind's pending jobs live in a sorted set scored by priority, then
+    enqueue order, so the next job of a kind is the head of its set. Running
+    jobs live in a sorted set scored by lease expiry, retries waiting out
+    their backoff in one scored by when they are due, and job records in
+    hashes. Claiming, completing and failing each run as one Lua script, so
+    they are atomic across workers.
+    """
+
+    # KEYS: running, delayed, dead, kinds
+    # ARGV: now, lease_seconds, lease, prefix, kinds (JSON list, empty for all),
+    #       error for jobs dead-lettered by an expired lease
+    CLAIM_SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local prefix = ARGV[4]
+        local kinds = cjson.decode(ARGV[5])
+        -- Due retries become pending again
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+            local job = prefix .. 'job:' .. id
+            local kind, order = unpack(redis.call('HMGET', job, 'kind', 'order'))
+            redis.call('ZREM', KEYS[2], id)
+            redis.call('ZADD', prefix .. 'pending:' .. kind, order, id)
+            redis.call('HSET', job, 'state', 'pending')
+        end
+        -- Expired leases are retried, or dead-lettered after the last attempt
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+            local job = prefix .. 'job:' .. id
+            local kind, order, attempts, max_attempts = unpack(redis.call(
+                'HMGET', job, 'kind', 'order', 'attempts', 'max_attempts'))
+            redis.call('ZREM', KEYS[1], id)
+            redis.call('HDEL', job, 'lease')
+            if tonumber(attempts) >= tonumber(max_attempts) then
+                redis.call('HSET', job, 'state', 'dead', 'error', ARGV[6])
+                redis.call('RPUSH', KEYS[3], id)
+            else
+                redis.call('ZADD', prefix .. 'pending:' .. kind, order, id)
+                redis.call('HSET', job, 'state', 'pending')
+            end
+        end
+        if #kinds == 0 then
+            kinds = redis.call('SMEMBERS', KEYS[4])
+        end
+        -- The best job of each kind is the head of its set
+        local best, best_key, best_order
+        for _, kind in ipairs(kinds) do
+            local key = prefix .. 'pending:' .. kind
+            local head = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+            if head[1] and (best == nil or tonumber(head[2]) < best_order) then
+                best, best_key, best_order = head[1], key, tonumber(head[2])
+            end
+        end
+        if best == nil then
+            return false
+        end
+        local job = prefix .. 'job:' .. best
+        redis.call('ZREM', best_key, best)
+        redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), best)
+        redis.call('HSET', job, 'state', 'running', 'lease', ARGV[3])
+        redis.call('HINCRBY', job, 'attempts', 1)
+        return best
+    """
+
+    # KEYS: running, job; ARGV: id, lease, result
+    COMPLETE_SCRIPT = """
+        if redis.call('HGET', KEYS[2], 'lease') ~= ARGV[2] then
+            return 0
+        end
+        redis.call('ZREM', KEYS[1], ARGV[1])
+        redis.call('HSET', KEYS[2], 'state', 'done', 'result', ARGV[3])
+        redis.call('HDEL', KEYS[2], 'error', 'lease')
+        return 1
+    """
+
+    # KEYS: running, delayed, dead, job; ARGV: id, lease, error, retry_at
+    # Returns -1 if the lease is not current, 1 if dead-lettered, else 0
+    FAIL_SCRIPT = """
+        if redis.call('HGET', KEYS[4], 'lease') ~= ARGV[2] then
+            return -1
+        end
+        local attempts, max_attempts = unpack(
+            redis.call('HMGET', KEYS[4], 'attempts', 'max_attempts'))
+        redis.call('ZREM', KEYS[1], ARGV[1])
+        redis.call('HDEL', KEYS[4], 'lease')
+        if tonumber(attempts) >= tonumber(max_attempts) then
+            redis.call('HSET', KEYS[4], 'state', 'dead', 'error', ARGV[3])
+            redis.call('RPUSH', KEYS[3], ARGV[1])
+            return 1
+        end
+        redis.call('HSET', KEYS[4], 'state', 'pending', 'error', ARGV[3])
+        redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+        return 0
+    """
+
+    # KEYS: dead, job; ARGV: id, prefix
+    # Returns 0 unless the job was dead-lettered
+    REQUEUE_SCRIPT = """
+        if redis.call('HGET', KEYS[2], 'state') ~= 'dead' then
+            return 0
+        end
+        local kind, order = unpack(redis.call('HMGET', KEYS[2], 'kind', 'order'))
+        redis.call('LREM', KEYS[1], 0, ARGV[1])
+        redis.call('HSET', KEYS[2], 'state', 'pending', 'attempts', 0)
+        redis.call('HDEL', KEYS[2], 'lease')
+        redis.call('ZADD', ARGV[2] .. 'pending:' .. kind, order, ARGV[1])
+        return 1
+    """
+
+    # Pending scores sort by priority first, then enqueue sequence
+    PRIORITY_SPAN = 10**12
+
+    def __init__(
+        self, url: str, name: str = "agent-jobs", max_pending: Optional[int] = None
+    ):
+        super().__init__(max_pending)
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = f"{name}:"
+        self._claim = self.redis.register_script(self.CLAIM_SCRIPT)
+        self._complete = self.redis.register_script(self.COMPLETE_SCRIPT)
+        self._fail = self.redis.register_script(self.FAIL_SCRIPT)
+        self._requeue = self.redis.register_script(self.REQUEUE_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    def _insert(self, job: Job) -> None:
+        sequence = self.redis.incr(self._key("sequence"))
+        order = -job.priority * self.PRIORITY_SPAN + sequence
+        pipe = self.redis.pipeline()
+        pipe.hset(
+            self._key(f"job:{job.id}"),
+            mapping={
+                "kind": job.kind,
+                "payload": json.dumps(job.payload),
+                "priority": job.priority,
+                "max_attempts": job.max_attempts,
+                "attempts": 0,
+                "state": "pending",
+                "order": order,
+            },
+        )
+        pipe.sadd(self._key("kinds"), job.kind)
+        pipe.zadd(self._key(f"pending:{job.kind}"), {job.id: order})
+        pipe.execute()
+
+    def claim(self, kinds=None, lease_seconds=300.0):
+        lease = uuid.uuid4().hex
+        job_id = self._claim(
+            keys=[
+                self._key("running"),
+                self._key("delayed"),
+                self._key("dead"),
+                self._key("kinds"),
+            ],
+            args=[
+                time.time(),
+                lease_seconds,
+                lease,
+                self.prefix,
+                json.dumps(list(kinds or [])),
+                LEASE_EXPIRED_ERROR,
+            ],
+        )
+        if not job_id:
+            return None
+        job = self.get(job_id)
+        job.lease = lease
+        return job
+
+    def complete(self, job_id, lease, result):
+        completed = self._complete(
+            keys=[self._key("running"), self._key(f"job:{job_id}")],
+            args=[job_id, lease, json.dumps(result, default=str)],
+        )
+        if not completed:
+            raise LeaseLost(f"Lease on job {job_id} has expired")
+
+    def fail(self, job_id, lease, error):
+        # Attempts can't change while `lease` holds the job; the script checks
+        attempts = int(self.redis.hget(self._key(f"job:{job_id}"), "attempts") or 0)
+        outcome = self._fail(
+            keys=[
+                self._key("running"),
+                self._key("delayed"),
+                self._key("dead"),
+                self._key(f"job:{job_id}"),
+            ],
+            args=[job_id, lease, error, time.time() + retry_delay(attempts)],
+        )
+        if outcome < 0:
+            raise LeaseLost(f"Lease on job {job_id} has expired")
+        return outcome == 1
+
+    def get(self, job_id):
+        data = self.redis.hgetall(self._key(f"job:{job_id}"))
+        if not data:
+            return None
+        return Job(
+            data["kind"],
+            json.loads(data["payload"]),
+            priority=int(data["priority"]),
+            max_attempts=int(data["max_attempts"]),
+            id=job_id,
+            attempts=int(data["attempts"]),
+            state=data["state"],
+            result=json.loads(data["result"]) if "result" in data else None,
+            error=data.get("error"),
+        )
+
+    def pending_count(self):
+        pipe = self.redis.pipeline()
+        for kind in self.redis.smembers(self._key("kinds")):
+            pipe.zcard(self._key(f"pending:{kind}"))
+        pipe.zcard(self._key("delayed"))
+        return sum(pipe.execute())
+
+    def stats(self):
+        return {
+            "pending": self.pending_count(),
+            "running": self.redis.zcard(self._key("running")),
+            "dead": self.redis.llen(self._key("dead")),
+        }
+
+    def dead_letters(self, limit=100):
+        ids = self.redis.lrange(self._key("dead"), 0, limit - 1)
+        return [job for job in map(self.get, ids) if job is not None]
+
+    def requeue(self, job_id):
+        requeued = self._requeue(
+            keys=[self._key("dead"), self._key(f"job:{job_id}")],
+            args=[job_id, self.prefix],
+        )
+        if not requeued:
+            raise KeyError(f"No dead-lettered job {job_id}")
+
+    def close(self):
+        self.redis.close()
+
+
+def open_queue(url: str, max_pending: Optional[int] = None) -> JobQueue:
+    """Open a queue from a sqlite://, redis:// or memory:// URL."""
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return SqliteJobQueue(url[len("sqlite:///") :], max_pending)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisJobQueue(url, max_pending=max_pending)
+    if parsed.scheme == "memory":
+        return MemoryJobQueue(max_pending)
+    raise ValueError(f"Unsupported job queue URL {url!r}")
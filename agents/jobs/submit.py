@@ -0,0 +1,134 @@
+"""
+Enqueue agent jobs and inspect the queue.
+
+Jobs are read as JSON lines, one per job:
+
+    {"kind": "email_triage", "payload": {"email": {...}}, "priority": 5}
+    {"kind": "rag_qa", "payload": {"question": "Who is Ada Lovelace?"}}
+
+Usage:
+    python submit.py add jobs.jsonl --wait
+    python submit.py stats
+    python submit.py dead
+    python submit.py requeue <job-id>
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import List
+
+from job_queue import JobQueue, QueueFull, open_queue
+from worker import DEFAULT_QUEUE_URL
+
+
+def add_jobs(queue: JobQueue, lines, max_attempts: int, timeout: float) -> List[str]:
+    job_ids = []
+    for line in lines:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        job_ids.append(
+            queue.put(
+                job["kind"],
+                job.get("payload", {}),
+                priority=job.get("priority", 0),
+                max_attempts=job.get("max_attempts", max_attempts),
+                timeout=timeout,
+            )
+        )
+    return job_ids
+
+
+def wait_for(queue: JobQueue, job_ids: List[str], poll_seconds: float = 0.5) -> None:
+    """Print each job's result as it finishes, as JSON lines."""
+    remaining = list(job_ids)
+    while remaining:
+        for job_id in list(remaining):
+            job = queue.get(job_id)
+            if job.state in ("done", "dead"):
+                remaining.remove(job_id)
+                print(
+                    json.dumps(
+                        {
+                            "id": job.id,
+                            "state": job.state,
+                            "result": job.result,
+                            "error": job.error,
+                        }
+                    ),
+                    flush=True,
+                )
+        if remaining:
+            time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enqueue and inspect agent jobs")
+    parser.add_argument(
+        "--queue", default=DEFAULT_QUEUE_URL, help="sqlite:// or redis:// URL"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Enqueue jobs from a JSON lines file")
+    add.add_argument("file", help="JSON lines file, or - for stdin")
+    add.add_argument(
+        "--wait", action="store_true", help="Wait for and print the results"
+    )
+    add.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="Block while this many jobs are already pending (backpressure)",
+    )
+    add.add_argument("--max-attempts", type=int, default=3)
+    add.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Give up if the queue stays full this long",
+    )
+
+    commands.add_parser("stats", help="Count jobs per state")
+    dead = commands.add_parser("dead", help="List dead-lettered jobs")
+    dead.add_argument("--limit", type=int, default=100)
+    requeue = commands.add_parser("requeue", help="Retry dead-lettered jobs")
+    requeue.add_argument("job_ids", nargs="+")
+    args = parser.parse_args()
+
+    queue = open_queue(args.queue, getattr(args, "max_pending", None))
+    if args.command == "add":
+        lines = sys.stdin if args.file == "-" else open(args.file)
+        try:
+            job_ids = add_jobs(queue, lines, args.max_attempts, args.timeout)
+        except QueueFull as e:
+            sys.exit(f"Queue full: {e}")
+        print(f"Enqueued {len(job_ids)} jobs", file=sys.stderr)
+        if args.wait:
+            wait_for(queue, job_ids)
+    elif args.command == "stats":
+        print(json.dumps(queue.stats()))
+    elif args.command == "dead":
+        for job in queue.dead_letters(args.limit):
+            print(
+                json.dumps(
+                    {
+                        "id": job.id,
+                        "kind": job.kind,
+                        "attempts": job.attempts,
+                        "error": job.error,
+                    }
+                )
+            )
+    elif args.command == "requeue":
+        for job_id in args.job_ids:
+            try:
+                queue.requeue(job_id)
+            except KeyError as e:
+                print(f"Not requeued: {e.args[0]}", file=sys.stderr)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Queue-backed worker pool for batch agent work.
+
+Each worker process warms up its handlers once (model clients, the guest
+index) and then claims jobs from the queue until stopped. Jobs run in
+priority order; failures are retried with backoff and dead-lettered after
+their last attempt; a job whose worker dies is picked up again when its
+lease expires. A worker process that exits is replaced.
+
+Usage:
+    python worker.py --kinds email_triage rag_qa --processes 4
+    python worker.py --queue redis://localhost:6379/0 --kinds rag_qa
+    python worker.py --kinds summarize=../tools/summarize.py:summarize
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import List, Optional
+
+from handlers import get_handler
+from job_queue import JobQueue, LeaseLost, open_queue
+
+# Shared utilities (telemetry) live in agents/tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from telemetry import agent_span, configure_telemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_URL = os.getenv("JOB_QUEUE_URL", "sqlite:///jobs.sqlite")
+
+# Idle workers poll with backoff between these bounds
+MIN_POLL_SECONDS = 0.05
+MAX_POLL_SECONDS = 2.0
+
+
+def work(
+    queue: JobQueue,
+    kinds: List[str],
+    stop,
+    lease_seconds: float = 600.0,
+    max_jobs: Optional[int] = None,
+) -> int:
+    """
+    Claim and run jobs of the given kinds until `stop` is set.
+
+    Args:
+        queue: Queue to claim from.
+        kinds: Job kinds to run; built-in names or `kind=path.py:function`.
+        stop: Event that ends the loop between jobs.
+        lease_seconds: How long a job may run before another worker may claim
+            it; must exceed the longest job.
+        max_jobs: Return after this many jobs, for tests and recycling.
+
+    Returns:
+        The number of jobs run.
+    """
+    handlers = {kind.partition("=")[0]: get_handler(kind) for kind in kinds}
+    states = {name: handler.warm_up() for name, handler in handlers.items()}
+    logger.info("Worker %d warm for %s", os.getpid(), ", ".join(handlers))
+
+    done = 0
+    poll = MIN_POLL_SECONDS
+    while not stop.is_set() and (max_jobs is None or done < max_jobs):
+        job = queue.claim(list(handlers), lease_seconds)
+        if job is None:
+            stop.wait(poll)
+            poll = min(poll * 2, MAX_POLL_SECONDS)
+            continue
+        poll = MIN_POLL_SECONDS
+
+        try:
+            with agent_span(f"job {job.kind}", **{"agent.job.id": job.id}):
+                result = handlers[job.kind].run(job.payload, states[job.kind])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            try:
+                dead = queue.fail(job.id, job.lease, error)
+            except LeaseLost:
+                logger.warning("Job %s outran its lease; failure dropped", job.id)
+            else:
+                if dead:
+                    logger.error(
+                        "Job %s dead-lettered after %d attempts", job.id, job.attempts
+                    )
+                else:
+                    logger.warning(
+                        "Job %s failed (attempt %d): %s", job.id, job.attempts, e
+                    )
+        else:
+            try:
+                queue.complete(job.id, job.lease, result)
+            except LeaseLost:
+                # Another worker has the job now, or it was dead-lettered
+                logger.warning("Job %s outran its lease; result dropped", job.id)
+        done += 1
+    return done
+
+
+def worker_process(url: str, kinds: List[str], stop, lease_seconds: float) -> None:
+    # The pool supervisor handles Ctrl-C and sets `stop`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO)
+    configure_telemetry("agent-job-worker")
+    queue = open_queue(url)
+    try:
+        work(queue, kinds, stop, lease_seconds)
+    finally:
+        queue.close()
+
+
+def run_pool(url: str, kinds: List[str], processes: int, lease_seconds: float) -> None:
+    """Run and supervise `processes` worker processes until interrupted."""
+    if url.startswith("memory://"):
+        raise ValueError("memory:// queues are in-process only; use sqlite or redis")
+
+    # Spawned workers start clean instead of inheriting the parent's clients
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+
+    def start():
+        process = context.Process(
+            target=worker_process, args=(url, kinds, stop, lease_seconds), daemon=True
+        )
+        process.start()
+        return process
+
+    def shutdown(*_):
+        stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    pool = [start() for _ in range(processes)]
+    logger.info("Started %d workers on %s", processes, url)
+    try:
+        while not stop.is_set():
+            for i, process in enumerate(pool):
+                if not process.is_alive():
+                    logger.warning(
+                        "Worker %d exited with %s; restarting",
+                        process.pid,
+                        process.exitcode,
+                    )
+                    pool[i] = start()
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        stop.set()
+
+    # Workers finish their current job before exiting
+    for process in pool:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued agent jobs")
+    parser.add_argument(
+        "--queue", default=DEFAULT_QUEUE_URL, help="sqlite:// or redis:// URL"
+    )
+    parser.add_argument(
+        "--kinds",
+        nargs="+",
+        default=["email_triage", "rag_qa"],
+        help="Job kinds to run: built-in names or kind=path/to/module.py:function",
+    )
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=600.0,
+        help="Time before a job whose worker died is claimed again",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_pool(args.queue, args.kinds, args.processes, args.lease_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,8 +19,8 @@ Usage:
 """
 
 import os
+import sys
 import json
-import wikipedia
 
 
 from dotenv import load_dotenv
@@ -33,12 +33,49 @@ from rich.markdown import Markdown
 # This keeps sensitive configuration like API endpoints separate from code
 load_dotenv(dotenv_path=".env.secure")
 
+# Shared utilities (telemetry) live in agents/tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from telemetry import agent_span, configure_telemetry, tool_span
+from prompt_layout import PromptLayout, format_prefix_report
+from model_router import ModelRouter
+from resilient_client import (
+    DeadlineExceeded,
+    NoHealthyEndpoint,
+    ResilientClient,
+    deadline,
+)
+from singleflight import format_singleflight_report, singleflight
+from vllm_dispatch import endpoints_from_env
+from wikipedia_pages import WikipediaReader
+
 # Create OpenAI client configured for vLLM server
-# The empty api_key works for most local deployments that don't require auth
-# base_url uses vLLM's default port 8000 with /v1 OpenAI-compatible endpoint
-client = OpenAI(api_key="", base_url=f"http://{os.getenv('API_ENDPOINT')}:8000/v1")
+# base_url uses vLLM's default port 8000 with /v1 OpenAI-compatible endpoint;
+# LLM_ENDPOINTS lists several servers, comma separated
+# ResilientClient times out every call, hedges calls slower than the server's
+# p95 and skips servers whose circuit breaker is open; it records a span per
+# call (tokens, latency, retries) once telemetry is configured
+client = ResilientClient(endpoints_from_env())
+
+# Time budget for answering one query, shared by all its model calls
+ANSWER_DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "300"))
+
+# With the small Qwen3-0.6B server deployed too, route each request to the
+# cheapest model likely to handle it; easy queries skip the 20B model. The
+# large route is the client above, and the small one gets its own
+# ResilientClient, so routed calls keep the deadline, hedging and breakers
+if os.getenv("SMALL_API_ENDPOINT") or os.getenv("SMALL_LLM_ENDPOINTS"):
+    client = ModelRouter.from_env(large_client=client)
+
+# Wikipedia pages are fetched concurrently over one pooled connection and
+# cached on disk (WEB_CACHE_DIR), so one tool call returns the top pages'
+# introductions instead of a list of titles the model has to come back for
+wikipedia_reader = WikipediaReader()
+
+# Token budget for one wikipedia_search result, shared by its pages
+WIKIPEDIA_MAX_TOKENS = int(os.getenv("WIKIPEDIA_MAX_TOKENS", "1500"))
 
 # Specify the model name - this should match what's loaded in your model server
+# (the ModelRouter replaces it with the model of the route it picks)
 model = "openai/gpt-oss-20b"
 
 
@@ -47,23 +84,30 @@ model = "openai/gpt-oss-20b"
 class SearchQuery(BaseModel):
     """Input schema for Wikipedia search queries."""
     query: str  # The search term to look up on Wikipedia
+    k: int = 3  # How many of the top pages to summarize
 
 
 # Tool function that the agent can call
-# Takes structured input (SearchQuery) and returns results
-def wikipedia_search(query: SearchQuery) -> str:
+# Takes structured input (SearchQuery) and returns results. Concurrent
+# sessions asking for the same search share one Wikipedia request
+@singleflight
+def wikipedia_search(query: str, k: int = 3) -> str:
     """
-    Search Wikipedia for articles matching the query.
+    Search Wikipedia and summarize the articles matching the query.
     
     Args:
-        query: SearchQuery object containing the search term
+        query: The search term
+        k: How many of the top articles to summarize
         
     Returns:
-        List of Wikipedia article titles matching the search
+        Markdown with the title, URL and introduction of each article,
+        trimmed to WIKIPEDIA_MAX_TOKENS in total
     """
-    # Use the wikipedia library to search for articles
-    # Returns a list of article titles that match the query
-    return wikipedia.search(query)
+    # One search, then the introductions of the top k articles fetched
+    # concurrently; at most 5 pages, so the budget isn't spread too thin
+    return wikipedia_reader.summaries(
+        query, k=max(1, min(k, 5)), max_tokens=WIKIPEDIA_MAX_TOKENS
+    )
 
 
 # Generate JSON schema from our Pydantic model
@@ -76,16 +120,110 @@ tool_definitions = {
     "type": "function",
     "function": {
         "name": "wikipedia_search",  # Function name the model will call
-        "description": "Search Wikipedia for information",  # What the function does
+        # What the function does
+        "description": "Search Wikipedia and read the introductions of the top matching articles",
         "parameters": wikipedia_search_schema,  # Expected input format
     },
 }
 
+# The system prompt and tool schemas are identical on every request and come
+# first, so vLLM's prefix cache can skip their prefill after the first query
+prompt = PromptLayout(
+    "oss_agent", "You are a helpful assistant.", tools=[tool_definitions]
+)
+
 # Map function names to actual Python functions
 # This allows us to dynamically call the right function based on the model's choice
 tools_map = {"wikipedia_search": wikipedia_search}
 
 
+@agent_span("oss_agent")
+@deadline(ANSWER_DEADLINE_SECONDS)
+def answer(user_input: str, client: OpenAI = client, tools: dict = tools_map) -> str | None:
+    """
+    Answer one query with the tool-calling loop.
+
+    Args:
+        user_input: The user's query
+        client: OpenAI-compatible client to call; defaults to the vLLM server
+        tools: Map of tool name to function the model may call
+
+    Returns:
+        The model's final response text
+    """
+    # Initialize the conversation with system and user messages
+    # The system message sets the agent's behavior and personality
+    messages = prompt.messages(user_input)
+
+    # Make the first API call with tools available
+    # tool_choice="required" forces the model to use a tool (good for testing)
+    # In production, you might use "auto" to let the model decide
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        tools=prompt.tools,  # List of available tools
+        tool_choice="auto", # Let the model decide whether to use a tool
+    )
+
+    # Add the model's response to our message history
+    # This preserves the conversation context for future calls
+    messages.append(response.choices[0].message)
+
+    # Check if the model wants to call any tools
+    # The model can request multiple tool calls in a single response
+    if response.choices[0].message.tool_calls:
+        # Process each tool call the model requested
+        for tool_call in response.choices[0].message.tool_calls:
+            function_name = tool_call.function.name
+
+            # Validate that we have the requested function available
+            # This prevents errors if the model hallucinates function names
+            if function_name not in tools:
+                # Return an error message to the model if function doesn't exist
+                messages.append(
+                    {
+                        "role": "tool",
+                        "content": json.dumps(
+                            {"error": f"Function {function_name} not found"}
+                        ),
+                        "tool_call_id": tool_call.id,  # Must match the call ID
+                    }
+                )
+                continue
+
+            # Parse the function arguments from JSON
+            # The model provides arguments as a JSON string
+            function_args = json.loads(tool_call.function.arguments)
+
+            # Execute the actual function with the provided arguments
+            # This is where the real work happens - calling external APIs, databases, etc.
+            with tool_span(function_name, function_args):
+                result = tools[function_name](**function_args)
+
+            # Send the function result back to the model
+            # The model will use this information to generate its final response
+            messages.append(
+                {
+                    "role": "tool",  # Special role for tool results
+                    # Text (such as search results) as is, anything else as JSON
+                    "content": result if isinstance(result, str) else json.dumps(result),
+                    "tool_call_id": tool_call.id,   # Must match the original call ID
+                }
+            )
+
+    # Make a final API call to get the model's response using the tool results
+    # No tools are needed this time - we just want the final answer. The tools
+    # are still sent, with tool_choice="none": the chat template renders them
+    # into the prompt, so dropping them would change the cached prefix
+    final_response = client.chat.completions.create(
+        model=model,
+        messages=messages,  # Includes original query + tool calls + tool results
+        tools=prompt.tools,
+        tool_choice="none",
+    )
+    return final_response.choices[0].message.content
+
+
 def main():
     """
     Main function demonstrating the agent conversation loop.
@@ -97,82 +235,28 @@ def main():
     """
     console = Console()
 
+    # Export spans if AGENT_TELEMETRY is set (otlp, file or console)
+    configure_telemetry("oss_agent")
+
     while True:
         user_input = console.input("Enter a query: ")
         if user_input.lower() == "exit":
+            console.print(format_prefix_report())
+            console.print(format_singleflight_report())
+            console.print(f"Wikipedia: {wikipedia_reader.stats()}")
+            if isinstance(client, ModelRouter):
+                console.print(client.format_report())
             break
 
-        # Initialize the conversation with system and user messages
-        # The system message sets the agent's behavior and personality
-        messages = [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": user_input},
-        ]
-        
-        # Make the first API call with tools available
-        # tool_choice="required" forces the model to use a tool (good for testing)
-        # In production, you might use "auto" to let the model decide
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            tools=[tool_definitions],  # List of available tools
-            tool_choice="auto", # Let the model decide whether to use a tool
-        )
-        
-        # Add the model's response to our message history
-        # This preserves the conversation context for future calls
-        messages.append(response.choices[0].message)
-
-        # Check if the model wants to call any tools
-        # The model can request multiple tool calls in a single response
-        if response.choices[0].message.tool_calls:
-            # Process each tool call the model requested
-            for tool_call in response.choices[0].message.tool_calls:
-                function_name = tool_call.function.name
-                
-                # Validate that we have the requested function available
-                # This prevents errors if the model hallucinates function names
-                if function_name not in tools_map:
-                    # Return an error message to the model if function doesn't exist
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "content": json.dumps(
-                                {"error": f"Function {function_name} not found"}
-                            ),
-                            "tool_call_id": tool_call.id,  # Must match the call ID
-                        }
-                    )
-                    continue
-                
-                # Parse the function arguments from JSON
-                # The model provides arguments as a JSON string
-                function_args = json.loads(tool_call.function.arguments)
-
-                # Execute the actual function with the provided arguments
-                # This is where the real work happens - calling external APIs, databases, etc.
-                result = tools_map[function_name](**function_args)
-
-                # Send the function result back to the model
-                # The model will use this information to generate its final response
-                messages.append(
-                    {
-                        "role": "tool",  # Special role for tool results
-                        "content": json.dumps(result),  # Function output as JSON
-                        "tool_call_id": tool_call.id,   # Must match the original call ID
-                    }
-                )
+        # A query that runs out of time or endpoints ends, not the session
+        try:
+            content = answer(user_input)
+        except (DeadlineExceeded, NoHealthyEndpoint) as e:
+            console.print(f"{type(e).__name__}: {e}", style="red", markup=False)
+            continue
 
-        # Make a final API call to get the model's response using the tool results
-        # No tools are needed this time - we just want the final answer
-        final_response = client.chat.completions.create(
-            model=model,
-            messages=messages,  # Includes original query + tool calls + tool results
-        )
-        
         # Print the model's final response
         # This should incorporate the information gathered from the tool calls
-        content = final_response.choices[0].message.content
         if content:
             console.print(Markdown(content))
 
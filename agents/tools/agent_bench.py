@@ -0,0 +1,524 @@
+"""
+Benchmark the agent loops against the local mock LLM server.
+
+Each scenario imports one of the repo's agent modules and runs its own graph,
+workflow or agent, with a scripted tool call followed by a final answer. Only
+the model client is replaced, by one pointed at `mock_llm.py`: the same client
+class for the langgraph and llamaindex agents, an OpenAIServerModel for the
+smolagents ones (whose InferenceClientModel only reaches hosted providers). Tools the script calls are local (a calculator, dummy weather, the
+cargo flight time), so no run leaves the machine. Because the mock's
+response time is known, the harness can separate the framework's own cost
+from model time:
+
+- round trips: chat completion requests per task
+- overhead: task latency minus the time the mock spent answering, per task
+- throughput: tasks per second as concurrency rises
+
+Scenarios whose framework is not installed are reported as skipped.
+
+Usage:
+    python agents/tools/agent_bench.py
+    python agents/tools/agent_bench.py --scenarios oss_agent spam \\
+        --tasks 40 --concurrency 1 4 16 --latency 0.1 --tokens-per-second 80
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from mock_llm import MockLLMServer, MockTurn, serve_mock_llm
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+LOOKUP_ARGUMENTS = {"query": "benchmark"}
+FINAL_ANSWER = "The benchmark lookup is complete."
+
+
+def lookup(query: str) -> str:
+    """
+    Look up a query in the benchmark's stand-in knowledge base.
+
+    Args:
+        query: The text to look up.
+    """
+    return f"Result for {query}"
+
+
+@dataclass
+class Scenario:
+    """
+    One agent loop to benchmark.
+
+    Attributes:
+        name (str): Scenario name, also the mock server script it replays.
+        script (list): Scripted model replies for one task.
+        build (Callable): Takes the mock server and returns a function that
+            runs one task through the agent. Async functions run all tasks of
+            a level on one event loop instead of worker threads.
+    """
+
+    name: str
+    script: List[MockTurn]
+    build: Callable[[MockLLMServer], Callable[[str], Any]]
+
+
+@dataclass
+class BenchResult:
+    """
+    Measurements for one scenario at one concurrency level.
+
+    Attributes:
+        scenario (str): Scenario name.
+        concurrency (int): Tasks run at once.
+        latencies (list): Seconds per task.
+        wall_seconds (float): Time to run every task.
+        round_trips (int): Chat completion requests the mock served.
+        model_seconds (float): Time the mock spent answering them.
+        errors (int): Tasks that raised.
+    """
+
+    scenario: str
+    concurrency: int
+    latencies: List[float] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    round_trips: int = 0
+    model_seconds: float = 0.0
+    errors: int = 0
+
+    @property
+    def tasks(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.tasks / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def round_trips_per_task(self) -> float:
+        return self.round_trips / self.tasks if self.tasks else 0.0
+
+    @property
+    def overhead_per_task(self) -> float:
+        """Task latency not spent inside the mock, averaged over tasks."""
+        if not self.tasks:
+            return 0.0
+        return max(0.0, sum(self.latencies) - self.model_seconds) / self.tasks
+
+
+def load_module(name: str, path: str):
+    """
+    Import an agent script by path, with its directory first on sys.path so
+    its sibling imports (tools.py, agent.py, ...) resolve to its own files
+    even after another agent's siblings of the same name were imported.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    sys.path.insert(0, directory)
+    for sibling in os.listdir(directory):
+        module = sys.modules.get(os.path.splitext(sibling)[0])
+        origin = getattr(module, "__file__", None)
+        if origin and os.path.dirname(os.path.abspath(origin)) != directory:
+            del sys.modules[module.__name__]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def course_path(*parts: str) -> str:
+    return os.path.join(REPO_ROOT, "agents", "course", *parts)
+
+
+def mock_chat_openai(server: MockLLMServer, script: str, **kwargs):
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model="mock", api_key="bench", base_url=server.base_url(script), **kwargs
+    )
+
+
+def mock_smolagents_model(server: MockLLMServer, script: str):
+    from smolagents import OpenAIServerModel
+
+    return OpenAIServerModel(
+        model_id="mock", api_base=server.base_url(script), api_key="bench"
+    )
+
+
+def build_oss_agent(server: MockLLMServer) -> Callable[[str], Any]:
+    """The hand-written OpenAI tool-calling loop in agents/oss_agent."""
+    from openai import OpenAI
+
+    oss_agent = load_module(
+        "oss_agent_main", os.path.join(REPO_ROOT, "agents", "oss_agent", "main.py")
+    )
+    client = OpenAI(api_key="bench", base_url=server.base_url("oss_agent"))
+    tools = {"wikipedia_search": lambda query: [lookup(query)]}
+    return lambda task: oss_agent.answer(task, client=client, tools=tools)
+
+
+def build_spam(server: MockLLMServer) -> Callable[[str], Any]:
+    """The langgraph email triage graph in course/langgraph/spam.py."""
+    spam = load_module("spam", course_path("langgraph", "spam.py"))
+    chat = mock_chat_openai(server, "spam", temperature=0)
+    spam.get_model = lambda: chat
+
+    def run(task: str) -> Any:
+        return spam.triage_email(
+            {"sender": "bench@example.com", "subject": "Benchmark", "body": task}
+        )
+
+    return run
+
+
+def build_docs(server: MockLLMServer) -> Callable[[str], Any]:
+    """The langgraph document assistant in course/langgraph/docs.py."""
+    from langchain_core.messages import HumanMessage
+
+    docs = load_module("docs", course_path("langgraph", "docs.py"))
+    chat = mock_chat_openai(server, "docs").bind_tools(
+        docs.tools, parallel_tool_calls=False
+    )
+    docs.get_llm_with_tools = lambda: chat
+
+    return lambda task: docs.react_graph.invoke(
+        {"messages": [HumanMessage(content=task)], "input_file": None}
+    )
+
+
+def build_agentic_rag(server: MockLLMServer) -> Callable[[str], Any]:
+    """Alfred, the langgraph guest-gala agent in course/agentic_rag."""
+    from langchain_core.messages import HumanMessage
+
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+    agent = load_module("agent", course_path("agentic_rag", "agent.py"))
+    # With a model_id the chat wrapper doesn't look the endpoint's model up
+    # on the Hub
+    llm = HuggingFaceEndpoint(
+        endpoint_url=server.base_url("agentic_rag", openai=False),
+        huggingfacehub_api_token="bench",
+    )
+    chat = ChatHuggingFace(llm=llm, model_id="mock").bind_tools(agent.tools)
+    agent.get_chat_with_tools = lambda: chat
+    alfred = agent.build_alfred()
+
+    # The async path, as served: tool calls of a turn run concurrently
+    async def run(task: str) -> Any:
+        return await alfred.ainvoke({"messages": [HumanMessage(content=task)]})
+
+    return run
+
+
+def build_llamaindex(server: MockLLMServer) -> Callable[[str], Any]:
+    """The llamaindex calculator workflow in course/llamaindex/main.py."""
+    from llama_index.llms.huggingface_api import HuggingFaceInferenceAPI
+
+    calculator = load_module("llamaindex_main", course_path("llamaindex", "main.py"))
+    tools = load_module("tools", course_path("llamaindex", "tools.py"))
+
+    # A URL model makes the Hugging Face client post to <url>/v1/chat/completions
+    llm = HuggingFaceInferenceAPI(model=server.base_url("llamaindex", openai=False))
+    calculator.get_llm = lambda: llm
+
+    # The client closes all of its sessions after each streamed reply, which
+    # cuts off every other in-flight stream, so concurrent runs must not stream
+    workflow = calculator.build_calculator(
+        [tools.calculate, tools.add, tools.subtract, tools.multiply, tools.divide],
+        streaming=False,
+    )
+
+    async def run(task: str) -> Any:
+        return await workflow.run(user_msg=task)
+
+    return run
+
+
+def build_first_agent(server: MockLLMServer) -> Callable[[str], Any]:
+    """The smolagents research CodeAgent in course/smolagent/multi_agent."""
+    first_agent = load_module(
+        "first_agent", course_path("smolagent", "multi_agent", "first_agent.py")
+    )
+    model = mock_smolagents_model(server, "first_agent")
+
+    # Agents keep their run's memory, so each task gets its own
+    return lambda task: first_agent.build_agent(model).run(task)
+
+
+def build_multi_agent(server: MockLLMServer) -> Callable[[str], Any]:
+    """
+    The web agent of course/smolagent/multi_agent, which takes most of that
+    demo's steps; the manager needs a browser and a vision model to finish.
+    """
+    multi_agent = load_module(
+        "multi_agent", course_path("smolagent", "multi_agent", "multi_agent.py")
+    )
+    model = mock_smolagents_model(server, "multi_agent")
+    return lambda task: multi_agent.build_web_agent(model).run(task)
+
+
+def build_party_planner(server: MockLLMServer) -> Callable[[str], Any]:
+    """
+    The menu CodeAgent of course/smolagent/party_planner; its other agents
+    search the web, or run on what the web search found.
+    """
+    party_planner = load_module(
+        "party_planner_main", course_path("smolagent", "party_planner", "main.py")
+    )
+    model = mock_smolagents_model(server, "party_planner")
+    # Each agent builds its own InferenceClientModel() when it runs
+    party_planner.InferenceClientModel = lambda *args, **kwargs: model
+
+    # The agent's prompt is fixed, so the task text isn't used
+    return lambda task: party_planner.menu_agent()
+
+
+MENU_CODE = (
+    "Thought: I will ask for a formal menu.\n<code>\n"
+    'menu = suggest_menu(occasion="formal")\nprint(menu)\n</code>'
+)
+
+CARGO_CODE = (
+    "Thought: I will compute the flight time.\n<code>\n"
+    "hours = calculate_cargo_travel_time("
+    "origin_coords=(48.8566, 2.3522), destination_coords=(40.7128, -74.006))\n"
+    "print(hours)\n</code>"
+)
+CARGO_ANSWER = (
+    "Thought: I have the result.\n<code>\n" f"final_answer({FINAL_ANSWER!r})\n</code>"
+)
+
+SCENARIOS = [
+    Scenario(
+        "oss_agent",
+        [
+            MockTurn(
+                tool_calls=[{"name": "wikipedia_search", "arguments": LOOKUP_ARGUMENTS}]
+            ),
+            MockTurn(content=FINAL_ANSWER),
+        ],
+        build_oss_agent,
+    ),
+    # Both of the graph's model calls (classify, then draft) start a new
+    # conversation, so both get the first turn
+    Scenario(
+        "spam",
+        [MockTurn(content="Not spam. Category: inquiry. Dear sender, thank you.")],
+        build_spam,
+    ),
+    Scenario(
+        "docs",
+        [
+            MockTurn(tool_calls=[{"name": "divide", "arguments": {"a": 6, "b": 3}}]),
+            MockTurn(content=FINAL_ANSWER),
+        ],
+        build_docs,
+    ),
+    Scenario(
+        "agentic_rag",
+        [
+            MockTurn(
+                tool_calls=[
+                    {"name": "get_weather_info", "arguments": {"location": "Gotham"}}
+                ]
+            ),
+            MockTurn(content=FINAL_ANSWER),
+        ],
+        build_agentic_rag,
+    ),
+    Scenario(
+        "llamaindex",
+        [
+            MockTurn(
+                content=(
+                    "Thought: I need to use a tool to help me answer the question.\n"
+                    'Action: calculate\nAction Input: {"expression": "(2 + 3) * 4 / 2"}'
+                )
+            ),
+            MockTurn(
+                content=f"Thought: I can answer without using any more tools.\nAnswer: {FINAL_ANSWER}"
+            ),
+        ],
+        build_llamaindex,
+    ),
+    # first_agent plans before its first step; the plan is the first turn
+    Scenario(
+        "first_agent",
+        [
+            MockTurn(content="1. Compute the flight time.\n2. Answer."),
+            MockTurn(content=CARGO_CODE),
+            MockTurn(content=CARGO_ANSWER),
+        ],
+        build_first_agent,
+    ),
+    Scenario(
+        "multi_agent",
+        [MockTurn(content=CARGO_CODE), MockTurn(content=CARGO_ANSWER)],
+        build_multi_agent,
+    ),
+    Scenario(
+        "party_planner",
+        [MockTurn(content=MENU_CODE), MockTurn(content=CARGO_ANSWER)],
+        build_party_planner,
+    ),
+]
+
+
+def run_level(
+    server: MockLLMServer,
+    scenario: Scenario,
+    run_task: Callable[[str], Any],
+    tasks: int,
+    concurrency: int,
+    loop: asyncio.AbstractEventLoop,
+) -> BenchResult:
+    """
+    Run `tasks` tasks through one agent, `concurrency` at a time. Async agents
+    run on `loop`, which should be the same for every level: their clients
+    hold connections bound to the loop they first ran on.
+    """
+    result = BenchResult(scenario.name, concurrency)
+    before = server.stats(scenario.name)
+    prompts = [f"Benchmark task {i}: look up 'benchmark'." for i in range(tasks)]
+
+    def timed(prompt: str) -> tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            run_task(prompt)
+            return time.perf_counter() - started, True
+        except Exception:
+            return time.perf_counter() - started, False
+
+    async def atimed(prompt: str, slots: asyncio.Semaphore) -> tuple[float, bool]:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await run_task(prompt)
+                return time.perf_counter() - started, True
+            except Exception:
+                return time.perf_counter() - started, False
+
+    async def run_async() -> list[tuple[float, bool]]:
+        slots = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(atimed(p, slots) for p in prompts))
+
+    started = time.perf_counter()
+    if asyncio.iscoroutinefunction(run_task):
+        outcomes = loop.run_until_complete(run_async())
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, prompts))
+    result.wall_seconds = time.perf_counter() - started
+
+    result.latencies = [latency for latency, _ in outcomes]
+    result.errors = sum(1 for _, ok in outcomes if not ok)
+    after = server.stats(scenario.name)
+    result.round_trips = after.requests - before.requests
+    result.model_seconds = after.busy_seconds - before.busy_seconds
+    return result
+
+
+def run_benchmark(
+    scenarios: List[Scenario],
+    tasks: int,
+    concurrency_levels: List[int],
+    latency: float,
+    tokens_per_second: float,
+) -> Dict[str, Optional[List[BenchResult]]]:
+    """Benchmark every scenario; None marks a scenario that could not be built."""
+    results: Dict[str, Optional[List[BenchResult]]] = {}
+    scripts = {scenario.name: scenario.script for scenario in scenarios}
+    with serve_mock_llm(
+        scripts, latency=latency, tokens_per_second=tokens_per_second
+    ) as server:
+        for scenario in scenarios:
+            try:
+                run_task = scenario.build(server)
+            except ImportError as e:
+                print(f"{scenario.name}: skipped ({e})")
+                results[scenario.name] = None
+                continue
+
+            loop = asyncio.new_event_loop()
+            try:
+                # The agents' own prints (spam's notices, ...) would bury the report
+                with redirect_stdout(io.StringIO()):
+                    # One untimed task to pay for lazy imports and connection setup
+                    run_level(server, scenario, run_task, 1, 1, loop)
+                    results[scenario.name] = [
+                        run_level(server, scenario, run_task, tasks, concurrency, loop)
+                        for concurrency in concurrency_levels
+                    ]
+            finally:
+                loop.close()
+    return results
+
+
+def print_report(results: Dict[str, Optional[List[BenchResult]]]) -> None:
+    header = (
+        f"{'scenario':<24} {'conc':>4} {'tasks/s':>8} {'p50':>8} "
+        f"{'trips':>6} {'overhead':>9} {'errors':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, levels in results.items():
+        if levels is None:
+            print(f"{name:<24} {'skipped':>4}")
+            continue
+        for level in levels:
+            p50 = statistics.median(level.latencies) if level.latencies else 0.0
+            print(
+                f"{name:<24} {level.concurrency:>4} {level.throughput:>8.2f} "
+                f"{1000 * p50:>6.0f}ms {level.round_trips_per_task:>6.1f} "
+                f"{1000 * level.overhead_per_task:>7.1f}ms {level.errors:>6}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark agent loops against a mock LLM"
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="*",
+        choices=[s.name for s in SCENARIOS],
+        default=[s.name for s in SCENARIOS],
+    )
+    parser.add_argument(
+        "--tasks", type=int, default=20, help="Tasks per concurrency level"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mock time to first token"
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=0.0,
+        help="Mock token rate, 0 for instant",
+    )
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if s.name in args.scenarios]
+    results = run_benchmark(
+        scenarios, args.tasks, args.concurrency, args.latency, args.tokens_per_second
+    )
+    print_report(results)
+
+    # Non-zero exit if a scenario could not complete its tasks
+    failed = any(
+        level.errors for levels in results.values() if levels for level in levels
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
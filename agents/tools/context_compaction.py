@@ -0,0 +1,205 @@
+"""
+Memory compaction for long smolagents runs.
+
+A CodeAgent sends its whole memory on every step: each earlier step's code
+and full observation (a visited webpage can be thousands of tokens). Over a
+15-step run prompt tokens grow quadratically. ContextCompactor keeps them
+roughly flat:
+
+- after each step, observations older than the last `keep_recent` steps are
+  compacted to a short head plus the facts extracted from them, and the
+  facts go to a structured scratchpad
+- after each planning step, compacted steps shrink to one line, superseded
+  plans to their first lines, and the scratchpad is appended to the new plan,
+  so the facts gathered so far are in the prompt exactly once
+
+    compactor = ContextCompactor()
+    agent = CodeAgent(..., step_callbacks=compactor.callbacks())
+    ...
+    print(compactor.format_report())
+
+Facts are extracted without a model by default: sentences and lines carrying
+numbers, coordinates or links. Pass `extract_facts=llm_fact_extractor(model)`
+to have a model list them instead.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from smolagents.memory import ActionStep, PlanningStep
+
+SCRATCHPAD_HEADING = "## Facts gathered so far"
+SUPERSEDED = "(Superseded by a later plan.)"
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_DIGIT = re.compile(r"\d")
+_LINK = re.compile(r"https?://\S+")
+
+
+@dataclass
+class Fact:
+    """
+    One scratchpad entry.
+
+    Attributes:
+        step (int): Step whose observation it came from.
+        text (str): The fact, one line.
+    """
+
+    step: int
+    text: str
+
+
+def extract_facts(observation: str, limit: int = 8, max_chars: int = 240) -> List[str]:
+    """Short sentences with numbers or links: the kind of thing a step found out."""
+    facts = []
+    for sentence in _SENTENCE.split(observation):
+        sentence = " ".join(sentence.split())
+        if not sentence or len(sentence) > max_chars:
+            continue
+        if _DIGIT.search(sentence) or _LINK.search(sentence):
+            if sentence not in facts:
+                facts.append(sentence)
+        if len(facts) >= limit:
+            break
+    return facts
+
+
+def llm_fact_extractor(model, limit: int = 8) -> Callable[[str], List[str]]:
+    """Fact extraction by a smolagents model, one short call per compacted step."""
+    from smolagents.models import ChatMessage, MessageRole
+
+    def extract(observation: str) -> List[str]:
+        prompt = (
+            f"List at most {limit} facts from this tool output that could matter "
+            "for the task: names, places, coordinates, numbers, dates, URLs. "
+            "One fact per line, starting with '- '. No other text.\n\n"
+            f"{observation[:12000]}"
+        )
+        message = ChatMessage(
+            role=MessageRole.USER, content=[{"type": "text", "text": prompt}]
+        )
+        content = model.generate([message]).content or ""
+        return [
+            line[2:].strip() for line in content.splitlines() if line.startswith("- ")
+        ][:limit]
+
+    return extract
+
+
+class ContextCompactor:
+    """
+    Step callbacks that compact one agent's memory as it grows.
+
+    Args:
+        keep_recent: Most recent steps whose observations are left whole,
+            the step just run included; at least 1, since the callback runs
+            before that step is in memory and its observation reaches the
+            model whole once either way.
+        head_chars: Characters of a compacted observation kept verbatim.
+        max_facts: Scratchpad size; the oldest facts are dropped first.
+        extract_facts: Observation text to a list of one-line facts.
+    """
+
+    def __init__(
+        self,
+        keep_recent: int = 1,
+        head_chars: int = 300,
+        max_facts: int = 40,
+        extract_facts: Callable[[str], List[str]] = extract_facts,
+    ):
+        self.keep_recent = max(1, keep_recent)
+        self.head_chars = head_chars
+        self.max_facts = max_facts
+        self.extract_facts = extract_facts
+        self.scratchpad: List[Fact] = []
+        self.input_tokens: List[Optional[int]] = []
+        self.compacted_chars = 0
+        self._compacted: set = set()
+
+    def callbacks(self) -> Dict[type, Callable]:
+        """Pass as a CodeAgent's `step_callbacks`."""
+        return {ActionStep: self.on_action_step, PlanningStep: self.on_planning_step}
+
+    def on_action_step(self, step: ActionStep, agent: Any) -> None:
+        if step.step_number == 1:
+            # A new run (managed agents are reset on every call)
+            self.scratchpad.clear()
+            self._compacted.clear()
+        usage = step.token_usage
+        self.input_tokens.append(usage.input_tokens if usage else None)
+        # The step itself isn't in memory yet; it counts as the most recent
+        steps = [s for s in agent.memory.steps if isinstance(s, ActionStep)]
+        for old in steps[: max(0, len(steps) - self.keep_recent + 1)]:
+            self._compact(old)
+
+    def on_planning_step(self, step: PlanningStep, agent: Any) -> None:
+        # The new plan restates progress, so everything before it can shrink
+        steps = [s for s in agent.memory.steps if isinstance(s, ActionStep)]
+        for old in steps:
+            self._compact(old)
+            if (old.observations or "").startswith("[Compacted:"):
+                brief = old.observations.split("\n", 1)[0]
+                self.compacted_chars += len(old.observations) - len(brief)
+                old.observations = brief
+        for old in agent.memory.steps:
+            if isinstance(old, PlanningStep) and old is not step:
+                self._supersede(old)
+        if self.scratchpad:
+            step.plan = f"{step.plan.rstrip()}\n\n{self.format_scratchpad()}"
+
+    def _compact(self, step: ActionStep) -> None:
+        if id(step) in self._compacted:
+            return
+        self._compacted.add(id(step))
+        observation = step.observations or ""
+        step.observations_images = None
+        if len(observation) <= self.head_chars:
+            return
+
+        facts = self.extract_facts(observation)
+        self.scratchpad.extend(Fact(step.step_number, fact) for fact in facts)
+        del self.scratchpad[: max(0, len(self.scratchpad) - self.max_facts)]
+
+        head = " ".join(observation[: self.head_chars].split())
+        lines = [
+            f"[Compacted: {len(observation)} chars, {len(facts)} facts kept] {head}..."
+        ]
+        lines += [f"- {fact}" for fact in facts]
+        step.observations = "\n".join(lines)
+        self.compacted_chars += len(observation) - len(step.observations)
+
+    def _supersede(self, plan: PlanningStep) -> None:
+        if plan.plan.endswith(SUPERSEDED):
+            return
+        text = plan.plan.split(SCRATCHPAD_HEADING, 1)[0].strip()
+        if len(text) > self.head_chars:
+            text = text[: self.head_chars].rstrip() + "..."
+        text += "\n" + SUPERSEDED
+        self.compacted_chars += len(plan.plan) - len(text)
+        plan.plan = text
+
+    def format_scratchpad(self) -> str:
+        lines = [SCRATCHPAD_HEADING]
+        lines += [f"- (step {fact.step}) {fact.text}" for fact in self.scratchpad]
+        return "\n".join(lines)
+
+    def report(self) -> Dict[str, Any]:
+        known = [tokens for tokens in self.input_tokens if tokens is not None]
+        return {
+            "steps": len(self.input_tokens),
+            "input_tokens": self.input_tokens,
+            "first_step_tokens": known[0] if known else None,
+            "max_step_tokens": max(known) if known else None,
+            "facts": len(self.scratchpad),
+            "compacted_chars": self.compacted_chars,
+        }
+
+    def format_report(self) -> str:
+        row = self.report()
+        tokens = " ".join("-" if t is None else str(t) for t in row["input_tokens"])
+        return (
+            f"{row['steps']} steps, prompt tokens per step: {tokens or '-'}\n"
+            f"{row['compacted_chars']} chars compacted, {row['facts']} facts in scratchpad"
+        )
@@ -0,0 +1,19 @@
+"""
+Latency percentiles shared by the pools, runners and clients that report them.
+"""
+
+import math
+from typing import Iterable, Optional
+
+
+def percentile(
+    samples: Iterable[float], q: float, default: Optional[float] = 0.0
+) -> Optional[float]:
+    """Nearest-rank `q` percentile (0..1) of `samples`; `default` if empty."""
+    ordered = sorted(samples)
+    if not ordered:
+        return default
+    # The smallest sample with at least q of them at or below it; the
+    # tolerance keeps 0.07 * 100 = 7.000000000000001 at rank 7
+    rank = math.ceil(q * len(ordered) - 1e-9)
+    return ordered[min(len(ordered) - 1, max(0, rank - 1))]
@@ -0,0 +1,360 @@
+"""
+Local mock of an OpenAI-compatible chat completions server.
+
+Answers `/v1/chat/completions` (streaming and non-streaming) from scripted
+turns, with a configurable time to first token and token rate, so agent
+loops can be benchmarked without a model behind them:
+
+    python mock_llm.py --port 8001 --latency 0.2 --tokens-per-second 50
+    OpenAI(api_key="", base_url="http://127.0.0.1:8001/v1")
+
+Faults can be injected to test clients against tail latency and outages:
+`slow_fraction` of requests wait `slow_latency` seconds instead of `latency`,
+and `error_rate` of requests fail with a 503.
+
+Scripts are selected by the first path segment, so one server can drive
+several agents at once: `http://127.0.0.1:8001/<script>/v1` replays the
+script registered under `<script>`, and any other path replays "default".
+A script is a list of MockTurn; the turn played is the number of assistant
+messages already in the request, so a conversation steps through the
+script no matter how many run concurrently.
+
+Or in-process:
+
+    with serve_mock_llm({"default": [MockTurn(content="Hi")]}) as server:
+        client = OpenAI(api_key="", base_url=server.base_url())
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass
+class MockTurn:
+    """
+    One scripted assistant reply.
+
+    Attributes:
+        content (str): Text of the reply.
+        tool_calls (list): Tool calls to return, as {"name": ..., "arguments": {...}}.
+    """
+
+    content: str = ""
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> List[str]:
+        text = self.content + "".join(
+            json.dumps(call.get("arguments", {})) for call in self.tool_calls
+        )
+        return text.split() or [""]
+
+
+DEFAULT_SCRIPT = [
+    MockTurn(tool_calls=[{"name": "lookup", "arguments": {"query": "benchmark"}}]),
+    MockTurn(content="The benchmark lookup is complete."),
+]
+
+
+@dataclass
+class MockStats:
+    """
+    Request counters for one script, updated from the server threads.
+
+    Attributes:
+        requests (int): Chat completion requests served.
+        busy_seconds (float): Total time spent answering them.
+        completion_tokens (int): Tokens returned.
+    """
+
+    requests: int = 0
+    busy_seconds: float = 0.0
+    completion_tokens: int = 0
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer holding the scripts, timing settings and stats."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        scripts: Dict[str, List[MockTurn]],
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        slow_fraction: float = 0.0,
+        slow_latency: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        super().__init__(address, MockLLMHandler)
+        self.scripts = scripts
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.slow_fraction = slow_fraction
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self._stats: Dict[str, MockStats] = {}
+        self._lock = threading.Lock()
+
+    def base_url(self, script: str = "", openai: bool = True) -> str:
+        """Base URL for a client; OpenAI clients expect the /v1 suffix."""
+        url = f"http://127.0.0.1:{self.server_address[1]}"
+        if script:
+            url += f"/{script}"
+        return url + "/v1" if openai else url
+
+    def record(self, script: str, seconds: float, tokens: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(script, MockStats())
+            stats.requests += 1
+            stats.busy_seconds += seconds
+            stats.completion_tokens += tokens
+
+    def stats(self, script: Optional[str] = None) -> MockStats:
+        """Counters for one script, or summed over all of them."""
+        with self._lock:
+            if script is not None:
+                stats = self._stats.get(script, MockStats())
+                return MockStats(**vars(stats))
+            return MockStats(
+                requests=sum(s.requests for s in self._stats.values()),
+                busy_seconds=sum(s.busy_seconds for s in self._stats.values()),
+                completion_tokens=sum(
+                    s.completion_tokens for s in self._stats.values()
+                ),
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    server: MockLLMServer
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # second one waits on a delayed ACK and adds ~40ms to every request
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if not self.path.rstrip("/").endswith("/models"):
+            self.send_error(404)
+            return
+        names = sorted(self.server.scripts)
+        self._send_json(
+            {"object": "list", "data": [{"id": n, "object": "model"} for n in names]}
+        )
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        script_name = self.path.strip("/").split("/")[0]
+        if script_name not in self.server.scripts:
+            script_name = "default"
+        script = self.server.scripts.get(script_name) or DEFAULT_SCRIPT
+        played = sum(
+            1 for m in request.get("messages", []) if m.get("role") == "assistant"
+        )
+        turn = script[min(played, len(script) - 1)]
+
+        latency = self.server.latency
+        if random.random() < self.server.slow_fraction:
+            latency = self.server.slow_latency
+        if latency:
+            time.sleep(latency)
+        if random.random() < self.server.error_rate:
+            self._send_json(
+                {"error": {"message": "Injected failure", "type": "overloaded"}}, 503
+            )
+            return
+
+        # Stats are recorded before the last write, so they are complete by
+        # the time the client sees the end of the reply
+        def done() -> None:
+            self.server.record(
+                script_name, time.perf_counter() - started, len(turn.tokens)
+            )
+
+        if request.get("stream"):
+            self._stream(request, turn, done)
+        else:
+            self._pace(len(turn.tokens))
+            completion = self._completion(request, turn)
+            done()
+            self._send_json(completion)
+
+    def _pace(self, tokens: int) -> None:
+        if self.server.tokens_per_second:
+            time.sleep(tokens / self.server.tokens_per_second)
+
+    def _tool_calls(self, turn: MockTurn) -> List[Dict[str, Any]]:
+        return [
+            {
+                "index": index,
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": json.dumps(call.get("arguments", {})),
+                },
+            }
+            for index, call in enumerate(turn.tool_calls)
+        ]
+
+    def _completion(self, request: Dict[str, Any], turn: MockTurn) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": turn.content or None}
+        if turn.tool_calls:
+            message["tool_calls"] = self._tool_calls(turn)
+        prompt_tokens = sum(
+            len(str(m.get("content") or "").split())
+            for m in request.get("messages", [])
+        )
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if turn.tool_calls else "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(turn.tokens),
+                "total_tokens": prompt_tokens + len(turn.tokens),
+            },
+        }
+
+    def _stream(
+        self, request: Dict[str, Any], turn: MockTurn, done: Callable[[], None]
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def send(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> None:
+            chunk = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        send({"role": "assistant", "content": ""})
+        words = turn.content.split(" ") if turn.content else []
+        for index, word in enumerate(words):
+            self._pace(1)
+            send({"content": word if index == 0 else " " + word})
+        if turn.tool_calls:
+            self._pace(len(turn.tokens) - len(words))
+            send({"tool_calls": self._tool_calls(turn)})
+        send({}, "tool_calls" if turn.tool_calls else "stop")
+        done()
+        write(b"data: [DONE]\n\n")
+        write(b"")
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_mock_llm(
+    scripts: Optional[Dict[str, List[MockTurn]]] = None,
+    latency: float = 0.0,
+    tokens_per_second: float = 0.0,
+    port: int = 0,
+    **faults,
+) -> Iterator[MockLLMServer]:
+    """
+    Run the mock server on a background thread and yield it; `faults` are
+    slow_fraction, slow_latency and error_rate.
+    """
+    server = MockLLMServer(
+        ("127.0.0.1", port),
+        scripts or {"default": DEFAULT_SCRIPT},
+        latency=latency,
+        tokens_per_second=tokens_per_second,
+        **faults,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds to first token"
+    )
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=0.0, help="0 means instant"
+    )
+    parser.add_argument(
+        "--slow-fraction",
+        type=float,
+        default=0.0,
+        help="Fraction of requests delayed by --slow-latency instead",
+    )
+    parser.add_argument("--slow-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests failing with 503",
+    )
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        ("127.0.0.1", args.port),
+        {"default": DEFAULT_SCRIPT},
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        slow_fraction=args.slow_fraction,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+    )
+    print(f"Mock LLM listening on {server.base_url()}")
+    server.serve_forever()
@@ -0,0 +1,355 @@
+"""
+Cost/latency-aware routing between the small and large vLLM deployments.
+
+infrastructure/ai-inference deploys Qwen/Qwen3-0.6B next to
+openai/gpt-oss-20b. Most short lookups don't need the 20B model, but paying
+its latency on every request is the default. ModelRouter sends each chat
+completion to the cheapest route likely to handle it:
+
+1. A small logistic classifier scores query features (length, reasoning
+   and math cues, code, tools offered, conversation length). Queries it
+   scores as hard go straight to the large model.
+2. Everything else tries the small model first, and escalates to the large
+   one when the answer looks unusable: an error, an empty or truncated
+   reply, a call to a tool that wasn't offered, unparseable arguments, or a
+   low average token probability.
+3. Each small-model outcome trains the classifier online, and a task that
+   needed escalation goes straight to the large model on its later calls.
+
+ModelRouter has the same `chat.completions.create` as the OpenAI client, so
+an agent can use it unchanged; the `model` argument is replaced by the
+route's model. `format_report()` shows per-route success, latency and
+token cost.
+
+    SMALL_API_ENDPOINT  host of the Qwen3-0.6B server (vLLM on port 8000)
+    SMALL_LLM_ENDPOINTS or base URLs of several, comma separated
+    API_ENDPOINT        host of the gpt-oss-20b server, as for the OSS agent
+    LLM_ENDPOINTS       or base URLs of several, comma separated
+
+Both routes call their servers through a ResilientClient, so a routed call
+keeps the caller's deadline, is hedged when slow and skips servers whose
+circuit breaker is open. A small route with every breaker open is passed
+over for the large one without counting against the query.
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from opentelemetry import trace
+
+from latency import percentile
+from resilient_client import DeadlineExceeded, NoHealthyEndpoint, ResilientClient
+from vllm_dispatch import endpoints_from_env
+
+REASONING_CUES = re.compile(
+    r"\b(why|explain|compare|analy[sz]e|plan|prove|derive|step[- ]by[- ]step|"
+    r"trade-?offs?|evaluate|design|summari[sz]e|reason)\b",
+    re.IGNORECASE,
+)
+MATH_CUES = re.compile(r"\d+\s*[-+*/^%=]\s*\d+|\b(calculate|compute|solve|equation)\b")
+CODE_CUES = re.compile(r"```|\bdef |\bclass |\bimport |[{};]\s*$", re.MULTILINE)
+
+
+@dataclass
+class Route:
+    """
+    One model deployment.
+
+    Attributes:
+        name (str): "small" or "large", for stats and spans.
+        model (str): Model name served by the endpoint.
+        client: OpenAI-compatible client for the endpoint.
+        cost_per_1k_tokens (float): Relative cost, e.g. GPU-seconds per 1k tokens.
+    """
+
+    name: str
+    model: str
+    client: Any
+    cost_per_1k_tokens: float
+
+
+@dataclass
+class RouteStats:
+    """
+    Outcomes of one route.
+
+    Attributes:
+        requests (int): Calls sent to the route.
+        successes (int): Calls whose answer was used.
+        escalations (int): Small-model answers rejected and retried on the large model.
+        errors (int): Calls that raised.
+        prompt_tokens (int): Prompt tokens across calls.
+        completion_tokens (int): Completion tokens across calls.
+        latencies (deque): Recent call latencies in seconds.
+    """
+
+    requests: int = 0
+    successes: int = 0
+    escalations: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+
+def query_features(messages: Sequence[Any], tools: Optional[list]) -> List[float]:
+    """Cheap features of a request; the first is the bias term."""
+    text = " ".join(
+        content
+        for content in (
+            _field(m, "content") for m in messages if _field(m, "role") == "user"
+        )
+        if isinstance(content, str)
+    )
+    return [
+        1.0,
+        math.log1p(len(text)) / math.log(4000),
+        min(len(REASONING_CUES.findall(text)), 3) / 3,
+        1.0 if MATH_CUES.search(text) else 0.0,
+        1.0 if CODE_CUES.search(text) else 0.0,
+        min(text.count("?"), 3) / 3,
+        1.0 if tools else 0.0,
+        min(len(messages), 20) / 20,
+    ]
+
+
+class EscalationClassifier:
+    """
+    Online logistic regression estimating the chance the small model fails.
+
+    Starts from hand-set weights and learns from every small-model attempt.
+    """
+
+    # bias, length, reasoning, math, code, questions, tools, conversation
+    INITIAL_WEIGHTS = [-2.0, 1.5, 2.5, 1.0, 2.0, 0.5, 0.5, 1.0]
+
+    def __init__(self, learning_rate: float = 0.05):
+        self.weights = list(self.INITIAL_WEIGHTS)
+        self.learning_rate = learning_rate
+        self._lock = threading.Lock()
+
+    def predict(self, features: List[float]) -> float:
+        z = sum(w * x for w, x in zip(self.weights, features))
+        return 1 / (1 + math.exp(-z))
+
+    def update(self, features: List[float], escalated: bool) -> None:
+        with self._lock:
+            error = (1.0 if escalated else 0.0) - self.predict(features)
+            self.weights = [
+                w + self.learning_rate * error * x
+                for w, x in zip(self.weights, features)
+            ]
+
+
+def _field(obj: Any, name: str) -> Any:
+    # Messages may be dicts or OpenAI message objects
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def task_key(messages: Sequence[Any]) -> str:
+    """Identifies a task across its calls by its first user message."""
+    for message in messages:
+        if _field(message, "role") == "user":
+            return hashlib.sha256(str(_field(message, "content")).encode()).hexdigest()
+    return ""
+
+
+def rejection_reason(
+    response, tools: Optional[list], min_confidence: float
+) -> Optional[str]:
+    """Why a small-model answer can't be used, or None if it can."""
+    choice = response.choices[0]
+    message = choice.message
+    if choice.finish_reason == "length":
+        return "truncated"
+    if message.tool_calls:
+        offered = {tool["function"]["name"] for tool in tools or []}
+        for call in message.tool_calls:
+            if call.function.name not in offered:
+                return f"unknown tool {call.function.name}"
+            try:
+                json.loads(call.function.arguments or "{}")
+            except json.JSONDecodeError:
+                return "invalid tool arguments"
+        return None
+    if not (message.content or "").strip():
+        return "empty answer"
+
+    logprobs = getattr(getattr(choice, "logprobs", None), "content", None)
+    if logprobs:
+        mean = sum(token.logprob for token in logprobs) / len(logprobs)
+        if math.exp(mean) < min_confidence:
+            return "low confidence"
+    return None
+
+
+class ModelRouter:
+    """
+    Routes chat completions between a small and a large model.
+
+    Args:
+        small: Route tried first for easy queries.
+        large: Route for hard queries and escalations.
+        threshold: Predicted failure chance above which the small model is skipped.
+        min_confidence: Geometric-mean token probability below which a small
+            answer is escalated.
+        explore: Fraction of hard-scored queries still tried on the small
+            model, so the classifier keeps learning where the boundary is.
+        remember: Escalated tasks remembered, least recently escalated
+            forgotten first.
+    """
+
+    def __init__(
+        self,
+        small: Route,
+        large: Route,
+        threshold: float = 0.5,
+        min_confidence: float = 0.5,
+        explore: float = 0.05,
+        remember: int = 1024,
+    ):
+        self.small = small
+        self.large = large
+        self.threshold = threshold
+        self.min_confidence = min_confidence
+        self.explore = explore
+        self.classifier = EscalationClassifier()
+        self.stats = {small.name: RouteStats(), large.name: RouteStats()}
+        self._escalated_tasks: OrderedDict[str, None] = OrderedDict()
+        self._remember = remember
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @classmethod
+    def from_env(cls, large_client: Optional[Any] = None, **kwargs) -> "ModelRouter":
+        """
+        Router over the two OpenTofu deployments, configured like the OSS agent.
+
+        Args:
+            large_client: Client for the large route, e.g. the agent's own
+                ResilientClient; built from LLM_ENDPOINTS / API_ENDPOINT if None.
+            **kwargs: Passed to ModelRouter.
+        """
+        small_client = ResilientClient(
+            endpoints_from_env("SMALL_LLM_ENDPOINTS", "SMALL_API_ENDPOINT")
+        )
+        if large_client is None:
+            large_client = ResilientClient(endpoints_from_env())
+        return cls(
+            Route("small", "Qwen/Qwen3-0.6B", small_client, 0.03),
+            Route("large", "openai/gpt-oss-20b", large_client, 1.0),
+            **kwargs,
+        )
+
+    def create(self, **kwargs) -> Any:
+        messages = kwargs["messages"]
+        tools = kwargs.get("tools")
+        features = query_features(messages, tools)
+        key = task_key(messages)
+
+        with self._lock:
+            escalated_before = key in self._escalated_tasks
+        hard = self.classifier.predict(features) > self.threshold
+        if escalated_before or (hard and random.random() >= self.explore):
+            return self._answer(self.large, kwargs)
+        if kwargs.get("stream"):
+            # A stream can't be judged before it is handed to the caller
+            return self._answer(self.small, kwargs)
+
+        try:
+            response = self._call(self.small, {**kwargs, "logprobs": True})
+            reason = rejection_reason(response, tools, self.min_confidence)
+        except DeadlineExceeded:
+            raise
+        except NoHealthyEndpoint:
+            # The small servers are down, which says nothing about the query
+            return self._answer(self.large, kwargs)
+        except Exception as e:
+            reason = f"{type(e).__name__}: {e}"
+
+        self.classifier.update(features, escalated=reason is not None)
+        if reason is None:
+            with self._lock:
+                self.stats[self.small.name].successes += 1
+            return response
+
+        trace.get_current_span().set_attribute("agent.route.escalation", reason)
+        with self._lock:
+            self.stats[self.small.name].escalations += 1
+            self._escalated_tasks[key] = None
+            if len(self._escalated_tasks) > self._remember:
+                self._escalated_tasks.popitem(last=False)
+        return self._answer(self.large, kwargs)
+
+    def _answer(self, route: Route, kwargs: Dict[str, Any]) -> Any:
+        """Call a route whose answer is final; it isn't judged."""
+        response = self._call(route, kwargs)
+        with self._lock:
+            self.stats[route.name].successes += 1
+        return response
+
+    def _call(self, route: Route, kwargs: Dict[str, Any]) -> Any:
+        stats = self.stats[route.name]
+        with self._lock:
+            stats.requests += 1
+        trace.get_current_span().set_attribute("agent.route", route.name)
+        started = time.perf_counter()
+        try:
+            response = route.client.chat.completions.create(
+                **{**kwargs, "model": route.model}
+            )
+        except Exception:
+            with self._lock:
+                stats.errors += 1
+            raise
+
+        with self._lock:
+            stats.latencies.append(time.perf_counter() - started)
+            if response.usage:
+                stats.prompt_tokens += response.usage.prompt_tokens
+                stats.completion_tokens += response.usage.completion_tokens
+        return response
+
+    def report(self) -> List[Dict[str, Any]]:
+        rows = []
+        for route in (self.small, self.large):
+            stats = self.stats[route.name]
+            p50 = percentile(stats.latencies, 0.5, default=None)
+            tokens = stats.prompt_tokens + stats.completion_tokens
+            rows.append(
+                {
+                    "route": route.name,
+                    "model": route.model,
+                    "requests": stats.requests,
+                    "successes": stats.successes,
+                    "escalations": stats.escalations,
+                    "errors": stats.errors,
+                    "p50_ms": 1000 * p50 if p50 is not None else None,
+                    "tokens": tokens,
+                    "cost": tokens / 1000 * route.cost_per_1k_tokens,
+                }
+            )
+        return rows
+
+    def format_report(self) -> str:
+        lines = [
+            f"{'route':<7} {'model':<20} {'requests':>8} {'ok':>5} {'escalated':>9}"
+            f" {'errors':>6} {'p50':>8} {'tokens':>8} {'cost':>8}"
+        ]
+        for row in self.report():
+            p50 = f"{row['p50_ms']:.0f}ms" if row["p50_ms"] is not None else "-"
+            lines.append(
+                f"{row['route']:<7} {row['model']:<20} {row['requests']:>8}"
+                f" {row['successes']:>5} {row['escalations']:>9} {row['errors']:>6}"
+                f" {p50:>8} {row['tokens']:>8} {row['cost']:>8.2f}"
+            )
+        return "\n".join(lines)
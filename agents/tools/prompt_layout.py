@@ -0,0 +1,168 @@
+"""
+Prefix-cache-friendly prompt layout.
+
+vLLM's automatic prefix caching reuses the KV cache of the longest prompt
+prefix it has already computed, so a request only skips prefill for the
+tokens it shares, from the very first one, with an earlier request. Anything
+that varies per request (an email, the loaded file) must therefore come
+after everything that doesn't (instructions, tool descriptions):
+
+    static instructions + tool schemas     shared by every request
+    conversation context                   shared by one conversation's turns
+    history, then the new user message     grows append-only
+
+    TRIAGE = PromptLayout("email_triage", "As Alfred the butler, ...")
+    messages = TRIAGE.messages(f"From: {sender}\\nSubject: {subject}\\n...")
+
+Each layout fingerprints its static prefix and counts the requests built on
+it; `format_prefix_report()` shows how many of them could be served from the
+prefix cache. The fingerprint is also set on the current span, so traces
+show which requests share a prefix.
+"""
+
+import hashlib
+import json
+import textwrap
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from opentelemetry import trace
+
+# Rough characters per token, for reporting prefix sizes without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class PrefixStats:
+    """
+    Requests built on one static prefix.
+
+    Attributes:
+        layout (str): Name of the layout that built them.
+        fingerprint (str): Hash of the static prefix.
+        prefix_chars (int): Length of the static prefix.
+        requests (int): Requests built on it so far.
+    """
+
+    layout: str
+    fingerprint: str
+    prefix_chars: int
+    requests: int = 0
+
+    @property
+    def shared_requests(self) -> int:
+        """Requests that could reuse the prefix; the first one fills the cache."""
+        return max(0, self.requests - 1)
+
+
+_stats: Dict[str, PrefixStats] = {}
+_stats_lock = threading.Lock()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of prompt parts; dicts hash independently of key order."""
+    digest = hashlib.sha256()
+    for part in parts:
+        text = part if isinstance(part, str) else json.dumps(part, sort_keys=True)
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:12]
+
+
+class PromptLayout:
+    """
+    Builds chat messages for one kind of request, static parts first.
+
+    Attributes:
+        name (str): Reported with the prefix stats.
+        instructions (str): Static system prompt.
+        tools (list): OpenAI tool schemas, in a fixed order; pass them as
+            `tools=layout.tools` on every call, including calls that must not
+            use them (with tool_choice="none"), since the chat template
+            renders them into the prefix.
+        fingerprint (str): Hash of the instructions and tools.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        instructions: str,
+        tools: Optional[Sequence[Dict[str, Any]]] = None,
+    ):
+        self.name = name
+        self.instructions = textwrap.dedent(instructions).strip()
+        self.tools = list(tools) if tools else None
+        self.fingerprint = fingerprint(self.instructions, self.tools or [])
+        self._prefix_chars = len(self.instructions) + len(json.dumps(self.tools or []))
+
+    def messages(
+        self,
+        user: Optional[str] = None,
+        history: Sequence[Any] = (),
+        context: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Lay out one request.
+
+        Args:
+            user: The new, per-request content, sent last.
+            history: Earlier turns of the conversation, oldest first.
+            context: Content fixed for a conversation but not across
+                conversations (e.g. the loaded document), sent right after
+                the static instructions so later turns still share it.
+
+        Returns:
+            OpenAI-style message dicts (LangChain chat models accept them too),
+            followed by the history as given.
+        """
+        self.record()
+        messages: List[Any] = [{"role": "system", "content": self.instructions}]
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.extend(history)
+        if user is not None:
+            messages.append({"role": "user", "content": user})
+        return messages
+
+    def record(self) -> None:
+        """Count one request on this layout's prefix."""
+        with _stats_lock:
+            stats = _stats.get(self.fingerprint)
+            if stats is None:
+                stats = _stats[self.fingerprint] = PrefixStats(
+                    self.name, self.fingerprint, self._prefix_chars
+                )
+            stats.requests += 1
+
+        span = trace.get_current_span()
+        span.set_attribute("agent.prompt.layout", self.name)
+        span.set_attribute("agent.prompt.prefix_fingerprint", self.fingerprint)
+
+
+def prefix_report() -> List[PrefixStats]:
+    """Prefix stats of every layout used in this process, most requests first."""
+    with _stats_lock:
+        return sorted(
+            (PrefixStats(**vars(stats)) for stats in _stats.values()),
+            key=lambda stats: -stats.requests,
+        )
+
+
+def format_prefix_report() -> str:
+    rows = prefix_report()
+    if not rows:
+        return "No prompt layouts used"
+    lines = [
+        f"{'layout':<20} {'prefix':<12} {'~tokens':>8} {'requests':>9} {'shared':>7}"
+    ]
+    for stats in rows:
+        lines.append(
+            f"{stats.layout:<20} {stats.fingerprint:<12}"
+            f" {stats.prefix_chars // CHARS_PER_TOKEN:>8}"
+            f" {stats.requests:>9} {stats.shared_requests:>7}"
+        )
+    total = sum(stats.requests for stats in rows)
+    shared = sum(stats.shared_requests for stats in rows)
+    lines.append(f"{shared}/{total} requests share a cached prefix")
+    return "\n".join(lines)
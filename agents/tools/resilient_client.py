@@ -0,0 +1,394 @@
+"""
+Resilient LLM client: deadlines, hedged requests and circuit breakers.
+
+A synchronous agent loop stalls on one slow or hung request. ResilientClient
+wraps one or more OpenAI-compatible endpoints behind the client's
+`chat.completions.create` and bounds how long any call can take:
+
+- deadlines: every call gets the caller's remaining budget as its timeout.
+  `with deadline(300):` around an agent run covers all the calls inside it;
+  nested deadlines keep the earlier one.
+- hedging: once an endpoint has enough latency samples, a call still running
+  after that endpoint's p95 gets a duplicate on another endpoint (the same
+  one if it is the only one), and the first answer wins. Only ~5% of calls
+  are duplicated, but the slowest ones stop setting the agent's latency.
+- circuit breakers: an endpoint that fails repeatedly is skipped until its
+  cool-down ends; then a single probe request decides whether it closes
+  again or stays open for twice as long.
+- failover: a call that fails on one endpoint is retried on another while
+  the deadline allows.
+
+    client = ResilientClient(["http://10.0.0.5:8000/v1", "http://10.0.0.6:8000/v1"])
+    with deadline(120):
+        response = client.chat.completions.create(model=..., messages=[...])
+
+Test it against local mock servers with injected tail latency and errors:
+`serve_mock_llm(latency=0.05, slow_fraction=0.1, slow_latency=5, error_rate=0.05)`.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Union
+
+from opentelemetry import trace
+
+from latency import percentile
+from telemetry import instrument_openai
+
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's deadline passed before any endpoint answered."""
+
+
+class NoHealthyEndpoint(RuntimeError):
+    """Every endpoint's circuit breaker is open."""
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """Bound every LLM call in the block to finish within `seconds` from now."""
+    current = _deadline.get()
+    at = time.monotonic() + seconds
+    if current is not None:
+        at = min(at, current)
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Closed, open or half-open, per endpoint.
+
+    Attributes:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a probe.
+        max_reset_timeout (float): Cap on the cool-down, which doubles each
+            time a probe fails.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        max_reset_timeout: float = 300.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether acquire() could succeed now; doesn't change state."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() >= self.opened_at + self.reset_timeout
+            return not self._probing
+
+    def acquire(self) -> bool:
+        """Claim the right to send a request; in half-open, only one probe."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() < self.opened_at + self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # The probe failed: stay away for longer
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+                self._open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+            self._probing = False
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+
+class Endpoint:
+    """
+    One OpenAI-compatible server with its breaker and recent latencies.
+
+    Attributes:
+        name (str): Base URL, for stats and spans.
+        client: Client for the server, without retries of its own.
+        breaker (CircuitBreaker): Whether requests may be sent.
+    """
+
+    def __init__(self, name: str, client, breaker: CircuitBreaker, window: int):
+        self.name = name
+        self.client = client
+        self.breaker = breaker
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def quantile(self, q: float) -> Optional[float]:
+        return percentile(self.latencies, q, default=None)
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Failures that say something about the endpoint, not the request."""
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, (openai.APIConnectionError, TimeoutError, OSError))
+
+
+class ResilientClient:
+    """
+    Hedges, times out and fails over chat completions across endpoints.
+
+    Args:
+        endpoints: Base URLs, or ready-made OpenAI-compatible clients.
+        timeout: Per-call budget when the caller set no deadline.
+        hedge_quantile: Latency quantile after which a call is hedged.
+        min_samples: Latency samples an endpoint needs before hedging; until
+            then its p95 is unknown.
+        min_hedge_delay: Never hedge sooner than this, however fast the p95.
+        api_key: API key for clients built from URLs.
+        **breaker_options: Passed to each endpoint's CircuitBreaker.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Union[str, Any]],
+        timeout: float = 120.0,
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+        min_hedge_delay: float = 0.05,
+        window: int = 500,
+        api_key: Optional[str] = None,
+        max_workers: int = 32,
+        **breaker_options,
+    ):
+        self.endpoints: List[Endpoint] = []
+        for endpoint in endpoints:
+            if isinstance(endpoint, str):
+                from openai import OpenAI
+
+                # Hedging and failover replace the client's own retries
+                client = instrument_openai(
+                    OpenAI(
+                        api_key=api_key or os.getenv("LLM_API_KEY", "none"),
+                        base_url=endpoint,
+                        max_retries=0,
+                    )
+                )
+                name = endpoint
+            else:
+                client, name = endpoint, str(getattr(endpoint, "base_url", endpoint))
+            self.endpoints.append(
+                Endpoint(name, client, CircuitBreaker(**breaker_options), window)
+            )
+
+        self.timeout = timeout
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.min_hedge_delay = min_hedge_delay
+        # Losing hedges finish in the background, bounded by their timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "failovers": 0,
+            "deadline_exceeded": 0,
+        }
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs) -> Any:
+        """Same arguments as the OpenAI client's chat.completions.create."""
+        import openai
+
+        self._count("requests")
+        budget = remaining()
+        if budget is None:
+            budget = self.timeout
+        deadline_at = time.monotonic() + budget
+        if budget <= 0:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded("Deadline passed before the request was sent")
+
+        primary = self._pick(set())
+        if primary is None:
+            raise NoHealthyEndpoint("Every endpoint's circuit breaker is open")
+        if kwargs.get("stream"):
+            # A stream is handed over as soon as it starts, so it can't be hedged
+            return self._attempt(primary, kwargs, deadline_at)
+
+        used = {primary.name}
+        pending: Dict[Future, Endpoint] = {
+            self._submit(primary, kwargs, deadline_at): primary
+        }
+        hedge_at = self._hedge_at(primary)
+        hedged = False
+        hedge: Optional[Future] = None
+        errors: List[BaseException] = []
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline_at:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded(f"No answer within {budget:.1f}s") from (
+                    errors[-1] if errors else None
+                )
+
+            wait_until = deadline_at
+            if not hedged and hedge_at is not None:
+                wait_until = min(wait_until, hedge_at)
+            done, _ = wait(
+                pending, timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    if not is_endpoint_failure(e):
+                        # Another endpoint would reject the same request
+                        raise
+                    errors.append(e)
+                    continue
+                if future is hedge:
+                    self._count("hedge_wins")
+                return response
+
+            if not pending:
+                # Everything sent so far failed: fail over while time remains
+                backup = self._pick(used)
+                if backup is None:
+                    if isinstance(errors[-1], (openai.APITimeoutError, TimeoutError)):
+                        # Attempts time out at the deadline
+                        self._count("deadline_exceeded")
+                        raise DeadlineExceeded(
+                            f"No answer within {budget:.1f}s"
+                        ) from errors[-1]
+                    raise errors[-1]
+                self._count("failovers")
+                used.add(backup.name)
+                pending[self._submit(backup, kwargs, deadline_at)] = backup
+            elif not hedged and hedge_at is not None and time.monotonic() >= hedge_at:
+                hedged = True
+                backup = self._pick(used)
+                if backup is None and len(self.endpoints) == 1:
+                    # A single endpoint still gets the duplicate, on a new connection
+                    backup = self._pick(set())
+                if backup is not None:
+                    self._count("hedges")
+                    trace.get_current_span().set_attribute("agent.llm.hedged", True)
+                    used.add(backup.name)
+                    hedge = self._submit(backup, kwargs, deadline_at)
+                    pending[hedge] = backup
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedging counters, and each endpoint's breaker state and latency."""
+        with self._lock:
+            counters = dict(self.counters)
+        counters["endpoints"] = [
+            {
+                "endpoint": endpoint.name,
+                "state": endpoint.breaker.state,
+                "times_opened": endpoint.breaker.times_opened,
+                "p50_ms": _ms(endpoint.quantile(0.5)),
+                "p95_ms": _ms(endpoint.quantile(self.hedge_quantile)),
+            }
+            for endpoint in self.endpoints
+        ]
+        return counters
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _pick(self, exclude: set) -> Optional[Endpoint]:
+        """The fastest endpoint whose breaker lets a request through."""
+        candidates = [
+            e for e in self.endpoints if e.name not in exclude and e.breaker.available()
+        ]
+        # Measured endpoints by p50, then unmeasured ones in the order given;
+        # those get their samples as hedges and failovers
+        candidates.sort(key=lambda e: (e.quantile(0.5) is None, e.quantile(0.5) or 0.0))
+        for endpoint in candidates:
+            if endpoint.breaker.acquire():
+                return endpoint
+        return None
+
+    def _hedge_at(self, endpoint: Endpoint) -> Optional[float]:
+        if len(endpoint.latencies) < self.min_samples:
+            return None
+        delay = max(self.min_hedge_delay, endpoint.quantile(self.hedge_quantile))
+        return time.monotonic() + delay
+
+    def _submit(self, endpoint: Endpoint, kwargs, deadline_at: float) -> Future:
+        # Run in the caller's context, so spans nest under its current span
+        context = copy_context()
+        return self._executor.submit(
+            context.run, self._attempt, endpoint, kwargs, deadline_at
+        )
+
+    def _attempt(self, endpoint: Endpoint, kwargs, deadline_at: float) -> Any:
+        started = time.monotonic()
+        try:
+            response = endpoint.client.chat.completions.create(
+                **kwargs, timeout=max(0.001, deadline_at - started)
+            )
+        except Exception as e:
+            if is_endpoint_failure(e):
+                endpoint.breaker.failure()
+            else:
+                endpoint.breaker.success()
+            raise
+        endpoint.breaker.success()
+        endpoint.latencies.append(time.monotonic() - started)
+        return response
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(1000 * seconds, 1)
@@ -0,0 +1,75 @@
+"""
+smolagents tools over the cached, de-duplicated WebSearcher.
+
+    tools=[*search_tools(), ...]   # web_search and web_search_batch
+
+Both tools share one SearchSession, so a URL whose snippet one of them
+already returned is listed in one line by the other, unless it comes up for
+a query the run asked before. Create the tools per agent run (or call
+`session.reset()`) to start de-duplication afresh.
+"""
+
+from typing import List, Optional
+
+from smolagents import Tool
+
+from web_search import SearchSession, WebSearcher
+
+
+class CachedSearchTool(Tool):
+    """Drop-in replacement for smolagents' DuckDuckGoSearchTool."""
+
+    name = "web_search"
+    description = (
+        "Performs a duckduckgo web search based on your query (think a Google "
+        "search) then returns the top search results."
+    )
+    inputs = {
+        "query": {"type": "string", "description": "The search query to perform."}
+    }
+    output_type = "string"
+
+    def __init__(self, session: Optional[SearchSession] = None):
+        super().__init__()
+        self.session = session or WebSearcher().session()
+
+    def forward(self, query: str) -> str:
+        return self.session.search(query)
+
+
+class BatchSearchTool(Tool):
+    """Several web searches in one tool call, run concurrently."""
+
+    name = "web_search_batch"
+    description = (
+        "Performs several duckduckgo web searches at once and returns the top "
+        "results of each. Prefer this over repeated web_search calls when you "
+        "have more than one query. Pages already returned by an earlier search "
+        "are listed without their snippet; repeat a query to see them again."
+    )
+    inputs = {
+        "queries": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "The search queries to perform.",
+        }
+    }
+    output_type = "string"
+
+    def __init__(self, session: Optional[SearchSession] = None):
+        super().__init__()
+        self.session = session or WebSearcher().session()
+
+    def forward(self, queries: List[str]) -> str:
+        return self.session.search_many(queries)
+
+
+def search_tools(
+    searcher: Optional[WebSearcher] = None, dedup: bool = True
+) -> List[Tool]:
+    """
+    A web_search and a web_search_batch tool sharing one session; pass
+    `dedup=False` when the tools serve many unrelated runs.
+    """
+    session = (searcher or WebSearcher()).session(dedup)
+    return [CachedSearchTool(session), BatchSearchTool(session)]
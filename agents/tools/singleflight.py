@@ -0,0 +1,206 @@
+"""
+Singleflight de-duplication for tool calls.
+
+When several agent sessions (or one agent's parallel tool calls) ask the
+same tool the same thing at the same moment, only the first call runs; the
+others wait for it and share its result or exception. Nothing is cached: a
+call that arrives after the first one finished runs again.
+
+    @singleflight
+    def wikipedia_search(query: str) -> list: ...
+
+    @singleflight(name="guest_info_retriever")
+    async def aextract_text(query: str) -> str: ...
+
+    search = singleflight_tool(DuckDuckGoSearchTool())   # smolagents Tool
+
+Calls are identical when they go to the same tool with the same normalized
+arguments: strings are stripped and their whitespace collapsed, and keyword
+order doesn't matter. Pass `normalize` for tool-specific rules (e.g. case-
+insensitive search queries). Threads and asyncio are both supported;
+`format_singleflight_report()` shows how many calls each tool collapsed.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_value(value: Any) -> Any:
+    """Default argument normalization: tidy whitespace in strings, recursively."""
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip()
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    return value
+
+
+def call_key(
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    normalize: Callable[[Any], Any] = normalize_value,
+) -> str:
+    return json.dumps(
+        [normalize(list(args)), normalize(kwargs)], sort_keys=True, default=str
+    )
+
+
+class _Call:
+    """One in-flight threaded execution and the threads waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    In-flight calls of one tool, keyed by normalized arguments.
+
+    Attributes:
+        name (str): Tool name, for the report.
+        calls (int): Calls made.
+        executions (int): Calls that actually ran the tool.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self._threaded: Dict[str, _Call] = {}
+        self._async: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def collapsed(self) -> int:
+        """Calls that were served by another call's execution."""
+        return self.calls - self.executions
+
+    def do(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """Run `func` once for all threads calling with the same key."""
+        with self._lock:
+            self.calls += 1
+            call = self._threaded.get(key)
+            leader = call is None
+            if leader:
+                call = self._threaded[key] = _Call()
+                self.executions += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._threaded[key]
+            call.done.set()
+
+    async def ado(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """Await `func` once for all coroutines on this loop calling with the same key."""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self.calls += 1
+            task = self._async.get(flight_key)
+            if task is None:
+                self.executions += 1
+                task = self._async[flight_key] = loop.create_task(func(*args, **kwargs))
+                task.add_done_callback(lambda _: self._forget(flight_key))
+        # Shielded, so a cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, flight_key: Tuple[int, str]) -> None:
+        with self._lock:
+            self._async.pop(flight_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tool": self.name,
+                "calls": self.calls,
+                "executions": self.executions,
+                "collapsed": self.calls - self.executions,
+            }
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """The process-wide SingleFlight of a tool, so all its wrappers share it."""
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def singleflight(
+    func: Callable = None,
+    *,
+    name: Optional[str] = None,
+    normalize: Callable[[Any], Any] = normalize_value,
+) -> Callable:
+    """Decorator collapsing concurrent identical calls of a sync or async function."""
+    if func is None:
+        return functools.partial(singleflight, name=name, normalize=normalize)
+    flight = get_flight(name or func.__name__)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = call_key(args, kwargs, normalize)
+            return await flight.ado(key, func, *args, **kwargs)
+
+        async_wrapper.flight = flight
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return flight.do(call_key(args, kwargs, normalize), func, *args, **kwargs)
+
+    wrapper.flight = flight
+    return wrapper
+
+
+def singleflight_tool(tool, normalize: Callable[[Any], Any] = normalize_value):
+    """Collapse concurrent identical calls of a smolagents Tool; returns the tool."""
+    tool.forward = singleflight(tool.forward, name=tool.name, normalize=normalize)
+    return tool
+
+
+def singleflight_report() -> List[Dict[str, Any]]:
+    with _flights_lock:
+        flights = list(_flights.values())
+    return [flight.stats() for flight in flights]
+
+
+def format_singleflight_report() -> str:
+    rows = singleflight_report()
+    if not rows:
+        return "No singleflight tools used"
+    lines = [f"{'tool':<28} {'calls':>7} {'executions':>10} {'collapsed':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['tool']:<28} {row['calls']:>7} {row['executions']:>10}"
+            f" {row['collapsed']:>9}"
+        )
+    return "\n".join(lines)
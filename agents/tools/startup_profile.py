@@ -0,0 +1,137 @@
+"""
+Startup-time profile for the agent entry points.
+
+Imports each entry module in a fresh interpreter under `python -X importtime`
+(nothing under `if __name__ == "__main__":` runs) and reports the wall-clock
+startup time plus the slowest imports, flagging entry points over budget.
+
+Usage:
+    python agents/tools/startup_profile.py
+    python agents/tools/startup_profile.py agents/oss_agent/main.py --top 15
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+ENTRY_POINTS = [
+    "agents/oss_agent/main.py",
+    "agents/course/agentic_rag/main.py",
+    "agents/course/agentic_rag/serve.py",
+    "agents/course/langgraph/docs.py",
+    "agents/course/langgraph/spam.py",
+    "agents/course/llamaindex/main.py",
+    "agents/course/smolagent/party_planner/main.py",
+    "agents/course/smolagent/multi_agent/first_agent.py",
+    "agents/course/smolagent/multi_agent/multi_agent.py",
+]
+
+STARTUP_BUDGET_SECONDS = 1.0
+
+# "import time:       512 |       2048 |   package.module"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+@dataclass
+class StartupProfile:
+    """
+    Startup timings for one entry point.
+
+    Attributes:
+        entry_point (str): Path of the profiled script, relative to the repo.
+        wall_seconds (float): Time for the interpreter to start and import it.
+        imports (list): (module, self us, cumulative us, depth) per import.
+        error (str): Last line of stderr if the import failed.
+    """
+
+    entry_point: str
+    wall_seconds: float
+    imports: List[Tuple[str, int, int, int]] = field(default_factory=list)
+    error: str = ""
+
+    def slowest(self, n: int, top_level_only: bool = True) -> List[Tuple[str, int]]:
+        rows = [
+            (module, cumulative)
+            for module, _, cumulative, depth in self.imports
+            if depth == 0 or not top_level_only
+        ]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:n]
+
+
+def profile_entry_point(
+    entry_point: str, python: str = sys.executable
+) -> StartupProfile:
+    """Import one entry module under -X importtime and parse the timings."""
+    path = os.path.join(REPO_ROOT, entry_point)
+    directory, filename = os.path.split(path)
+    module = os.path.splitext(filename)[0]
+
+    # Run from the script's own directory so sibling imports resolve the same
+    # way they do when the agent is launched normally
+    code = f"import sys; sys.path.insert(0, {directory!r}); import {module}"
+    started = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    )
+    profile = StartupProfile(entry_point, time.perf_counter() - started)
+
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            depth = (len(indent) - 1) // 2
+            profile.imports.append((name, int(self_us), int(cumulative_us), depth))
+
+    if result.returncode != 0:
+        errors = [
+            line
+            for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        ]
+        profile.error = errors[-1] if errors else f"exit code {result.returncode}"
+    return profile
+
+
+def print_report(profiles: List[StartupProfile], top: int, budget: float) -> None:
+    for profile in profiles:
+        status = "OK" if profile.wall_seconds <= budget else "OVER BUDGET"
+        if profile.error:
+            status = f"FAILED ({profile.error})"
+        print(f"\n{profile.entry_point}: {profile.wall_seconds:.2f}s [{status}]")
+        for module, cumulative_us in profile.slowest(top):
+            print(f"  {cumulative_us / 1e6:8.3f}s  {module}")
+
+    print("\nSummary:")
+    for profile in sorted(profiles, key=lambda p: p.wall_seconds, reverse=True):
+        marker = "!" if profile.wall_seconds > budget or profile.error else " "
+        print(f" {marker} {profile.wall_seconds:6.2f}s  {profile.entry_point}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile agent startup time")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to show")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS)
+    parser.add_argument("--python", default=sys.executable)
+    args = parser.parse_args()
+
+    profiles = [profile_entry_point(e, args.python) for e in args.entry_points]
+    print_report(profiles, args.top, args.budget)
+
+    # Non-zero exit lets CI fail on startup regressions
+    over = [p for p in profiles if p.error or p.wall_seconds > args.budget]
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Shared OpenTelemetry instrumentation for the agents.
+
+Records a span for every LLM and tool call, with prompt/completion tokens,
+time to first token, total latency and retry counts, using the OpenTelemetry
+GenAI attribute names where they exist:
+
+    configure_telemetry("oss_agent")
+    client = instrument_openai(OpenAI(...))
+
+    with agent_span("oss_agent"):
+        response = client.chat.completions.create(...)
+        with tool_span("wikipedia_search", {"query": "Ada Lovelace"}):
+            ...
+
+Export is configured from the environment, so production can turn it on
+without code changes:
+
+    AGENT_TELEMETRY               otlp, file, console or off (default off)
+    AGENT_TELEMETRY_FILE          JSON lines output for "file" (default agent-spans.jsonl)
+    AGENT_TELEMETRY_SAMPLE_RATIO  fraction of traces kept, 0.0-1.0 (default 1.0)
+    OTEL_EXPORTER_OTLP_ENDPOINT   the standard OTLP settings apply to "otlp"
+
+Sampling is decided once per trace at its root span, so a kept trace keeps
+all of its LLM and tool spans. With telemetry off, spans are the API's
+no-op spans.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from opentelemetry import trace
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "agents.telemetry"
+
+
+@functools.cache
+def configure_telemetry(
+    service_name: str,
+    exporter: Optional[str] = None,
+    sample_ratio: Optional[float] = None,
+    path: Optional[str] = None,
+) -> bool:
+    """
+    Install the global tracer provider, once per process.
+
+    Args:
+        service_name: Reported as the OpenTelemetry service.name.
+        exporter: "otlp", "file", "console" or "off"; defaults to AGENT_TELEMETRY.
+        sample_ratio: Fraction of traces to keep; defaults to AGENT_TELEMETRY_SAMPLE_RATIO.
+        path: Output file for the "file" exporter; defaults to AGENT_TELEMETRY_FILE.
+
+    Returns:
+        True if spans are being exported.
+    """
+    exporter = (exporter or os.getenv("AGENT_TELEMETRY", "off")).lower()
+    if exporter in ("", "off", "none"):
+        return False
+
+    # The SDK and exporters are only imported when telemetry is turned on
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if sample_ratio is None:
+        sample_ratio = float(os.getenv("AGENT_TELEMETRY_SAMPLE_RATIO", "1.0"))
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    elif exporter == "file":
+        out = open(path or os.getenv("AGENT_TELEMETRY_FILE", "agent-spans.jsonl"), "a")
+        file_exporter = ConsoleSpanExporter(
+            out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+        provider.add_span_processor(BatchSpanProcessor(file_exporter))
+    elif exporter == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    else:
+        raise ValueError(f"Unknown telemetry exporter {exporter!r}")
+
+    trace.set_tracer_provider(provider)
+    logger.info(
+        "Exporting %s spans via %s at ratio %s", service_name, exporter, sample_ratio
+    )
+    return True
+
+
+def get_tracer() -> trace.Tracer:
+    return trace.get_tracer(TRACER_NAME)
+
+
+@contextmanager
+def agent_span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Root span for one agent run, so its LLM and tool calls form one trace and
+    are sampled together. Also usable as a decorator.
+    """
+    with get_tracer().start_as_current_span(
+        f"invoke_agent {name}",
+        attributes={
+            "gen_ai.operation.name": "invoke_agent",
+            "gen_ai.agent.name": name,
+            **attributes,
+        },
+    ) as span:
+        yield span
+
+
+class CallRecorder:
+    """
+    Collects timings and counts for one LLM or tool call and writes them to
+    its span when the call ends.
+
+    Attributes:
+        span (Span): The call's span.
+        started (float): perf_counter() when the call started.
+        first_token_at (float): perf_counter() of the first streamed token.
+        retries (int): Retries taken before the call succeeded or gave up.
+    """
+
+    def __init__(self, span: Span, kind: str):
+        self.span = span
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.retries = 0
+
+    def first_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.span.set_attribute(
+                "agent.llm.ttft_ms", 1000 * (self.first_token_at - self.started)
+            )
+
+    def usage(
+        self, prompt_tokens: Optional[int], completion_tokens: Optional[int]
+    ) -> None:
+        if prompt_tokens is not None:
+            self.span.set_attribute("gen_ai.usage.input_tokens", prompt_tokens)
+        if completion_tokens is not None:
+            self.span.set_attribute("gen_ai.usage.output_tokens", completion_tokens)
+
+    def message_usage(self, message: Any) -> None:
+        """Token counts from a LangChain message's usage_metadata, if it has any."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        self.usage(usage.get("input_tokens"), usage.get("output_tokens"))
+
+    def retried(self, count: int = 1) -> None:
+        self.retries += count
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        latency_ms = 1000 * (time.perf_counter() - self.started)
+        self.span.set_attribute(f"agent.{self.kind}.latency_ms", latency_ms)
+        self.span.set_attribute(f"agent.{self.kind}.retries", self.retries)
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(Status(StatusCode.ERROR, str(error)))
+        self.span.end()
+
+
+def _activate(span: Span):
+    # CallRecorder.end() records errors and ends the span itself
+    return trace.use_span(
+        span, end_on_exit=False, record_exception=False, set_status_on_exception=False
+    )
+
+
+def start_llm_call(model: str, system: str = "openai", **attributes) -> CallRecorder:
+    """Start an LLM call span as a child of the current span; call .end() when done."""
+    span = get_tracer().start_span(
+        f"chat {model}",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "gen_ai.operation.name": "chat",
+            "gen_ai.system": system,
+            "gen_ai.request.model": model,
+            **attributes,
+        },
+    )
+    return CallRecorder(span, "llm")
+
+
+@contextmanager
+def llm_span(
+    model: str, system: str = "openai", **attributes
+) -> Iterator[CallRecorder]:
+    """Record one non-streaming LLM call."""
+    call = start_llm_call(model, system, **attributes)
+    with _activate(call.span):
+        try:
+            yield call
+        except BaseException as e:
+            call.end(e)
+            raise
+    call.end()
+
+
+@contextmanager
+def tool_span(
+    name: str, arguments: Optional[Dict[str, Any]] = None
+) -> Iterator[CallRecorder]:
+    """Record one tool call."""
+    attributes = {"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": name}
+    if arguments is not None:
+        attributes["agent.tool.arguments"] = json.dumps(arguments, default=str)
+    span = get_tracer().start_span(f"execute_tool {name}", attributes=attributes)
+    call = CallRecorder(span, "tool")
+    with _activate(span):
+        try:
+            yield call
+        except BaseException as e:
+            call.end(e)
+            raise
+    call.end()
+
+
+def traced_tool(func: Callable = None, *, name: Optional[str] = None) -> Callable:
+    """Decorator recording a tool_span around every call of a sync or async function."""
+    if func is None:
+        return functools.partial(traced_tool, name=name)
+    tool_name = name or func.__name__
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with tool_span(tool_name, kwargs or None):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with tool_span(tool_name, kwargs or None):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_span(
+    name: str,
+    start_ns: int,
+    end_ns: int,
+    attributes: Optional[Dict[str, Any]] = None,
+    kind: SpanKind = SpanKind.INTERNAL,
+    error: Optional[str] = None,
+) -> None:
+    """Export an interval that was timed elsewhere, as a child of the current span."""
+    span = get_tracer().start_span(
+        name, kind=kind, attributes=attributes or {}, start_time=start_ns
+    )
+    if error is not None:
+        span.set_status(Status(StatusCode.ERROR, error))
+    span.end(end_time=end_ns)
+
+
+class TracedStream:
+    """
+    Wraps an OpenAI chat completion stream, stamping the first token and the
+    final usage chunk onto the call's span, which ends with the stream.
+    """
+
+    def __init__(self, stream, call: CallRecorder):
+        self._stream = stream
+        self._call = call
+        self._ended = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._end()
+            raise
+        except BaseException as e:
+            self._end(e)
+            raise
+
+        if chunk.choices and (
+            chunk.choices[0].delta.content or chunk.choices[0].delta.tool_calls
+        ):
+            self._call.first_token()
+        if getattr(chunk, "usage", None):
+            self._call.usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+        return chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self._stream.close()
+        self._end()
+
+    def _end(self, error: Optional[BaseException] = None) -> None:
+        if not self._ended:
+            self._ended = True
+            self._call.end(error)
+
+
+def instrument_openai(client, system: str = "openai"):
+    """
+    Record a span for every `client.chat.completions.create` call.
+
+    Retries come from the client's own retry loop; streams are wrapped so
+    their span covers the whole stream and records time to first token.
+    """
+    completions = client.chat.completions
+    if getattr(completions, "_telemetry_instrumented", False):
+        return client
+    raw_create = completions.with_raw_response.create
+
+    @functools.wraps(completions.create)
+    def create(*args, **kwargs):
+        call = start_llm_call(kwargs.get("model", "unknown"), system)
+        try:
+            with _activate(call.span):
+                raw = raw_create(*args, **kwargs)
+            call.retried(raw.retries_taken)
+            response = raw.parse()
+        except BaseException as e:
+            call.end(e)
+            raise
+
+        if kwargs.get("stream"):
+            return TracedStream(response, call)
+
+        call.span.set_attribute("gen_ai.response.model", response.model)
+        if response.usage:
+            call.usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        call.end()
+        return response
+
+    completions.create = create
+    completions._telemetry_instrumented = True
+    return client
@@ -0,0 +1,423 @@
+"""
+Adaptive request dispatcher for self-hosted vLLM endpoints.
+
+vLLM batches every request it has in flight into each forward pass
+(continuous batching), so throughput grows with concurrency until the GPU is
+saturated; past that point only latency grows. An agent that sends one
+request at a time and blocks on it leaves most of that throughput unused.
+
+BatchingDispatcher takes chat completion requests from any number of agent
+coroutines and keeps a target number of them in flight per endpoint. Each
+endpoint's target follows AIMD, like TCP congestion control:
+
+- additive increase: +1 per window of requests that met the latency SLO,
+  while requests are queueing (a larger window would actually be used)
+- multiplicative decrease: x0.7 when a request misses the SLO or the server
+  pushes back (429, 503, timeout), at most once per window
+
+    dispatcher = BatchingDispatcher(["http://10.0.0.5:8000/v1", "http://10.0.0.6:8000/v1"])
+    response = await dispatcher.create(model="openai/gpt-oss-20b", messages=[...])
+
+`dispatcher.chat.completions.create` is the same call, so the dispatcher can
+stand in for an AsyncOpenAI client. Threaded code uses SyncDispatcher, which
+runs the dispatcher on a background event loop.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Sequence, Union
+
+from latency import percentile
+from telemetry import CallRecorder, start_llm_call
+
+# Server responses that mean "too much load", as opposed to a bad request
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+def endpoints_from_env(
+    urls_variable: str = "LLM_ENDPOINTS", host_variable: str = "API_ENDPOINT"
+) -> List[str]:
+    """
+    vLLM base URLs from LLM_ENDPOINTS (comma separated), else the single
+    server at API_ENDPOINT that the OSS agent uses. Other deployments pass
+    their own pair of variables.
+    """
+    urls = os.getenv(urls_variable)
+    if urls:
+        return [url.strip() for url in urls.split(",") if url.strip()]
+    return [f"http://{os.getenv(host_variable)}:8000/v1"]
+
+
+class AIMDLimiter:
+    """
+    Concurrency target for one endpoint.
+
+    A request is slow if it took longer than `latency_slo` seconds, or more
+    than `tpot_slo` seconds per completion token (time per output token is
+    what a too-large batch degrades first, and it doesn't depend on how long
+    the answer is). Streams measure it after the first token. Other requests
+    only have the whole latency, prefill and queueing included, so their
+    TPOT is only judged from `tpot_min_tokens` tokens on: a short reply to a
+    long prompt, like a tool call, would otherwise always look slow.
+
+    Attributes:
+        limit (float): Current target; `target` is its integer part.
+        minimum (int): The target never drops below this.
+        maximum (int): The target never grows past this, e.g. vLLM's --max-num-seqs.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 256,
+        latency_slo: Optional[float] = None,
+        tpot_slo: Optional[float] = 0.1,
+        tpot_min_tokens: int = 64,
+        backoff: float = 0.7,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_slo = latency_slo
+        self.tpot_slo = tpot_slo
+        self.tpot_min_tokens = tpot_min_tokens
+        self.backoff = backoff
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+
+    @property
+    def target(self) -> int:
+        return int(self.limit)
+
+    def is_slow(
+        self,
+        latency: float,
+        completion_tokens: Optional[int],
+        decode_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Whether a request missed the SLO; `decode_seconds` is the time from
+        its first token to its last, when it was streamed.
+        """
+        if self.latency_slo is not None and latency > self.latency_slo:
+            return True
+        if self.tpot_slo is None or not completion_tokens:
+            return False
+        if decode_seconds is not None and completion_tokens > 1:
+            return decode_seconds / (completion_tokens - 1) > self.tpot_slo
+        if completion_tokens >= self.tpot_min_tokens:
+            return latency / completion_tokens > self.tpot_slo
+        return False
+
+    def completed(
+        self,
+        started: float,
+        latency: float,
+        completion_tokens: Optional[int],
+        queued: int,
+        decode_seconds: Optional[float] = None,
+    ) -> None:
+        """Adjust the target after a successful request."""
+        if self.is_slow(latency, completion_tokens, decode_seconds):
+            self.overloaded(started)
+        elif queued and self.limit < self.maximum:
+            # +1/limit per request adds up to +1 per full window
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.increases += 1
+
+    def overloaded(self, started: float) -> None:
+        """Back off, unless this request was sent before the last back-off."""
+        # Requests already in flight when we backed off saw the old load;
+        # reacting to each of them would collapse the window
+        if started < self._last_decrease:
+            return
+        self.limit = max(float(self.minimum), self.limit * self.backoff)
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+
+
+class Endpoint:
+    """
+    One vLLM server and its share of the dispatcher's requests.
+
+    Attributes:
+        name (str): Base URL, for logs and spans.
+        client: AsyncOpenAI client (or anything with the same
+            `chat.completions.create`).
+        limiter (AIMDLimiter): This endpoint's concurrency target.
+        in_flight (int): Requests currently sent and not yet finished.
+    """
+
+    def __init__(self, name: str, client, limiter: AIMDLimiter):
+        self.name = name
+        self.client = client
+        self.limiter = limiter
+        self.in_flight = 0
+        self.completed = 0
+        self.errors = 0
+        self.latencies: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def headroom(self) -> int:
+        return self.limiter.target - self.in_flight
+
+
+class BatchingDispatcher:
+    """
+    Spreads chat completions over vLLM endpoints, keeping each one's AIMD
+    target of requests in flight and queueing the rest in arrival order.
+
+    Args:
+        endpoints: Base URLs, or ready-made async clients.
+        api_key: API key for clients built from URLs.
+        timeout: Per-request timeout of clients built from URLs.
+        **limiter_options: Passed to each endpoint's AIMDLimiter.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[Sequence[Union[str, Any]]] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 300.0,
+        **limiter_options,
+    ):
+        self.endpoints: List[Endpoint] = []
+        for endpoint in endpoints or endpoints_from_env():
+            if isinstance(endpoint, str):
+                from openai import AsyncOpenAI
+
+                # The dispatcher backs off on overload itself; a client retry
+                # loop would hide that signal and add load at the worst time
+                client = AsyncOpenAI(
+                    api_key=api_key or os.getenv("LLM_API_KEY", "none"),
+                    base_url=endpoint,
+                    max_retries=0,
+                    timeout=timeout,
+                )
+                name = endpoint
+            else:
+                client, name = endpoint, str(getattr(endpoint, "base_url", endpoint))
+            self.endpoints.append(
+                Endpoint(name, client, AIMDLimiter(**limiter_options))
+            )
+
+        self.queued = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs) -> Any:
+        """
+        Send one chat completion (same arguments as the OpenAI client) once an
+        endpoint has room. Streams hold their slot until fully consumed.
+        """
+        enqueued = time.monotonic()
+        endpoint = await self._acquire()
+        started = time.monotonic()
+        call = start_llm_call(
+            kwargs.get("model", "unknown"),
+            **{
+                "agent.dispatch.endpoint": endpoint.name,
+                "agent.dispatch.queue_ms": 1000 * (started - enqueued),
+                "agent.dispatch.target": endpoint.limiter.target,
+            },
+        )
+        try:
+            response = await endpoint.client.chat.completions.create(**kwargs)
+        except BaseException as e:
+            call.end(e)
+            await self._finish(endpoint, started, error=e)
+            raise
+
+        if kwargs.get("stream"):
+            return DispatchedStream(self, endpoint, started, response, call)
+
+        usage = getattr(response, "usage", None)
+        completion_tokens = usage.completion_tokens if usage else None
+        if usage:
+            call.usage(usage.prompt_tokens, completion_tokens)
+        call.end()
+        await self._finish(endpoint, started, completion_tokens)
+        return response
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-endpoint target, load and latency, for logs and dashboards."""
+        rows = []
+        for endpoint in self.endpoints:
+            p50 = percentile(endpoint.latencies, 0.5, default=None)
+            rows.append(
+                {
+                    "endpoint": endpoint.name,
+                    "target": endpoint.limiter.target,
+                    "in_flight": endpoint.in_flight,
+                    "completed": endpoint.completed,
+                    "errors": endpoint.errors,
+                    "increases": endpoint.limiter.increases,
+                    "decreases": endpoint.limiter.decreases,
+                    "p50_ms": 1000 * p50 if p50 is not None else None,
+                }
+            )
+        return rows
+
+    async def _acquire(self) -> Endpoint:
+        if self._condition is None:
+            # Created here so it binds to the loop the agents run on
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            self.queued += 1
+            try:
+                while True:
+                    endpoint = max(self.endpoints, key=lambda e: e.headroom)
+                    if endpoint.headroom > 0:
+                        break
+                    await self._condition.wait()
+            finally:
+                self.queued -= 1
+            endpoint.in_flight += 1
+            return endpoint
+
+    async def _finish(
+        self,
+        endpoint: Endpoint,
+        started: float,
+        completion_tokens: Optional[int] = None,
+        error: Optional[BaseException] = None,
+        first_token_at: Optional[float] = None,
+    ) -> None:
+        finished = time.monotonic()
+        latency = finished - started
+        decode_seconds = None if first_token_at is None else finished - first_token_at
+        async with self._condition:
+            endpoint.in_flight -= 1
+            if error is None:
+                endpoint.completed += 1
+                endpoint.latencies.append(latency)
+                endpoint.limiter.completed(
+                    started, latency, completion_tokens, self.queued, decode_seconds
+                )
+            else:
+                endpoint.errors += 1
+                if is_overload(error):
+                    endpoint.limiter.overloaded(started)
+            # The target may have grown by more than the slot just freed
+            self._condition.notify_all()
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether an error means the server is overloaded rather than the request bad."""
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return True
+    return (
+        isinstance(error, openai.APIStatusError)
+        and error.status_code in OVERLOAD_STATUS_CODES
+    )
+
+
+class DispatchedStream:
+    """
+    Async chat completion stream that holds its endpoint slot until it ends,
+    counting content chunks as completion tokens and timing them from the
+    first one, for the SLO.
+    """
+
+    def __init__(
+        self,
+        dispatcher: BatchingDispatcher,
+        endpoint: Endpoint,
+        started: float,
+        stream,
+        call: CallRecorder,
+    ):
+        self._dispatcher = dispatcher
+        self._endpoint = endpoint
+        self._started = started
+        self._stream = stream
+        self._call = call
+        self._tokens = 0
+        self._usage_tokens: Optional[int] = None
+        self._first_token_at: Optional[float] = None
+        self._finished = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            await self._finish()
+            raise
+        except BaseException as e:
+            await self._finish(e)
+            raise
+
+        if chunk.choices and self._first_token_at is None:
+            # Content or a tool call: either way, prefill is over
+            self._first_token_at = time.monotonic()
+        if chunk.choices and chunk.choices[0].delta.content:
+            self._call.first_token()
+            self._tokens += 1
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            self._usage_tokens = usage.completion_tokens
+            self._call.usage(usage.prompt_tokens, usage.completion_tokens)
+        return chunk
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        await self._stream.close()
+        await self._finish()
+
+    async def _finish(self, error: Optional[BaseException] = None) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self._call.end(error)
+        tokens = self._usage_tokens or self._tokens or None
+        await self._dispatcher._finish(
+            self._endpoint, self._started, tokens, error, self._first_token_at
+        )
+
+
+class SyncDispatcher:
+    """
+    Blocking front end for threaded agents: runs a BatchingDispatcher on a
+    background event loop, so requests from every thread share its targets.
+    Streaming isn't supported here.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.dispatcher = BatchingDispatcher(*args, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="vllm-dispatch", daemon=True
+        )
+        self._thread.start()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs) -> Any:
+        if kwargs.get("stream"):
+            raise ValueError("SyncDispatcher doesn't support streaming")
+        future = asyncio.run_coroutine_threadsafe(
+            self.dispatcher.create(**kwargs), self._loop
+        )
+        return future.result()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return self.dispatcher.stats()
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
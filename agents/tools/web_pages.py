@@ -0,0 +1,465 @@
+"""
+Cached, size-bounded webpage fetching for browsing agents.
+
+smolagents' VisitWebpageTool downloads the whole page on every visit,
+converts all of it to markdown and hands up to 40k characters of it to the
+model. An agent told to confirm each data point at its source visits the
+same few pages again and again. WebPageFetcher instead:
+
+- reuses connections through one pooled HTTP client
+- keeps the extracted text of each page in an on-disk cache, serves it
+  while fresh and revalidates it afterwards with If-None-Match /
+  If-Modified-Since, so an unchanged page costs a 304 and no extraction
+- converts HTML to markdown while it streams, skipping scripts, styles and
+  navigation, and stops downloading once the text budget is reached
+- optionally keeps only the passages that best match a query, so a visit to
+  confirm one number returns the paragraphs mentioning it, not the page
+
+    fetcher = WebPageFetcher()
+    page = fetcher.fetch("https://en.wikipedia.org/wiki/Gotham_City")
+    text = fetcher.read(url, query="population", max_tokens=1000)
+
+    WEB_CACHE_DIR   cache directory (default ~/.cache/agent-web)
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from prompt_layout import CHARS_PER_TOKEN
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agent-web")
+
+# Elements whose content is never useful to the model
+SKIPPED_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "nav",
+    "footer",
+    "form",
+    "button",
+    "select",
+    "head",
+}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "wbr", "source", "area"}
+BLOCK_TAGS = {
+    "p",
+    "div",
+    "section",
+    "article",
+    "main",
+    "aside",
+    "header",
+    "ul",
+    "ol",
+    "table",
+    "blockquote",
+    "figure",
+    "figcaption",
+    "dl",
+    "dt",
+    "dd",
+    "tr",
+    "pre",
+}
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n\s*(\n\s*)+")
+
+
+class MarkdownExtractor(HTMLParser):
+    """
+    Incremental HTML to markdown conversion: `feed()` chunks as they arrive
+    and read `text` at any point. Keeps headings, paragraphs, list items,
+    table rows and links; drops everything in SKIPPED_TAGS.
+    """
+
+    def __init__(self, base_url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ""
+        self._parts: List[str] = []
+        self._length = 0
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._in_title = False
+        self._href: Optional[str] = None
+        self._link_start = 0
+
+    @property
+    def length(self) -> int:
+        """Characters extracted so far."""
+        return self._length
+
+    @property
+    def text(self) -> str:
+        text = "".join(self._parts)
+        return _BLANK_LINES.sub("\n\n", text).strip()
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag == "title":
+            self._in_title = True
+        if tag in SKIPPED_TAGS:
+            if tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag in HEADING_LEVELS:
+            self._emit("\n\n" + "#" * HEADING_LEVELS[tag] + " ")
+        elif tag == "li":
+            self._emit("\n- ")
+        elif tag in ("td", "th"):
+            self._emit(" | ")
+        elif tag == "br":
+            self._emit("\n")
+        elif tag in BLOCK_TAGS:
+            self._emit("\n\n")
+        if tag == "pre":
+            self._pre_depth += 1
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href and not href.startswith(("#", "javascript:")):
+                self._href = urljoin(self.base_url, href)
+                self._link_start = len(self._parts)
+                self._emit("[")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag == "a" and self._href:
+            if len(self._parts) - self._link_start > 1:
+                self._emit(f"]({self._href})")
+            else:
+                # A link without text (an icon) is noise
+                self._length -= len(self._parts.pop())
+            self._href = None
+        elif tag == "pre":
+            self._pre_depth = max(0, self._pre_depth - 1)
+        elif tag in HEADING_LEVELS or tag in BLOCK_TAGS:
+            self._emit("\n\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data.strip()
+            return
+        if self._skip_depth:
+            return
+        if not self._pre_depth:
+            data = _SPACES.sub(" ", data.replace("\n", " "))
+            if not data.strip():
+                data = " " if self._parts and not self._parts[-1].endswith(" ") else ""
+        self._emit(data)
+
+    def _emit(self, text: str) -> None:
+        if text:
+            self._parts.append(text)
+            self._length += len(text)
+
+
+@dataclass
+class Page:
+    """
+    Extracted content of one URL, as stored in the cache.
+
+    Attributes:
+        url (str): Requested URL.
+        title (str): Document title, if any.
+        text (str): Markdown of the page, up to the extraction budget.
+        truncated (bool): Whether extraction stopped at the budget.
+        etag (str): ETag of the response, for revalidation.
+        last_modified (str): Last-Modified of the response, for revalidation.
+        fetched_at (float): When the page was downloaded or last revalidated.
+    """
+
+    url: str
+    title: str
+    text: str
+    truncated: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+
+
+class PageCache:
+    """
+    One JSON file per URL under `directory`; writes are atomic, so several
+    agent processes can share it. The oldest entries are removed once the
+    files add up to more than `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha256(url.encode()).hexdigest() + ".json"
+        )
+
+    def get(self, url: str) -> Optional[Page]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return Page(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, page: Page) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(asdict(page), f)
+        os.replace(tmp, self._path(page.url))
+        self._writes += 1
+        if self._writes % 50 == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def select_passages(
+    text: str, query: str, max_chars: int, passage_chars: int = 600
+) -> str:
+    """
+    The passages of `text` that best match `query`, in document order, up to
+    `max_chars`. Passages are paragraphs merged to about `passage_chars`;
+    scoring is BM25-style term overlap, so it needs no model.
+    """
+    passages: List[str] = []
+    for paragraph in text.split("\n\n"):
+        if passages and len(passages[-1]) + len(paragraph) < passage_chars:
+            passages[-1] += "\n\n" + paragraph
+        else:
+            passages.append(paragraph)
+
+    terms = {term.lower() for term in _WORD.findall(query)}
+    counts = [Counter(w.lower() for w in _WORD.findall(p)) for p in passages]
+    document_frequency = Counter(term for c in counts for term in terms & c.keys())
+    average_length = sum(sum(c.values()) for c in counts) / max(len(counts), 1)
+
+    def score(c: Counter) -> float:
+        length = sum(c.values())
+        total = 0.0
+        for term in terms & c.keys():
+            idf = math.log(1 + (len(passages) + 0.5) / (document_frequency[term] + 0.5))
+            tf = c[term]
+            total += (
+                idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / average_length))
+            )
+        return total
+
+    scores = [score(c) for c in counts]
+    if not any(scores):
+        return text[:max_chars]
+
+    chosen, used = set(), 0
+    for i in sorted(range(len(passages)), key=lambda i: -scores[i]):
+        if scores[i] <= 0 or used + len(passages[i]) > max_chars:
+            continue
+        chosen.add(i)
+        used += len(passages[i])
+    if not chosen:
+        best = max(range(len(passages)), key=lambda i: scores[i])
+        return passages[best][:max_chars]
+
+    out, previous = [], -1
+    for i in sorted(chosen):
+        if previous >= 0 and i != previous + 1:
+            out.append("[...]")
+        out.append(passages[i])
+        previous = i
+    return "\n\n".join(out)
+
+
+class WebPageFetcher:
+    """
+    Fetches pages as bounded markdown, through a pooled client and a disk cache.
+
+    Args:
+        cache_dir: Cache directory; defaults to WEB_CACHE_DIR, then
+            ~/.cache/agent-web. An empty string disables the disk cache.
+        ttl: Seconds a cached page is used without revalidation.
+        max_download_bytes: Downloads stop after this many bytes.
+        scan_chars: Characters extracted when selecting passages for a query;
+            without a query, extraction stops at the output budget.
+        timeout: Seconds per request.
+        max_connections: Size of the connection pool, shared by all threads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl: float = 3600.0,
+        max_download_bytes: int = 5 * 1024 * 1024,
+        scan_chars: int = 200_000,
+        timeout: float = 20.0,
+        max_connections: int = 20,
+    ):
+        import httpx
+
+        if cache_dir is None:
+            cache_dir = os.getenv("WEB_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.cache = PageCache(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.max_download_bytes = max_download_bytes
+        self.scan_chars = scan_chars
+        self.client = httpx.Client(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            headers={"User-Agent": "Mozilla/5.0 (compatible; agent-web/1.0)"},
+        )
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def read(
+        self, url: str, query: Optional[str] = None, max_tokens: int = 2000
+    ) -> str:
+        """
+        A page as markdown within `max_tokens` (estimated), focused on
+        `query` if one is given.
+        """
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        page = self.fetch(url, self.scan_chars if query else max_chars)
+        heading = f"# {page.title}\n\n" if page.title else ""
+        if query:
+            text = select_passages(page.text, query, max_chars)
+        else:
+            text = page.text[:max_chars]
+        if page.truncated or len(text) < len(page.text):
+            text += f"\n\n_[Truncated to ~{max_tokens} tokens]_"
+        return heading + text
+
+    def fetch(self, url: str, min_chars: int) -> Page:
+        """
+        The page at `url` with at least `min_chars` of extracted text (or
+        all of it), from the cache when possible.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        if cached and (not cached.truncated or len(cached.text) >= min_chars):
+            if time.time() - cached.fetched_at < self.ttl:
+                self._count("hits")
+                return cached
+        else:
+            # Too short for this request; revalidating it wouldn't help
+            cached = None
+
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                self._count("revalidated")
+                cached.fetched_at = time.time()
+                self.cache.put(cached)
+                return cached
+            response.raise_for_status()
+            page = self._extract(url, response, min_chars)
+
+        self._count("downloads")
+        if self.cache:
+            self.cache.put(page)
+        return page
+
+    def _extract(self, url: str, response, min_chars: int) -> Page:
+        content_type = response.headers.get("content-type", "")
+        html = "html" in content_type or not content_type
+        if not html and not content_type.startswith(("text/", "application/json")):
+            raise ValueError(f"Unsupported content type {content_type!r}")
+
+        extractor = MarkdownExtractor(str(response.url))
+        plain: List[str] = []
+        plain_chars = 0
+        truncated = False
+        for chunk in response.iter_text():
+            if html:
+                extractor.feed(chunk)
+                extracted = extractor.length
+                if extracted >= min_chars:
+                    # Blank lines collapse in `text`, which can leave it short
+                    extracted = len(extractor.text)
+            else:
+                plain.append(chunk)
+                plain_chars += len(chunk)
+                extracted = plain_chars
+            if extracted >= min_chars or (
+                response.num_bytes_downloaded >= self.max_download_bytes
+            ):
+                truncated = True
+                break
+        self._count("bytes", response.num_bytes_downloaded)
+
+        if html:
+            extractor.close()
+            title, text = extractor.title, extractor.text
+        else:
+            title, text = "", "".join(plain)
+        if truncated:
+            text = text[:min_chars]
+        return Page(
+            url=url,
+            title=title,
+            text=text,
+            truncated=truncated,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            fetched_at=time.time(),
+        )
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hits, 304 revalidations, downloads and bytes downloaded."""
+        with self._lock:
+            return {
+                name: self._counts[name]
+                for name in ("hits", "revalidated", "downloads", "bytes")
+            }
+
+    def close(self) -> None:
+        self.client.close()
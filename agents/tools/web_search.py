@@ -0,0 +1,274 @@
+"""
+Cached, de-duplicated and batched web search.
+
+Agents searching DuckDuckGo issue overlapping queries ("batman filming
+locations", "Batman filming locations list", ...), get the same pages back
+for each, and send one query per step. WebSearcher puts three things between
+the agents and the search engine:
+
+- a persistent query cache (SQLite), shared by every agent on the host, so a
+  query asked before (by any run, within the ttl) costs nothing
+- a SearchSession per agent run that remembers which URLs it has already
+  shown, and lists repeats as one line instead of repeating their snippets,
+  unless the agent asks the very same query again
+- `search_many()`, which runs a batch of queries concurrently under one
+  rate limit, so an agent can ask 20 queries in a single tool call
+
+    searcher = WebSearcher()
+    session = searcher.session()
+    print(session.search_many(["batman filming locations", "supercar factories"]))
+
+    WEB_SEARCH_CACHE   cache database (default ~/.cache/agent-web/search.sqlite)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Union
+
+from singleflight import get_flight
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "agent-web", "search.sqlite"
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Queries differing only in case or spacing are the same query."""
+    return _WHITESPACE.sub(" ", query).strip().lower()
+
+
+class NoResults(Exception):
+    """The search engine found nothing for a query."""
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1/rate seconds apart across all threads: each call
+    reserves the next free slot and sleeps until it.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SearchCache:
+    """
+    Query results in one SQLite table, keyed by normalized query and result
+    count. Entries older than `ttl` seconds are ignored and overwritten.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " query TEXT NOT NULL, max_results INTEGER NOT NULL,"
+            " results TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (query, max_results))"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, query: str, max_results: int) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results FROM searches"
+                " WHERE query = ? AND max_results = ? AND fetched_at > ?",
+                (query, max_results, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, query: str, max_results: int, results: List[Dict[str, str]]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                (query, max_results, json.dumps(results), time.time()),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class WebSearcher:
+    """
+    DuckDuckGo text search with a persistent cache and a shared rate limit.
+
+    Args:
+        cache_path: SQLite file; defaults to WEB_SEARCH_CACHE, then
+            ~/.cache/agent-web/search.sqlite. An empty string disables it.
+        ttl: Seconds a cached result set is reused.
+        max_results: Results per query.
+        rate_limit: Searches per second sent to DuckDuckGo, across threads.
+        max_workers: Queries of one batch searched at the same time.
+        **ddgs_options: Passed to the DDGS client (proxy, timeout, ...).
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        ttl: float = 86400.0,
+        max_results: int = 10,
+        rate_limit: Optional[float] = 1.0,
+        max_workers: int = 4,
+        **ddgs_options,
+    ):
+        from ddgs import DDGS
+
+        if cache_path is None:
+            cache_path = os.getenv("WEB_SEARCH_CACHE", DEFAULT_CACHE_PATH)
+        self.cache = SearchCache(cache_path, ttl) if cache_path else None
+        self.max_results = max_results
+        self.limiter = RateLimiter(rate_limit)
+        self.max_workers = max_workers
+        self.ddgs = DDGS(**ddgs_options)
+        # Identical queries already being searched wait for that search
+        self._flight = get_flight("ddgs_search")
+        self.searches = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> List[Dict[str, str]]:
+        """Results of one query as dicts with title, href and body."""
+        key = normalize_query(query)
+        if self.cache:
+            results = self.cache.get(key, self.max_results)
+            if results is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                return results
+        return self._flight.do(key, self._search, key)
+
+    def _search(self, key: str) -> List[Dict[str, str]]:
+        self.limiter.wait()
+        with self._lock:
+            self.searches += 1
+        results = [
+            {
+                "title": r.get("title", ""),
+                "href": r.get("href", ""),
+                "body": r.get("body", ""),
+            }
+            for r in self.ddgs.text(key, max_results=self.max_results)
+        ]
+        # Empty result sets aren't cached; they are often a transient block
+        if self.cache and results:
+            self.cache.put(key, self.max_results, results)
+        return results
+
+    def search_many(
+        self, queries: Sequence[str]
+    ) -> Dict[str, Union[List[Dict[str, str]], str]]:
+        """
+        Results of each query, searched concurrently. A query that fails maps
+        to its error message rather than failing the batch; like an empty
+        result, it isn't cached.
+        """
+
+        def search(query: str) -> Union[List[Dict[str, str]], str]:
+            try:
+                return self.search(query)
+            except Exception as e:
+                return f"Search failed ({type(e).__name__}: {e}). Try again later."
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(queries, pool.map(search, queries)))
+
+    def session(self, dedup: bool = True) -> "SearchSession":
+        return SearchSession(self, dedup)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"searches": self.searches, "cache_hits": self.cache_hits}
+
+
+class SearchSession:
+    """
+    One agent run's view of the search results: each URL's snippet is shown
+    the first time it comes up, later results pointing to it are listed as
+    one line. A query the run already asked (up to case and spacing) is
+    shown in full again: the agent only repeats a query when it no longer
+    has the snippets, e.g. after context compaction cut them. With
+    `dedup=False` every result is shown in full, for tools shared by
+    unrelated runs.
+    """
+
+    def __init__(self, searcher: WebSearcher, dedup: bool = True):
+        self.searcher = searcher
+        self.dedup = dedup
+        self.seen: set = set()
+        self.queries: set = set()
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> str:
+        """Markdown results of one query; raises NoResults if there are none."""
+        results = self.searcher.search(query)
+        if not results:
+            raise NoResults("No results found! Try a less restrictive/shorter query.")
+        return "## Search Results\n\n" + self.format(results, self._repeat(query))
+
+    def search_many(self, queries: Sequence[str]) -> str:
+        """Markdown results of several queries, each under its own heading."""
+        unique: Dict[str, str] = {}
+        for query in queries:
+            if query.strip():
+                unique.setdefault(normalize_query(query), query)
+        sections = []
+        for query, results in self.searcher.search_many(list(unique.values())).items():
+            if isinstance(results, str):
+                # The search failed; retrying it later isn't a repeat
+                body = results
+            elif results:
+                body = self.format(results, self._repeat(query))
+            else:
+                body = "No results found."
+            sections.append(f"## Search Results: {query}\n\n{body}")
+        return "\n\n".join(sections)
+
+    def _repeat(self, query: str) -> bool:
+        """Whether the run asked `query` before; records that it has now."""
+        key = normalize_query(query)
+        with self._lock:
+            repeat = key in self.queries
+            self.queries.add(key)
+        return repeat
+
+    def format(self, results: List[Dict[str, str]], full: bool = False) -> str:
+        """Results as markdown; `full` shows snippets of URLs already shown too."""
+        lines = []
+        with self._lock:
+            for result in results:
+                url = result["href"]
+                if self.dedup and not full and url in self.seen:
+                    lines.append(f"[{result['title']}]({url}) (already listed)")
+                else:
+                    self.seen.add(url)
+                    lines.append(f"[{result['title']}]({url})\n{result['body']}")
+        return "\n\n".join(lines)
+
+    def reset(self) -> None:
+        """Forget the URLs and queries shown, e.g. when the agent starts a new task."""
+        with self._lock:
+            self.seen.clear()
+            self.queries.clear()
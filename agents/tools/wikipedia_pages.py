@@ -0,0 +1,242 @@
+"""
+Bulk Wikipedia lookups: the top pages for a query, summarized, in one call.
+
+A title search answers nothing by itself; the model has to come back for
+each page it wants to read, one round-trip per page. WikipediaReader
+answers a query with the introductions of its top-k pages instead:
+
+- one search request, then every page's introduction fetched concurrently
+  over a pooled HTTP client
+- searches and introductions kept in the shared web cache, so pages that
+  come up for several queries (or runs) are downloaded once
+- the combined text kept within a per-call token budget, shared between
+  the pages in rank order (lower-ranked pages are dropped when it runs
+  out), so the tool result stays a predictable size
+
+    reader = WikipediaReader()
+    print(reader.summaries("Ada Lovelace", k=3, max_tokens=1200))
+
+    WEB_CACHE_DIR   cache directory (default ~/.cache/agent-web)
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlencode
+
+from prompt_layout import CHARS_PER_TOKEN
+from singleflight import get_flight
+from web_pages import DEFAULT_CACHE_DIR, Page, PageCache
+
+_SENTENCE_END = re.compile(r"[.!?](?=\s)")
+
+# Pages are dropped rather than given less introduction than this
+MIN_PAGE_CHARS = 200
+
+SEPARATOR = "\n\n"
+
+
+def trim(text: str, max_chars: int) -> str:
+    """
+    `text` cut to at most `max_chars`, marker included, at the last sentence
+    end if there is one.
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max(max_chars - len(" [...]"), 0)]
+    ends = [m.end() for m in _SENTENCE_END.finditer(cut + " ")]
+    if ends and ends[-1] > max_chars // 2:
+        return cut[: ends[-1]] + " [...]"
+    return cut[: max(max_chars - len("..."), 0)].rstrip() + "..."
+
+
+class WikipediaReader:
+    """
+    Wikipedia search and page introductions through the MediaWiki API.
+
+    Args:
+        language: Wikipedia edition, e.g. "en" or "fr".
+        cache_dir: Cache directory; defaults to WEB_CACHE_DIR, then
+            ~/.cache/agent-web. An empty string disables the disk cache.
+        ttl: Seconds a cached search or page is reused.
+        timeout: Seconds per request.
+        max_workers: Pages fetched at the same time.
+    """
+
+    def __init__(
+        self,
+        language: str = "en",
+        cache_dir: Optional[str] = None,
+        ttl: float = 86400.0,
+        timeout: float = 20.0,
+        max_workers: int = 5,
+    ):
+        import httpx
+
+        if cache_dir is None:
+            cache_dir = os.getenv("WEB_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.cache = PageCache(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+        self.page_url = f"https://{language}.wikipedia.org/wiki/"
+        self.max_workers = max_workers
+        self.client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_workers, max_keepalive_connections=max_workers
+            ),
+            headers={"User-Agent": "agent-web/1.0 (Wikipedia summaries for agents)"},
+        )
+        # Concurrent lookups of the same page share one request
+        self._flight = get_flight("wikipedia_page")
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def search(self, query: str, k: int = 3) -> List[str]:
+        """Titles of the top `k` pages for `query`."""
+        params = {
+            "action": "query",
+            "list": "search",
+            "srsearch": query,
+            "srlimit": k,
+            "srprop": "",
+            "format": "json",
+            "formatversion": 2,
+        }
+        key = f"{self.api_url}?{urlencode(params)}"
+        cached = self._cached(key)
+        if cached:
+            return json.loads(cached.text)
+
+        data = self._get(params)
+        titles = [hit["title"] for hit in data.get("query", {}).get("search", [])]
+        self._count("searches")
+        if self.cache:
+            self.cache.put(
+                Page(
+                    url=key,
+                    title=query,
+                    text=json.dumps(titles),
+                    truncated=False,
+                    fetched_at=time.time(),
+                )
+            )
+        return titles
+
+    def page(self, title: str) -> Page:
+        """A page's introduction as plain text, following redirects."""
+        params = {
+            "action": "query",
+            "prop": "extracts",
+            "exintro": 1,
+            "explaintext": 1,
+            "redirects": 1,
+            "titles": title,
+            "format": "json",
+            "formatversion": 2,
+        }
+        # Keyed by the API request, not the article URL: the cache is shared
+        # with WebPageFetcher, which stores whole articles under their URLs
+        key = f"{self.api_url}?{urlencode(params)}"
+        cached = self._cached(key)
+        if cached:
+            return cached
+        return self._flight.do(key, self._fetch_page, key, params)
+
+    def _fetch_page(self, key: str, params: Dict) -> Page:
+        data = self._get(params)
+        found = (data.get("query", {}).get("pages") or [{}])[0]
+        if found.get("missing"):
+            raise KeyError(f"No Wikipedia page titled {params['titles']!r}")
+        page = Page(
+            url=key,
+            title=found.get("title", params["titles"]),
+            text=(found.get("extract") or "").strip(),
+            truncated=False,
+            fetched_at=time.time(),
+        )
+        self._count("pages_fetched")
+        if self.cache:
+            self.cache.put(page)
+        return page
+
+    def article_url(self, title: str) -> str:
+        return self.page_url + quote(title.replace(" ", "_"))
+
+    def pages(self, titles: List[str]) -> List[Optional[Page]]:
+        """
+        Introductions of several pages, fetched concurrently; None for a
+        missing page. Request errors are raised.
+        """
+
+        def fetch(title: str) -> Optional[Page]:
+            try:
+                return self.page(title)
+            except KeyError:
+                return None
+
+        if not titles:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(titles))) as pool:
+            return list(pool.map(fetch, titles))
+
+    def summaries(self, query: str, k: int = 3, max_tokens: int = 1500) -> str:
+        """
+        Markdown summaries of the top `k` pages for `query`, within
+        `max_tokens` (estimated) in total, headings and separators included.
+        The first page is always kept, so a budget smaller than its heading
+        is overrun.
+        """
+        pages = [page for page in self.pages(self.search(query, k)) if page]
+        if not pages:
+            return f"No Wikipedia pages found for {query!r}."
+
+        # Each page gets an equal share of what's left; short introductions
+        # leave more for the pages after them. A share too small to say
+        # anything goes to the page whole, and the pages after it are dropped
+        left = max_tokens * CHARS_PER_TOKEN
+        sections = []
+        for i, page in enumerate(pages):
+            if sections:
+                left -= len(SEPARATOR)
+            heading = f"## {page.title}\n{self.article_url(page.title)}\n\n"
+            share = left // (len(pages) - i) - len(heading)
+            if share < MIN_PAGE_CHARS:
+                share = left - len(heading)
+            if share < MIN_PAGE_CHARS and sections:
+                break
+            text = trim(page.text, share) if share > 0 else ""
+            if not text and share >= len("(No introduction.)"):
+                text = "(No introduction.)"
+            sections.append(heading + text)
+            left -= len(sections[-1])
+        return SEPARATOR.join(sections)
+
+    def _cached(self, url: str) -> Optional[Page]:
+        cached = self.cache.get(url) if self.cache else None
+        if cached and time.time() - cached.fetched_at < self.ttl:
+            self._count("hits")
+            return cached
+        return None
+
+    def _get(self, params: Dict) -> Dict:
+        response = self.client.get(self.api_url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Searches sent, pages downloaded and cache hits."""
+        with self._lock:
+            return {
+                name: self._counts[name]
+                for name in ("searches", "pages_fetched", "hits")
+            }
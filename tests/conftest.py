@@ -0,0 +1,36 @@
+"""
+Shared test setup.
+
+The agents are scripts rather than an installed package, and several of them
+have a module named tools.py, so each test module puts the directory it
+tests on sys.path itself (see `add_path`), or imports a tools.py under a
+name of its own (see `import_file`). agents/tools, the shared utilities
+every agent imports, is always on it.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def add_path(*parts: str) -> str:
+    """Put a directory of the repo at the front of sys.path."""
+    path = os.path.join(REPO_ROOT, *parts)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return path
+
+
+add_path("agents", "tools")
+
+
+def import_file(name: str, *parts: str):
+    """Import a repo file under `name`, for modules whose names clash."""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, *parts))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
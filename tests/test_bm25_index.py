@@ -0,0 +1,132 @@
+"""The incremental BM25 index, against a BM25Okapi rebuilt after every write."""
+
+import math
+import random
+import time
+
+import pytest
+
+from conftest import add_path
+
+add_path("agents", "course", "agentic_rag")
+
+pytest.importorskip("langchain_core")
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+from bm25_index import IncrementalBM25Index  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+WORDS = "gala dinner host guest ada lovelace tesla marie curie invite email".split()
+QUERIES = ["gala", "ada lovelace", "guest guest invite", "curie tesla email", "nobody"]
+
+
+class Rebuilt(rank_bm25.BM25Okapi):
+    """
+    BM25Okapi with the index's idf, log(1 + (n - df + 0.5) / (df + 0.5)).
+
+    BM25Okapi floors negative idfs at a fraction of the average idf instead,
+    which isn't something a delta-updated index can keep.
+    """
+
+    def _calc_idf(self, nd):
+        for word, freq in nd.items():
+            self.idf[word] = math.log(
+                1 + (self.corpus_size - freq + 0.5) / (freq + 0.5)
+            )
+
+
+def document(rng: random.Random, name: str) -> Document:
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+    return Document(page_content=text, metadata={"name": name})
+
+
+def assert_matches_rebuild(index: IncrementalBM25Index, docs: dict) -> None:
+    names = sorted(docs)
+    assert len(index) == len(names)
+    if not names:
+        assert index.score("gala") == {}
+        return
+    rebuilt = Rebuilt([docs[name].page_content.split() for name in names])
+    for query in QUERIES:
+        expected = rebuilt.get_scores(query.split())
+        scores = index.score(query)
+        assert set(scores) <= set(names)
+        for name, score in zip(names, expected):
+            assert scores.get(name, 0.0) == pytest.approx(score)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_adds_updates_deletes_and_merges_match_a_rebuild(seed):
+    rng = random.Random(seed)
+    index = IncrementalBM25Index(max_segments=1000)
+    docs = {}
+
+    for step in range(60):
+        action = rng.random()
+        if action < 0.5:
+            # A batch of new guests and updated entries for existing ones
+            batch = [
+                document(rng, rng.choice([*docs, f"guest{step}-{i}"]))
+                for i in range(rng.randint(1, 4))
+            ]
+            index.upsert(batch)
+            docs.update((doc.metadata["name"], doc) for doc in batch)
+        elif action < 0.7 and docs:
+            name = rng.choice(sorted(docs))
+            assert index.delete(name)
+            del docs[name]
+        elif action < 0.8:
+            index.merge()
+            assert len(index.snapshot.segments) <= 1
+        else:
+            assert not index.delete("not-a-guest")
+        assert_matches_rebuild(index, docs)
+
+    assert {name: index.get(name) for name in docs} == docs
+
+
+def test_merge_drops_shadowed_copies():
+    index = IncrementalBM25Index(max_segments=1000)
+    index.add(Document(page_content="gala dinner", metadata={"name": "Ada"}))
+    index.add(Document(page_content="tesla", metadata={"name": "Nikola"}))
+    index.update(Document(page_content="gala host", metadata={"name": "Ada"}))
+    assert len(index.snapshot.segments) == 3
+
+    index.merge()
+
+    (segment,) = index.snapshot.segments
+    assert sorted(segment.docs) == ["Ada", "Nikola"]
+    assert segment.docs["Ada"][0].page_content == "gala host"
+    assert "dinner" not in segment.postings
+    assert index.snapshot.doc_freq == {"gala": 1, "host": 1, "tesla": 1}
+
+
+def test_invoke_returns_the_top_k_of_a_rebuild():
+    rng = random.Random(7)
+    docs = {f"guest{i}": document(rng, f"guest{i}") for i in range(30)}
+    index = IncrementalBM25Index(k=3, max_segments=1000)
+    for doc in docs.values():
+        index.add(doc)
+
+    names = sorted(docs)
+    rebuilt = Rebuilt([docs[name].page_content.split() for name in names])
+    for query in QUERIES[:-1]:
+        expected = sorted(rebuilt.get_scores(query.split()), reverse=True)[:3]
+        scores = index.score(query)
+        found = [doc.metadata["name"] for doc in index.invoke(query)]
+        assert [scores[name] for name in found] == pytest.approx(expected)
+    assert index.invoke("nobody") == []
+
+
+def test_writes_past_max_segments_merge_in_the_background():
+    index = IncrementalBM25Index(max_segments=2)
+    for i, text in enumerate(["gala", "gala dinner", "tesla", "gala host"]):
+        index.add(Document(page_content=text, metadata={"name": f"guest{i}"}))
+
+    deadline = time.monotonic() + 5
+    while len(index.snapshot.segments) > 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(index.snapshot.segments) <= 2
+    assert len(index) == 4
+    assert sorted(index.score("gala")) == ["guest0", "guest1", "guest3"]
@@ -0,0 +1,60 @@
+"""The calculate tool's expression evaluator: syntax, bounds and errors."""
+
+import pytest
+
+from conftest import import_file
+
+pytest.importorskip("mcp")
+
+tools = import_file("llamaindex_tools", "agents", "course", "llamaindex", "tools.py")
+evaluate_expression = tools.evaluate_expression
+
+
+@pytest.mark.parametrize(
+    "expression, value",
+    [
+        ("((2 + 3) * 4) / 2", 10.0),
+        ("7 // 2 + 7 % 2", 4),
+        ("-(2 ** 3)", -8),
+        ("2 ^ 10", 1024),  # a power, not XOR
+        ("4 ** 0.5", 2.0),
+    ],
+)
+def test_evaluates_arithmetic(expression, value):
+    assert evaluate_expression(expression) == value
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os')",
+        "x + 1",
+        "'a' * 3",
+        "1 if 1 else 2",
+        "1 +",
+        "1 / 0",
+        "2.0 ** 5000",  # float overflow
+        "(-8) ** 0.5",  # complex
+        "(-8) ** 0.5 * 0",
+        "-" * 998 + "1",  # nests deeper than the recursion limit
+        "1" * 1001,
+    ],
+)
+def test_rejects_with_value_error(expression):
+    with pytest.raises(ValueError):
+        evaluate_expression(expression)
+
+
+def test_integer_results_stay_under_the_bit_limit():
+    limit = tools.MAX_INT_BITS
+    assert evaluate_expression(f"2 ** {limit - 1}").bit_length() == limit
+    assert evaluate_expression("-" * 100 + "1") == 1
+
+    for expression in [
+        f"2 ** {limit}",
+        "9 ** 9 ** 9",
+        f"(2 ** {limit // 2}) * (2 ** {limit // 2})",
+        f"(2 ** {limit - 1}) * 2",
+    ]:
+        with pytest.raises(ValueError, match="bits"):
+            evaluate_expression(expression)
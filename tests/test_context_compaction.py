@@ -0,0 +1,115 @@
+"""Memory compaction over a 12-step CodeAgent run with a scripted model."""
+
+import pytest
+
+pytest.importorskip("smolagents")
+
+from context_compaction import SCRATCHPAD_HEADING, SUPERSEDED  # noqa: E402
+from context_compaction import ContextCompactor  # noqa: E402
+from smolagents import CodeAgent, tool  # noqa: E402
+from smolagents.memory import ActionStep, PlanningStep  # noqa: E402
+from smolagents.models import ChatMessage, MessageRole, Model  # noqa: E402
+from smolagents.monitoring import TokenUsage  # noqa: E402
+
+STEPS = 12
+FILLER = "The archive page goes on about the history of the city. " * 40
+
+
+@tool
+def read_page(n: int) -> str:
+    """
+    Read one page of the city archive.
+
+    Args:
+        n: Page number.
+    """
+    return f"{FILLER}Gotham had {n} million residents in 19{n:02d}. {FILLER}"
+
+
+class ScriptedModel(Model):
+    """Reads one archive page per step, then answers; records prompt sizes."""
+
+    def __init__(self):
+        super().__init__(model_id="scripted")
+        self.prompt_chars = []
+
+    def generate(self, messages, stop_sequences=None, **kwargs):
+        chars = sum(
+            len(part.get("text", ""))
+            for message in messages
+            for part in (message.content or [])
+            if isinstance(part, dict)
+        )
+        if stop_sequences and "<end_plan>" in stop_sequences:
+            content = "1. Read the archive pages one by one.\n2. Report the counts."
+        else:
+            self.prompt_chars.append(chars)
+            n = len(self.prompt_chars)
+            code = "final_answer('done')" if n == STEPS else f"print(read_page({n}))"
+            content = f"Thought: Step {n}.\n<code>\n{code}\n</code>"
+        return ChatMessage(
+            role=MessageRole.ASSISTANT,
+            content=content,
+            token_usage=TokenUsage(input_tokens=chars // 4, output_tokens=10),
+        )
+
+
+def run(compactor=None):
+    model = ScriptedModel()
+    agent = CodeAgent(
+        tools=[read_page],
+        model=model,
+        planning_interval=4,
+        max_steps=STEPS + 3,
+        verbosity_level=0,
+        step_callbacks=compactor.callbacks() if compactor else None,
+    )
+    assert agent.run("How many people lived in Gotham each year?") == "done"
+    return agent, model
+
+
+def test_long_run_stays_flat():
+    compactor = ContextCompactor()
+    agent, model = run(compactor)
+    _, uncompacted = run()
+
+    assert len(model.prompt_chars) == STEPS
+    # Every page adds ~4.6k chars to an uncompacted prompt
+    assert uncompacted.prompt_chars[-1] > 40_000
+    assert model.prompt_chars[-1] < uncompacted.prompt_chars[-1] / 3
+
+    actions = [s for s in agent.memory.steps if isinstance(s, ActionStep)]
+    for step in actions[:-1]:
+        assert step.observations.startswith("[Compacted:")
+        assert len(step.observations) < 400
+    assert compactor.report()["steps"] == STEPS
+
+
+def test_scratchpad_goes_into_the_new_plan_and_old_plans_shrink():
+    compactor = ContextCompactor()
+    agent, _ = run(compactor)
+
+    facts = [fact.text for fact in compactor.scratchpad]
+    assert "Gotham had 3 million residents in 1903." in facts
+
+    plans = [s for s in agent.memory.steps if isinstance(s, PlanningStep)]
+    assert len(plans) == 3
+    assert SCRATCHPAD_HEADING in plans[-1].plan
+    assert "- (step 7) Gotham had 7 million residents in 1907." in plans[-1].plan
+    for plan in plans[:-1]:
+        assert plan.plan.endswith(SUPERSEDED)
+        assert SCRATCHPAD_HEADING not in plan.plan
+
+
+def test_keep_recent_leaves_the_last_steps_whole():
+    agent, _ = run(ContextCompactor(keep_recent=3))
+    observations = [
+        s.observations for s in agent.memory.steps if isinstance(s, ActionStep)
+    ]
+
+    # After step 12 ran, steps 10 to 12 are the last three: 9 was compacted
+    assert observations[8].startswith("[Compacted:")
+    assert FILLER in observations[9] and FILLER in observations[10]
+
+    # The step just run always reaches the model whole
+    assert ContextCompactor(keep_recent=0).keep_recent == 1
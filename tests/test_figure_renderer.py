@@ -0,0 +1,35 @@
+"""One real export through a warm kaleido browser, when one can start here."""
+
+import pytest
+
+pytest.importorskip("kaleido")
+px = pytest.importorskip("plotly.express")
+
+from figure_renderer import FigureRenderer  # noqa: E402
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    renderer = FigureRenderer(cache_dir=str(tmp_path / "cache"))
+    try:
+        renderer.wait_ready(120)
+    except Exception as e:
+        renderer.close()
+        pytest.skip(f"No browser for kaleido: {e}")
+    yield renderer
+    renderer.close()
+
+
+def test_renders_then_serves_from_cache(renderer, tmp_path):
+    fig = px.scatter(x=[0, 1, 2, 3], y=[3, 1, 2, 0])
+
+    path = renderer.write(fig, str(tmp_path / "plot.png"), width=300, height=200)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    assert data.startswith(PNG_MAGIC)
+    assert renderer.render(fig, width=300, height=200) == data
+    report = renderer.report()
+    assert (report["renders"], report["cache_hits"]) == (1, 1)
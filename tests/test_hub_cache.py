@@ -0,0 +1,146 @@
+"""Stale-while-revalidate hub stats, against the local Hub stand-in."""
+
+import threading
+import time
+
+import pytest
+
+from conftest import add_path
+
+add_path("agents", "course", "agentic_rag")
+
+pytest.importorskip("huggingface_hub")
+
+import hub_cache  # noqa: E402
+from hub_cache import StaleWhileRevalidateCache, fetch_hub_stats  # noqa: E402
+from hub_stub import serve_hub_stub  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def wait_refreshed(cache: StaleWhileRevalidateCache, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._refreshing
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    """A Hub stand-in whose listings the test can change, and a counted loader."""
+    models = {"Qwen": [("Qwen/Qwen2.5-7B-Instruct", 12_000_000)]}
+    with serve_hub_stub(models, latency=0.3) as endpoint:
+        monkeypatch.setenv("HF_ENDPOINT", endpoint)
+        hub_cache.get_hub_api.cache_clear()
+        calls = []
+
+        def loader(author: str) -> str:
+            calls.append(author)
+            return fetch_hub_stats(author)
+
+        yield models, loader, calls
+    hub_cache.get_hub_api.cache_clear()
+
+
+def test_fresh_entry_is_a_hit(hub):
+    models, loader, calls = hub
+    clock = Clock()
+    cache = StaleWhileRevalidateCache(loader, ttl=60, max_stale=600, clock=clock)
+
+    first = cache.get("Qwen")
+    clock.now += 30
+    start = time.perf_counter()
+    second = cache.get("Qwen")
+
+    assert "Qwen/Qwen2.5-7B-Instruct" in first
+    assert second == first
+    assert time.perf_counter() - start < 0.1
+    assert calls == ["Qwen"]
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(hub):
+    models, loader, calls = hub
+    clock = Clock()
+    cache = StaleWhileRevalidateCache(loader, ttl=60, max_stale=600, clock=clock)
+    old = cache.get("Qwen")
+
+    models["Qwen"] = [("Qwen/Qwen3-0.6B", 50_000_000)]
+    clock.now += 120
+    start = time.perf_counter()
+    stale = [cache.get("Qwen") for _ in range(5)]
+
+    # Served at once, without waiting on the stand-in's 0.3s latency
+    assert time.perf_counter() - start < 0.2
+    assert stale == [old] * 5
+
+    wait_refreshed(cache)
+    assert calls == ["Qwen", "Qwen"]
+    assert "Qwen/Qwen3-0.6B" in cache.get("Qwen")
+
+
+def test_failed_refresh_keeps_serving_stale(hub):
+    models, loader, calls = hub
+    clock = Clock()
+    failing = {"on": False}
+
+    def flaky(author: str) -> str:
+        if failing["on"]:
+            raise ConnectionError("hub down")
+        return loader(author)
+
+    cache = StaleWhileRevalidateCache(flaky, ttl=60, max_stale=600, clock=clock)
+    old = cache.get("Qwen")
+
+    failing["on"] = True
+    clock.now += 120
+    assert cache.get("Qwen") == old
+    wait_refreshed(cache)
+    assert cache.get("Qwen") == old
+
+
+def test_expired_entry_is_reloaded_synchronously(hub):
+    models, loader, calls = hub
+    clock = Clock()
+    cache = StaleWhileRevalidateCache(loader, ttl=60, max_stale=600, clock=clock)
+    cache.get("Qwen")
+
+    models["Qwen"] = [("Qwen/Qwen3-0.6B", 50_000_000)]
+    clock.now += 60 + 600 + 1
+    assert "Qwen/Qwen3-0.6B" in cache.get("Qwen")
+    assert calls == ["Qwen", "Qwen"]
+
+
+def test_concurrent_misses_share_one_load(hub):
+    models, loader, calls = hub
+    cache = StaleWhileRevalidateCache(loader, ttl=60, max_stale=600)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("Qwen")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
+    assert calls == ["Qwen"]
+
+
+def test_prefetch_warms_several_authors(hub):
+    models, loader, calls = hub
+    models["google"] = [("google/gemma-3-27b-it", 2_500_000)]
+    cache = StaleWhileRevalidateCache(loader, ttl=60, max_stale=600)
+
+    start = time.perf_counter()
+    cache.prefetch(["Qwen", "google"])
+    # Loaded concurrently: about one stand-in latency, not two
+    assert time.perf_counter() - start < 0.55
+    assert "gemma" in cache.peek("google")
+    assert sorted(calls) == ["Qwen", "google"]
@@ -0,0 +1,167 @@
+"""Claim order, retries, leases and dead letters, on every queue backend."""
+
+import time
+
+import pytest
+
+from conftest import add_path
+
+add_path("agents", "jobs")
+
+import job_queue  # noqa: E402
+from job_queue import (  # noqa: E402
+    LEASE_EXPIRED_ERROR,
+    LeaseLost,
+    MemoryJobQueue,
+    RedisJobQueue,
+    SqliteJobQueue,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def queue(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        queue = MemoryJobQueue()
+    elif request.param == "sqlite":
+        queue = SqliteJobQueue(str(tmp_path / "jobs.sqlite"))
+    else:
+        # The Redis scripts run on fakeredis's Lua interpreter, when installed
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        import redis
+
+        monkeypatch.setattr(
+            redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(**kwargs)
+        )
+        queue = RedisJobQueue("redis://fake")
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempts: 0.0)
+
+
+def test_claims_by_priority_then_fifo(queue):
+    low_first = queue.put("triage", {"n": 1})
+    high_first = queue.put("triage", {"n": 2}, priority=5)
+    high_second = queue.put("triage", {"n": 3}, priority=5)
+    low_second = queue.put("triage", {"n": 4})
+
+    claimed = [queue.claim().id for _ in range(4)]
+
+    assert claimed == [high_first, high_second, low_first, low_second]
+    assert queue.claim() is None
+
+
+def test_claims_only_requested_kinds(queue):
+    queue.put("triage", {}, priority=9)
+    rag = queue.put("rag_qa", {})
+
+    job = queue.claim(["rag_qa"])
+
+    assert job.id == rag and job.kind == "rag_qa"
+    assert queue.claim(["rag_qa"]) is None
+
+
+def test_complete_needs_the_current_lease(queue):
+    job_id = queue.put("triage", {"text": "hi"})
+    job = queue.claim()
+
+    with pytest.raises(LeaseLost):
+        queue.complete(job_id, "not-the-lease", {"label": "spam"})
+    queue.complete(job_id, job.lease, {"label": "spam"})
+
+    done = queue.get(job_id)
+    assert (done.state, done.result, done.attempts) == ("done", {"label": "spam"}, 1)
+    with pytest.raises(LeaseLost):
+        queue.complete(job_id, job.lease, {"label": "ham"})
+
+
+def test_failed_job_is_retried_after_backoff(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "retry_delay", lambda attempts: 0.05)
+    job_id = queue.put("triage", {}, max_attempts=3)
+    job = queue.claim()
+
+    assert queue.fail(job_id, job.lease, "ValueError: boom") is False
+    assert queue.get(job_id).state == "pending"
+    assert queue.claim() is None  # still backing off
+
+    time.sleep(0.1)
+    retry = queue.claim()
+    assert retry.id == job_id and retry.attempts == 2
+    assert retry.lease != job.lease
+    with pytest.raises(LeaseLost):
+        queue.fail(job_id, job.lease, "stale")
+
+
+def test_last_failure_is_dead_lettered_and_can_be_requeued(queue, no_backoff):
+    job_id = queue.put("triage", {}, max_attempts=2)
+
+    assert queue.fail(job_id, queue.claim().lease, "first") is False
+    assert queue.fail(job_id, queue.claim().lease, "second") is True
+
+    assert queue.claim() is None
+    assert [(j.id, j.error) for j in queue.dead_letters()] == [(job_id, "second")]
+    assert queue.stats().get("dead") == 1
+
+    queue.requeue(job_id)
+    job = queue.claim()
+    assert job.id == job_id and job.attempts == 1
+    assert queue.dead_letters() == []
+
+
+def test_only_dead_jobs_can_be_requeued(queue):
+    done = queue.put("triage", {})
+    running = queue.put("triage", {})
+    job = queue.claim()
+    queue.complete(done, job.lease, "ok")
+    queue.claim()
+
+    for job_id in (done, running, "no-such-job"):
+        with pytest.raises(KeyError):
+            queue.requeue(job_id)
+    assert queue.get(done).state == "done"
+    assert queue.get(running).state == "running"
+    assert queue.claim() is None
+
+
+def test_expired_lease_is_claimed_again(queue):
+    job_id = queue.put("triage", {}, max_attempts=3)
+    first = queue.claim(lease_seconds=0.05)
+    assert queue.claim() is None
+
+    time.sleep(0.1)
+    second = queue.claim()
+
+    assert second.id == job_id and second.attempts == 2
+    with pytest.raises(LeaseLost):
+        queue.complete(job_id, first.lease, "late")
+    queue.complete(job_id, second.lease, "on time")
+    assert queue.get(job_id).result == "on time"
+
+
+def test_expired_last_attempt_is_dead_lettered_by_claim(queue):
+    job_id = queue.put("triage", {}, max_attempts=1)
+    job = queue.claim(lease_seconds=0.05)
+
+    time.sleep(0.1)
+
+    assert queue.claim() is None
+    dead = queue.get(job_id)
+    assert (dead.state, dead.error) == ("dead", LEASE_EXPIRED_ERROR)
+    assert [j.id for j in queue.dead_letters()] == [job_id]
+    with pytest.raises(LeaseLost):
+        queue.fail(job_id, job.lease, "too late")
+
+
+def test_pending_count_covers_backoff(queue):
+    queue.put("triage", {})
+    queue.put("rag_qa", {})
+    job = queue.claim()
+    assert queue.pending_count() == 1
+
+    queue.fail(job.id, job.lease, "boom")
+
+    assert queue.pending_count() == 2
@@ -0,0 +1,34 @@
+"""Nearest-rank percentiles, and the stats rows that report them."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from latency import percentile
+
+
+def test_nearest_rank():
+    samples = list(range(10, 0, -1))
+
+    assert percentile(samples, 0.5) == 5
+    assert percentile(samples, 0.9) == 9
+    assert percentile(samples, 0.99) == 10
+    assert percentile(samples, 1.0) == 10
+    assert percentile(samples, 0.0) == 1
+    assert percentile(range(1, 101), 0.07) == 7
+
+
+def test_empty_samples_use_the_default():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([], 0.5, default=None) is None
+
+
+def test_dispatcher_reports_the_nearest_rank_p50():
+    pytest.importorskip("openai")
+    from vllm_dispatch import BatchingDispatcher
+
+    dispatcher = BatchingDispatcher([SimpleNamespace(base_url="stub")])
+    assert dispatcher.stats()[0]["p50_ms"] is None
+
+    dispatcher.endpoints[0].latencies.extend(x / 1000 for x in range(10, 0, -1))
+    assert dispatcher.stats()[0]["p50_ms"] == 5.0
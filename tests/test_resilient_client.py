@@ -0,0 +1,172 @@
+"""Hedging, deadlines, breakers and routing, against local mock LLM servers."""
+
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+
+import openai  # noqa: E402
+from mock_llm import MockTurn, serve_mock_llm  # noqa: E402
+from model_router import ModelRouter  # noqa: E402
+from resilient_client import (  # noqa: E402
+    CircuitBreaker,
+    DeadlineExceeded,
+    NoHealthyEndpoint,
+    ResilientClient,
+    deadline,
+)
+
+SCRIPTS = {"default": [MockTurn(content="Paris is the capital of France.")]}
+
+
+def ask(client, question: str = "What is the capital of France?"):
+    response = client.chat.completions.create(
+        model="mock", messages=[{"role": "user", "content": question}]
+    )
+    return response.choices[0].message.content
+
+
+@pytest.fixture
+def servers():
+    """Two mock servers, fast and a little slower."""
+    with serve_mock_llm(SCRIPTS, latency=0.01) as fast:
+        with serve_mock_llm(SCRIPTS, latency=0.03) as slower:
+            yield fast, slower
+
+
+def test_slow_call_is_hedged_on_another_endpoint(servers):
+    fast, slower = servers
+    client = ResilientClient([fast.base_url(), slower.base_url()], min_samples=5)
+    for _ in range(6):
+        ask(client)
+    assert client.counters["hedges"] == 0
+    # The first endpoint given is the primary until another one is measured
+    assert [len(e.latencies) for e in client.endpoints] == [6, 0]
+
+    # The usually fast server stalls; its p95 passes and the other one answers
+    fast.slow_fraction, fast.slow_latency = 1.0, 2.0
+    started = time.monotonic()
+    assert ask(client) == "Paris is the capital of France."
+
+    assert time.monotonic() - started < 1.0
+    assert client.counters["hedges"] == 1
+    assert client.counters["hedge_wins"] == 1
+    client.close()
+
+
+def test_failed_call_fails_over(servers):
+    fast, slower = servers
+    fast.error_rate = 1.0
+    client = ResilientClient([fast.base_url(), slower.base_url()])
+
+    assert ask(client) == "Paris is the capital of France."
+    assert client.counters["failovers"] == 1
+    client.close()
+
+
+def test_deadline_bounds_a_hung_call():
+    with serve_mock_llm(SCRIPTS, latency=5.0) as server:
+        client = ResilientClient([server.base_url()])
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            with deadline(0.3):
+                ask(client)
+
+        assert time.monotonic() - started < 1.0
+        assert client.counters["deadline_exceeded"] == 1
+
+        with deadline(0.3):
+            # Nested deadlines keep the earlier one
+            with deadline(60) as at:
+                assert at - time.monotonic() <= 0.3
+        client.close()
+
+
+def test_breaker_opens_probes_and_closes():
+    with serve_mock_llm(SCRIPTS, error_rate=1.0) as server:
+        client = ResilientClient(
+            [server.base_url()], failure_threshold=2, reset_timeout=0.2
+        )
+        breaker = client.endpoints[0].breaker
+        for _ in range(2):
+            with pytest.raises(openai.APIStatusError):
+                ask(client)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # Open: no request reaches the server until the cool-down ends
+        with pytest.raises(NoHealthyEndpoint):
+            ask(client)
+
+        # The half-open probe fails, so the cool-down doubles
+        time.sleep(0.25)
+        with pytest.raises(openai.APIStatusError):
+            ask(client)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.reset_timeout == pytest.approx(0.4)
+        assert breaker.times_opened == 2
+
+        # The next probe succeeds and closes it again
+        server.error_rate = 0.0
+        time.sleep(0.25)
+        with pytest.raises(NoHealthyEndpoint):
+            ask(client)
+        time.sleep(0.2)
+        assert ask(client) == "Paris is the capital of France."
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.reset_timeout == pytest.approx(0.2)
+        # The mock only counts answered requests: the probe's
+        assert server.stats().requests == 1
+        client.close()
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """A router from the environment over a small and a large mock server."""
+    with serve_mock_llm(SCRIPTS, latency=0.01) as small:
+        with serve_mock_llm(SCRIPTS, latency=0.01) as large:
+            monkeypatch.setenv("SMALL_LLM_ENDPOINTS", small.base_url())
+            monkeypatch.setenv("LLM_ENDPOINTS", large.base_url())
+            # Every query is scored easy, so it tries the small model first
+            yield ModelRouter.from_env(threshold=1.0), small, large
+
+
+def test_router_routes_through_resilient_clients(router):
+    router, small, large = router
+    assert isinstance(router.small.client, ResilientClient)
+    assert isinstance(router.large.client, ResilientClient)
+
+    assert ask(router) == "Paris is the capital of France."
+    assert (small.stats().requests, large.stats().requests) == (1, 0)
+
+
+def test_router_keeps_the_callers_deadline(router):
+    router, small, large = router
+    small.latency = 5.0
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with deadline(0.3):
+            ask(router)
+
+    assert time.monotonic() - started < 1.0
+    assert large.stats().requests == 0
+
+
+def test_router_skips_a_small_route_whose_breakers_are_open(router):
+    router, small, large = router
+    small.error_rate = 1.0
+    weights = list(router.classifier.weights)
+
+    # Each failure escalates to the large model, until the breaker opens
+    for n in range(5):
+        assert ask(router, f"Question {n}?") == "Paris is the capital of France."
+    assert router.small.client.endpoints[0].breaker.state == CircuitBreaker.OPEN
+    assert router.stats["small"].escalations == 5
+    trained = list(router.classifier.weights)
+    assert trained != weights
+
+    # Then the small route is passed over, without training the classifier
+    assert ask(router, "Question 5?") == "Paris is the capital of France."
+    assert router.stats["small"].escalations == 5
+    assert large.stats().requests == 6
+    assert router.classifier.weights == trained
@@ -0,0 +1,99 @@
+"""PlotVerifier's structural check and its per-image verdict cache."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import add_path
+
+add_path("agents", "course", "smolagent", "multi_agent")
+
+pytest.importorskip("smolagents")
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from verification import PlotVerifier, structural_problem  # noqa: E402
+
+
+def scatter_map(lat, lon):
+    return {"data": [{"type": "scattermap", "lat": lat, "lon": lon}]}
+
+
+def test_figure_must_be_a_scatter_map():
+    problem = structural_problem({"data": [{"type": "scatter", "x": [1], "y": [1]}]})
+    assert "px.scatter_map" in problem and "scatter" in problem
+
+    assert "No figure found" in structural_problem(None)
+    assert "not a plotly figure" in structural_problem("saved_map.png")
+
+
+def test_map_needs_enough_points():
+    assert structural_problem(scatter_map([1, 2, 3], [4, 5, 6])) == (
+        "The map shows 3 points; at least 6 are needed."
+    )
+    assert structural_problem(scatter_map([1, 2, 3], [4, 5, 6]), min_points=3) is None
+
+
+def test_points_may_be_numpy_arrays():
+    figure = scatter_map(np.arange(6.0), np.arange(6.0))
+    figure["data"].append({"type": "scattermap", "lat": None, "lon": None})
+
+    assert structural_problem(figure) is None
+
+
+class CountingModel:
+    """A vision model stand-in that passes every plot and counts the calls."""
+
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, messages):
+        self.messages.append(messages)
+        return SimpleNamespace(content="Looks right. PASS")
+
+
+@pytest.fixture
+def verifier(tmp_path):
+    verifier = PlotVerifier(path=str(tmp_path / "saved_map.png"))
+    verifier._model = CountingModel()
+    return verifier
+
+
+def save_plot(path, color):
+    Image.new("RGB", (2000, 1000), color).save(path)
+
+
+def test_each_distinct_image_is_judged_once(verifier):
+    save_plot(verifier.path, "white")
+    first = verifier._judge("steps")
+
+    assert verifier._judge("steps") is first
+    assert first.result() == (True, "Looks right. PASS")
+
+    save_plot(verifier.path, "black")
+    verifier._judge("steps").result()
+
+    assert verifier.vision_calls == 2
+    # The image is downscaled before it is sent
+    image_url = verifier._model.messages[0][0]["content"][1]["image_url"]["url"]
+    assert image_url.startswith("data:image/jpeg;base64,")
+
+
+def test_check_reuses_the_verdict(verifier):
+    save_plot(verifier.path, "white")
+    agent = SimpleNamespace(
+        python_executor=SimpleNamespace(
+            state={"fig": scatter_map(list(range(6)), list(range(6)))}
+        ),
+        memory=SimpleNamespace(steps=[]),
+    )
+
+    assert verifier.check(None, agent.memory, agent=agent)
+    assert verifier.check(None, agent.memory, agent=agent)
+    assert verifier.vision_calls == 1
+
+    agent.python_executor.state["fig"] = scatter_map([1], [1])
+    with pytest.raises(Exception, match="1 points"):
+        verifier.check(None, agent.memory, agent=agent)
+    with pytest.raises(TypeError):
+        verifier.check(None, agent.memory)
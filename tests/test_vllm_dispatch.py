@@ -0,0 +1,70 @@
+"""The AIMD limiter's SLO checks, and stream timing through the dispatcher."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from vllm_dispatch import AIMDLimiter, BatchingDispatcher  # noqa: E402
+
+
+def test_short_reply_after_a_long_prefill_is_not_slow():
+    limiter = AIMDLimiter(tpot_slo=0.1)
+
+    # A tool call: 12 tokens after 3s of prefill and queueing
+    assert not limiter.is_slow(3.0, 12)
+    # Long enough replies are still judged on their whole latency
+    assert limiter.is_slow(30.0, 200)
+    assert not limiter.is_slow(10.0, 200)
+
+
+def test_streams_are_judged_after_the_first_token():
+    limiter = AIMDLimiter(tpot_slo=0.1)
+
+    assert not limiter.is_slow(3.0, 12, decode_seconds=0.5)
+    assert limiter.is_slow(3.0, 12, decode_seconds=2.0)
+
+
+def test_latency_slo_applies_to_every_request():
+    limiter = AIMDLimiter(latency_slo=2.0)
+
+    assert limiter.is_slow(3.0, 1)
+    assert limiter.is_slow(3.0, 12, decode_seconds=0.1)
+
+
+class SlowPrefillClient:
+    """An AsyncOpenAI stand-in streaming `tokens` chunks after a long prefill."""
+
+    def __init__(self, prefill: float, tokens: int):
+        self.prefill, self.tokens = prefill, tokens
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.base_url = "stub"
+
+    async def create(self, **kwargs):
+        return self.stream()
+
+    async def stream(self):
+        await asyncio.sleep(self.prefill)
+        for _ in range(self.tokens):
+            delta = SimpleNamespace(content="x")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+            await asyncio.sleep(0.001)
+
+
+def test_slow_prefill_stream_does_not_back_off():
+    async def run():
+        dispatcher = BatchingDispatcher(
+            [SlowPrefillClient(prefill=0.3, tokens=5)], initial=4, tpot_slo=0.02
+        )
+        stream = await dispatcher.create(model="stub", messages=[], stream=True)
+        # Read to the end, which gives the slot back
+        chunks = [chunk async for chunk in stream]
+        return dispatcher, chunks
+
+    dispatcher, chunks = asyncio.run(run())
+
+    assert len(chunks) == 5
+    # 0.3s / 5 tokens would miss a 0.02s TPOT; after the first token it meets it
+    assert dispatcher.stats()[0]["decreases"] == 0
@@ -0,0 +1,165 @@
+"""Streaming extraction, budgets, revalidation and passages, over a mock transport."""
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+from web_pages import MarkdownExtractor, WebPageFetcher, select_passages  # noqa: E402
+
+ARTICLE = """<html><head><title>Gotham City</title>
+<style>body { color: black }</style><script>track("visit")</script></head>
+<body><nav><a href="/home">Home</a> | <a href="/about">About</a></nav>
+<h1>Gotham City</h1>
+<p>Gotham is a city in <a href="/wiki/New_Jersey">New Jersey</a>.</p>
+<p><a href="/share"><img src="share.png"></a> Population: 8 million.</p>
+<ul><li>Wayne Manor</li><li>Arkham Asylum</li></ul>
+<form><button>Subscribe</button></form>
+<footer>Copyright Gotham Gazette</footer></body></html>"""
+
+
+def extract(html: str, chunk: int = 7) -> MarkdownExtractor:
+    """Feed `html` in small chunks, as it would arrive from the network."""
+    extractor = MarkdownExtractor("https://gotham.example/wiki/Gotham")
+    for start in range(0, len(html), chunk):
+        extractor.feed(html[start : start + chunk])
+    extractor.close()
+    return extractor
+
+
+def test_extractor_keeps_content_and_skips_chrome():
+    extractor = extract(ARTICLE)
+
+    assert extractor.title == "Gotham City"
+    assert extractor.text == (
+        "# Gotham City\n\n"
+        "Gotham is a city in [New Jersey](https://gotham.example/wiki/New_Jersey).\n\n"
+        "Population: 8 million.\n\n"
+        "- Wayne Manor\n- Arkham Asylum"
+    )
+    for skipped in ("track", "color", "Home", "Subscribe", "Copyright"):
+        assert skipped not in extractor.text
+
+
+def test_extractor_drops_a_link_without_text():
+    extractor = extract('<p>See <a href="/icon"><img src="i.png"></a>this.</p>')
+
+    assert extractor.text == "See this."
+    assert extractor.length == len("\n\nSee this.\n\n")
+
+
+class Site:
+    """A mock site serving pages, with ETags, over httpx.MockTransport."""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+        self.chunks_sent = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        body, etag = self.pages[request.url.path]
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"etag": etag})
+
+        def stream():
+            for start in range(0, len(body), 100):
+                self.chunks_sent += 1
+                yield body[start : start + 100].encode()
+
+        headers = {"content-type": "text/html; charset=utf-8", "etag": etag}
+        return httpx.Response(200, headers=headers, content=stream())
+
+
+@pytest.fixture
+def site(tmp_path):
+    site = Site()
+    fetcher = WebPageFetcher(cache_dir=str(tmp_path / "cache"), ttl=3600)
+    fetcher.client = httpx.Client(transport=httpx.MockTransport(site.handle))
+    site.fetcher = fetcher
+    yield site
+    fetcher.close()
+
+
+def long_article(paragraphs: int = 200) -> str:
+    return "".join(
+        f"<p>Paragraph {n} about the city of Gotham.</p>" for n in range(paragraphs)
+    )
+
+
+def test_fetch_stops_at_min_chars(site):
+    body = long_article()
+    site.pages["/long"] = (body, '"v1"')
+
+    page = site.fetcher.fetch("https://gotham.example/long", min_chars=500)
+
+    assert page.truncated
+    assert len(page.text) == 500
+    # Downloading stopped well before the end of the page
+    assert site.chunks_sent < len(body) // 100 / 2
+    assert site.fetcher.stats()["downloads"] == 1
+
+
+def test_stale_page_is_revalidated_with_a_304(site):
+    site.pages["/gotham"] = (ARTICLE, '"v1"')
+    url = "https://gotham.example/gotham"
+    first = site.fetcher.fetch(url, min_chars=10_000)
+    assert not first.truncated
+
+    assert site.fetcher.fetch(url, min_chars=10_000) == first
+    assert site.fetcher.stats()["hits"] == 1
+
+    site.fetcher.ttl = 0
+    revalidated = site.fetcher.fetch(url, min_chars=10_000)
+
+    assert revalidated.text == first.text
+    assert site.requests[-1].headers["if-none-match"] == '"v1"'
+    stats = site.fetcher.stats()
+    assert (stats["revalidated"], stats["downloads"]) == (1, 1)
+
+
+def test_cached_page_too_short_for_the_request_is_downloaded_again(site):
+    site.pages["/long"] = (long_article(), '"v1"')
+    url = "https://gotham.example/long"
+    site.fetcher.fetch(url, min_chars=300)
+
+    page = site.fetcher.fetch(url, min_chars=3000)
+
+    assert len(page.text) == 3000
+    assert "if-none-match" not in site.requests[-1].headers
+    assert site.fetcher.stats()["downloads"] == 2
+
+
+def test_read_marks_truncation_and_focuses_on_the_query(site):
+    body = long_article(100).replace(
+        "Paragraph 70 about the city", "Paragraph 70: the mayor of the city"
+    )
+    site.pages["/long"] = (body, '"v1"')
+    url = "https://gotham.example/long"
+
+    text = site.fetcher.read(url, max_tokens=50)
+    assert text.startswith("Paragraph 0")
+    assert text.endswith("_[Truncated to ~50 tokens]_")
+
+    # Enough for the passage around the match, not for the page
+    focused = site.fetcher.read(url, query="mayor", max_tokens=200)
+    assert "Paragraph 70: the mayor" in focused
+    assert "Paragraph 0 " not in focused
+
+
+def test_select_passages_keeps_document_order_and_marks_gaps():
+    text = "\n\n".join(
+        [
+            "The mayor of Gotham is elected.",
+            "Filler about bridges.",
+            "Filler about tunnels.",
+            "Gotham's mayor lives downtown.",
+        ]
+    )
+
+    chosen = select_passages(text, "mayor", max_chars=200, passage_chars=10)
+
+    assert chosen == (
+        "The mayor of Gotham is elected.\n\n[...]\n\nGotham's mayor lives downtown."
+    )
+    assert select_passages(text, "zeppelin", max_chars=12) == text[:12]
@@ -0,0 +1,90 @@
+"""Snippet de-duplication in a SearchSession, over a canned searcher."""
+
+import pytest
+
+from web_search import SearchSession, WebSearcher
+
+PAGES = {
+    "batman filming locations": [
+        {"title": "Locations", "href": "https://a.example", "body": "Chicago"},
+        {"title": "Gotham", "href": "https://b.example", "body": "Pittsburgh"},
+    ],
+    "batman begins locations": [
+        {"title": "Locations", "href": "https://a.example", "body": "Chicago"},
+    ],
+}
+
+
+class CannedSearcher:
+    def __init__(self):
+        self.batches = []
+
+    def search(self, query):
+        return PAGES[" ".join(query.lower().split())]
+
+    def search_many(self, queries):
+        self.batches.append(list(queries))
+        return {query: self.search(query) for query in queries}
+
+
+def test_other_query_lists_a_shown_url_in_one_line():
+    session = SearchSession(CannedSearcher())
+    session.search("batman filming locations")
+
+    assert session.search("batman begins locations").endswith(
+        "[Locations](https://a.example) (already listed)"
+    )
+
+
+def test_repeated_query_shows_its_snippets_again():
+    session = SearchSession(CannedSearcher())
+    first = session.search("batman filming locations")
+
+    assert session.search("Batman  filming locations") == first
+    assert "Chicago" in session.search_many(["batman filming locations"])
+
+
+def test_batch_drops_queries_differing_in_case_or_spacing():
+    searcher = CannedSearcher()
+    session = SearchSession(searcher)
+
+    output = session.search_many(
+        ["batman filming locations", "Batman filming  locations ", " "]
+    )
+
+    assert searcher.batches == [["batman filming locations"]]
+    assert output.count("## Search Results") == 1
+
+
+class FlakyDDGS:
+    """A DDGS stand-in that is rate limited for queries about jokers."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def text(self, query, max_results):
+        self.calls += 1
+        if "joker" in query:
+            raise RuntimeError("202 Ratelimit")
+        return [{"title": "Locations", "href": "https://a.example", "body": "Chicago"}]
+
+
+def test_failed_query_shows_its_error_and_is_not_cached(tmp_path):
+    pytest.importorskip("ddgs")
+    searcher = WebSearcher(cache_path=str(tmp_path / "search.sqlite"), rate_limit=None)
+    searcher.ddgs = FlakyDDGS()
+    session = searcher.session()
+
+    output = session.search_many(["batman locations", "joker locations"])
+
+    assert "Chicago" in output
+    assert (
+        "## Search Results: joker locations\n\nSearch failed (RuntimeError: 202 Ratelimit)"
+        in output
+    )
+    assert "No results found" not in output
+
+    # The failure wasn't cached, and retrying it isn't treated as a repeat
+    session.search_many(["batman locations", "joker locations"])
+    assert searcher.ddgs.calls == 3
+    assert "joker locations" not in session.queries
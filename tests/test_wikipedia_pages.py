@@ -0,0 +1,95 @@
+"""Wikipedia summaries within their budget, over stubbed search and pages."""
+
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+from prompt_layout import CHARS_PER_TOKEN  # noqa: E402
+from web_pages import Page  # noqa: E402
+from wikipedia_pages import MIN_PAGE_CHARS, WikipediaReader, trim  # noqa: E402
+
+SENTENCE = "Ada Lovelace wrote the first published program for the Engine. "
+
+
+class StubReader(WikipediaReader):
+    """Canned titles and introductions; `missing` titles raise KeyError."""
+
+    def __init__(self, texts, missing=(), error=None):
+        super().__init__(cache_dir="")
+        self.texts = texts
+        self.missing = set(missing)
+        self.error = error
+
+    def search(self, query, k=3):
+        return list(self.texts)[:k]
+
+    def page(self, title):
+        if self.error:
+            raise self.error
+        if title in self.missing:
+            raise KeyError(title)
+        return Page(
+            url=title,
+            title=title,
+            text=self.texts[title],
+            truncated=False,
+            fetched_at=time.time(),
+        )
+
+
+def long_pages(n=5):
+    return {f"Page {i}": SENTENCE * 100 for i in range(n)}
+
+
+@pytest.mark.parametrize("max_tokens", [60, 100, 400, 1500])
+def test_summaries_stay_within_the_budget(max_tokens):
+    reader = StubReader(long_pages())
+
+    text = reader.summaries("ada", k=5, max_tokens=max_tokens)
+
+    assert len(text) <= max_tokens * CHARS_PER_TOKEN
+    assert text.startswith("## Page 0\n")
+
+
+def test_pages_are_dropped_when_the_budget_runs_out():
+    reader = StubReader(long_pages())
+
+    small = reader.summaries("ada", k=5, max_tokens=100)
+    large = reader.summaries("ada", k=5, max_tokens=1500)
+
+    assert small.count("## Page") == 1
+    assert large.count("## Page") == 5
+    for section in large.split("\n\n## ")[1:]:
+        assert len(section.split("\n\n", 1)[1]) >= MIN_PAGE_CHARS
+
+
+def test_short_introductions_leave_room_for_later_pages():
+    texts = long_pages(3)
+    texts["Page 0"] = "A short introduction."
+    reader = StubReader(texts)
+
+    text = reader.summaries("ada", k=3, max_tokens=300)
+
+    assert "A short introduction." in text
+    assert text.count("## Page") == 3
+    assert len(text) <= 300 * CHARS_PER_TOKEN
+
+
+def test_missing_pages_are_skipped_but_request_errors_raise():
+    reader = StubReader(long_pages(2), missing={"Page 0"})
+    assert reader.summaries("ada", k=2).startswith("## Page 1\n")
+
+    reader = StubReader({"Page 0": SENTENCE}, error=httpx.ConnectError("down"))
+    with pytest.raises(httpx.ConnectError):
+        reader.summaries("ada")
+
+
+def test_trim_counts_its_marker():
+    text = SENTENCE * 10
+    for max_chars in (50, 100, 333):
+        assert len(trim(text, max_chars)) <= max_chars
+    assert trim(text, 200).endswith(". [...]")
+    assert trim("short", 200) == "short"